@@ -0,0 +1,109 @@
+"""Micro-benchmark: token verifications per second with the token cache on and off.
+
+Run from the backend directory:
+
+    python -m benchmarks.token_cache [--tokens 50] [--requests 20000]
+
+Every simulated request looks the token up like AuthMiddleware does (cache first,
+full RS256 verification on a miss). Tokens are signed with a throwaway key that is
+published through a file:// JWKS, so no identity provider is needed.
+"""
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+
+AUTH0_DOMAIN = "dealclub-bench.auth0.local"
+AUTH0_AUDIENCE = "https://api.dealclub.bench"
+KEY_ID = "bench-key"
+
+
+# Function to create a signing key and publish its JWKS in a temporary file
+def signing_key():
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": KEY_ID, "use": "sig", "alg": "RS256"})
+
+    fd, jwks_path = tempfile.mkstemp(prefix="jwks-", suffix=".json")
+    with os.fdopen(fd, "w") as f:
+        json.dump({"keys": [public_jwk]}, f)
+    return jwk.construct(private_pem, "RS256"), jwks_path
+
+
+def make_tokens(private_key, count):
+    now = int(time.time())
+    return [
+        jwt.encode(
+            {
+                "sub": f"bench-user-{i}",
+                "iss": f"https://{AUTH0_DOMAIN}/",
+                "aud": AUTH0_AUDIENCE,
+                "iat": now,
+                "exp": now + 3600,
+            },
+            private_key,
+            algorithm="RS256",
+            headers={"kid": KEY_ID},
+        )
+        for i in range(count)
+    ]
+
+
+# Verifications per second for a stream of requests cycling through the tokens
+def run(auth, tokens, requests, enabled):
+    auth.token_cache = auth.TokenCache(maxsize=len(tokens), enabled=enabled)
+    started = time.perf_counter()
+    for i in range(requests):
+        token = tokens[i % len(tokens)]
+        payload = auth.token_cache.get(token)
+        if payload is None:
+            payload = auth.verify_jwt(token)
+    elapsed = time.perf_counter() - started
+    return requests / elapsed, auth.token_cache.stats()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tokens", type=int, default=50, help="distinct tokens")
+    parser.add_argument("--requests", type=int, default=20000, help="requests")
+    args = parser.parse_args()
+
+    private_key, jwks_path = signing_key()
+    os.environ.update(
+        {
+            "AUTH0_DOMAIN": AUTH0_DOMAIN,
+            "AUTH0_AUDIENCE": AUTH0_AUDIENCE,
+            "JWKS_URL": f"file://{jwks_path}",
+        }
+    )
+    from utils import auth  # Reads the configuration above
+
+    auth.jwks_store.refresh()
+    tokens = make_tokens(private_key, args.tokens)
+
+    print(f"{args.requests} requests over {args.tokens} distinct tokens")
+    for enabled in (False, True):
+        rate, stats = run(auth, tokens, args.requests, enabled)
+        print(
+            f"cache {'on ' if enabled else 'off'}: {rate:12,.0f} verifications/s"
+            f"  (hits {stats['hits']}, misses {stats['misses']})"
+        )
+    os.remove(jwks_path)
+
+
+if __name__ == "__main__":
+    main()
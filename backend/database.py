@@ -1,18 +1,145 @@
 import os
+import threading
+import time
+from contextlib import asynccontextmanager
 
 from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 # Load database URL from environment variable
 DATABASE_URL = os.getenv("DATABASE_URL")
 
+# Connection pool configuration
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+# PgBouncer (transaction pooling) mode: PgBouncer owns the pooling, so the app
+# keeps no connections and no per-connection server-side state of its own
+DB_PGBOUNCER = os.getenv("DB_PGBOUNCER", "false").lower() == "true"
+
+# Async (asyncpg) database access for async routes; set DB_ASYNC=false to keep
+# every query on the sync engine (run in the threadpool instead)
+DB_ASYNC = os.getenv("DB_ASYNC", "true").lower() == "true"
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+
+# Pool mixin recording how long checkouts wait and how often they time out
+class InstrumentedPoolMixin:
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.wait_time_total = 0.0
+        self.wait_time_max = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            with self._stats_lock:
+                self.checkout_failures += 1
+            raise
+        waited = time.perf_counter() - start
+        with self._stats_lock:
+            self.checkouts += 1
+            self.wait_time_total += waited
+            self.wait_time_max = max(self.wait_time_max, waited)
+        return connection
+
+    def recreate(self):
+        # Keep the counters when the pool is recreated (e.g. engine.dispose())
+        pool = super().recreate()
+        pool._stats_lock = self._stats_lock
+        pool.checkouts = self.checkouts
+        pool.checkout_failures = self.checkout_failures
+        pool.wait_time_total = self.wait_time_total
+        pool.wait_time_max = self.wait_time_max
+        return pool
+
+
+# Queue pool of the sync (psycopg2) engine
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+# Queue pool of the async (asyncpg) engine
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+# Engine keyword arguments derived from the pool configuration
+def engine_options():
+    if DB_PGBOUNCER:
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
+# Derive the asyncpg URL from the sync one if it is not configured explicitly
+def async_database_url(url):
+    if ASYNC_DATABASE_URL:
+        return ASYNC_DATABASE_URL
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix) :]
+    return url
+
+
+# Engine keyword arguments for the async engine
+def async_engine_options():
+    if DB_PGBOUNCER:
+        # asyncpg prepares statements server-side by default, which breaks
+        # under PgBouncer transaction pooling
+        return {
+            "poolclass": NullPool,
+            "connect_args": {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+            },
+        }
+    return {
+        "poolclass": InstrumentedAsyncQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+    }
+
+
 # Create the SQLAlchemy engine
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **engine_options())
 
 # Create a session factory
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Create the async engine and session factory
+if DB_ASYNC:
+    async_engine = create_async_engine(
+        async_database_url(DATABASE_URL), **async_engine_options()
+    )
+    AsyncSessionLocal = sessionmaker(
+        async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+    )
+else:
+    async_engine = None
+    AsyncSessionLocal = None
+
 # Create a declarative base for models
 Base = declarative_base()
 
@@ -24,3 +151,110 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# Awaitable facade over a sync Session with the subset of the AsyncSession API the
+# async routes use, so they keep working when DB_ASYNC is disabled
+class ThreadedSession:
+    def __init__(self, sync_session):
+        self.sync_session = sync_session
+
+    def add(self, instance):
+        self.sync_session.add(instance)
+
+    def add_all(self, instances):
+        self.sync_session.add_all(instances)
+
+    async def execute(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.execute, *args, **kwargs)
+
+    async def scalar(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.scalar, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return await run_in_threadpool(self.sync_session.get, *args, **kwargs)
+
+    async def delete(self, instance):
+        await run_in_threadpool(self.sync_session.delete, instance)
+
+    async def flush(self):
+        await run_in_threadpool(self.sync_session.flush)
+
+    async def refresh(self, instance):
+        await run_in_threadpool(self.sync_session.refresh, instance)
+
+    async def commit(self):
+        await run_in_threadpool(self.sync_session.commit)
+
+    async def rollback(self):
+        await run_in_threadpool(self.sync_session.rollback)
+
+    async def close(self):
+        await run_in_threadpool(self.sync_session.close)
+
+
+# Async session for code outside of requests (e.g. background workers)
+@asynccontextmanager
+async def async_session():
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    db = ThreadedSession(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+# Dependency to get an async database session in async FastAPI routes
+async def get_async_db():
+    async with async_session() as db:
+        yield db
+
+
+# Stream the rows of a select statement in batches of batch_size without loading the
+# whole result. Uses its own session so it can outlive the request's dependencies.
+async def stream_rows(statement, batch_size=1000):
+    statement = statement.execution_options(yield_per=batch_size)
+    if AsyncSessionLocal is not None:
+        async with AsyncSessionLocal() as db:
+            result = await db.stream(statement)
+            async for rows in result.partitions(batch_size):
+                yield rows
+        return
+
+    def iterate_sync():
+        db = SessionLocal()
+        try:
+            result = db.execute(statement)
+            for rows in result.partitions(batch_size):
+                yield rows
+        finally:
+            db.close()
+
+    async for rows in iterate_in_threadpool(iterate_sync()):
+        yield rows
+
+
+# Current connection pool metrics of an engine (the sync engine by default)
+def pool_stats(bind=None):
+    bind = bind or engine
+    pool = getattr(bind, "sync_engine", bind).pool
+    if not isinstance(pool, InstrumentedPoolMixin):
+        return {"pool": type(pool).__name__}
+
+    with pool._stats_lock:
+        checkouts = pool.checkouts
+        return {
+            "pool": type(pool).__name__,
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+            "checkouts": checkouts,
+            "checkout_failures": pool.checkout_failures,
+            "wait_time_avg": pool.wait_time_total / checkouts if checkouts else 0.0,
+            "wait_time_max": pool.wait_time_max,
+        }
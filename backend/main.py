@@ -1,16 +1,55 @@
-from database import engine, get_db
-from fastapi import FastAPI
-from middleware import AuthMiddleware
+import orjson
+from database import DATABASE_URL, async_engine, engine, get_db, pool_stats
+from fastapi import FastAPI, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from middleware import AuthMiddleware, QueryCounterMiddleware
 from models.assets_models import Asset
 from models.user_models import User
-from routes import user
+from routes import assets, bids, dataroom, events, marketplace, nda, user
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from utils.access_cache import access_cache
+from utils.auth import jwks_store, token_cache
+from utils.events import event_broker
+from utils.jobs import job_queue
+from utils.listing_cache import bucket_cache, listing_cache
+from utils.order_book import order_books
+from utils.presign import presigned_urls
+from utils.query_counter import QUERY_COUNTER, query_counter
+from utils.storage import object_store
 
+# Routes with a response model are validated and serialized by Pydantic, straight
+# to JSON bytes
 app = FastAPI()
 
 app.add_middleware(AuthMiddleware)
 
+# Development mode: count queries per request against the endpoint budgets
+if QUERY_COUNTER:
+    query_counter.instrument(engine)
+    if async_engine is not None:
+        query_counter.instrument(async_engine.sync_engine)
+    app.add_middleware(QueryCounterMiddleware)
+
 app.include_router(user.router)
+app.include_router(nda.router)
+app.include_router(assets.router)
+app.include_router(marketplace.router)
+app.include_router(dataroom.router)
+app.include_router(bids.router)
+app.include_router(events.router)
+
+
+# Validation errors echo the rejected input, which may be NaN or infinity (e.g. a
+# bid amount); orjson renders those as null where the default JSON response fails
+@app.exception_handler(RequestValidationError)
+async def validation_exception_handler(request: Request, exc: RequestValidationError):
+    return Response(
+        orjson.dumps({"detail": jsonable_encoder(exc.errors())}),
+        status_code=422,
+        media_type="application/json",
+    )
 
 
 # Create the database tables
@@ -25,6 +64,37 @@ def startup_event():
     create_demo_data()
 
 
+# Warm the JWKS cache so the first authenticated request does not pay for it (in
+# the threadpool, as the fetch is a blocking HTTP call). If it fails, the first
+# token triggers another fetch.
+@app.on_event("startup")
+async def warm_jwks_cache():
+    await run_in_threadpool(jwks_store.refresh)
+
+
+# Connect the event broker (Postgres LISTEN/NOTIFY backend, if configured)
+@app.on_event("startup")
+async def start_event_broker():
+    await event_broker.start(
+        DATABASE_URL.replace("postgresql+psycopg2://", "postgresql://")
+    )
+
+
+# Start the background job workers
+@app.on_event("startup")
+async def start_job_workers():
+    await job_queue.start()
+
+
+# Close pooled async connections on shutdown
+@app.on_event("shutdown")
+async def shutdown_event():
+    await job_queue.stop()
+    await event_broker.stop()
+    if async_engine is not None:
+        await async_engine.dispose()
+
+
 def create_demo_data():
     db: Session = next(get_db())
 
@@ -121,3 +191,23 @@ def create_demo_data():
 @app.get("/health")
 async def health_check():
     return {"status": "healthy"}
+
+
+# Cache and pool counters for monitoring
+@app.get("/metrics")
+async def metrics():
+    return {
+        "jwks": jwks_store.stats(),
+        "token_cache": token_cache.stats(),
+        "db_pool": pool_stats(),
+        "async_db_pool": pool_stats(async_engine) if async_engine is not None else None,
+        "storage": object_store.stats(),
+        "presigned_urls": presigned_urls.stats(),
+        "listing_cache": listing_cache.stats(),
+        "bucket_cache": bucket_cache.stats(),
+        "access_cache": access_cache.stats(),
+        "order_books": order_books.stats(),
+        "events": event_broker.stats(),
+        "jobs": {**job_queue.stats(), "queued": await job_queue.depth()},
+        "queries": query_counter.stats() if QUERY_COUNTER else None,
+    }
@@ -1,24 +1,116 @@
-from fastapi import HTTPException, Request
-from starlette.middleware.base import BaseHTTPMiddleware
-from utils.auth import verify_jwt
+import os
 
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import JSONResponse
+from starlette.routing import Match
+from utils.auth import get_bearer_token, token_cache, verify_jwt
+from utils.query_counter import query_counter
+
+# Paths that can be called without credentials (the docker-compose healthcheck and
+# the MinIO notification webhook, which checks its own shared secret)
+AUTH_EXEMPT_PATHS = frozenset(
+    path.strip()
+    for path in os.getenv(
+        "AUTH_EXEMPT_PATHS", "/health,/storage/notifications"
+    ).split(",")
+    if path.strip()
+)
+
+
+# Pure ASGI authentication middleware.
+# Unlike BaseHTTPMiddleware it does not wrap the response in an extra task and
+# memory stream, so streaming responses pass straight through.
+class AuthMiddleware:
+    def __init__(self, app, exempt_paths=AUTH_EXEMPT_PATHS):
+        self.app = app
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
 
-class AuthMiddleware(BaseHTTPMiddleware):
-    async def dispatch(self, request: Request, call_next):
         # Extract authorization header
-        auth_header = request.headers.get("Authorization")
-        if auth_header:
+        auth_header = Headers(scope=scope).get("Authorization")
+        if not auth_header:
+            await self._unauthorized(scope, receive, send, "Authorization header missing")
+            return
+
+        token = get_bearer_token(auth_header)
+        if not token:
+            await self._unauthorized(
+                scope, receive, send, "Invalid or missing credentials"
+            )
+            return
+
+        # Verified tokens are served from the cache; anything else is verified
+        # in the threadpool so the event loop is never blocked
+        payload = token_cache.get(token)
+        if payload is None:
             try:
-                # Extract and verify the JWT token
-                token = auth_header.split(" ")[1]
-                verify_jwt(token)
+                payload = await run_in_threadpool(verify_jwt, token)
             except Exception as _:
-                raise HTTPException(
-                    status_code=401, detail="Invalid or missing credentials"
+                await self._unauthorized(
+                    scope, receive, send, "Invalid or missing credentials"
                 )
-        else:
-            raise HTTPException(status_code=401, detail="Authorization header missing")
+                return
+
+        # Keep the payload so route dependencies do not decode the token again
+        scope.setdefault("state", {})["token_payload"] = payload
 
         # Proceed to the next request handler
-        response = await call_next(request)
-        return response
+        await self.app(scope, receive, send)
+
+    @staticmethod
+    async def _unauthorized(scope, receive, send, detail):
+        response = JSONResponse({"detail": detail}, status_code=401)
+        await response(scope, receive, send)
+
+
+# Function to find the route path template of a request ("/assets/{asset_id}")
+def route_path(scope):
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Not routed (e.g. rejected by AuthMiddleware): match the templates ourselves
+    return _match_route_path(scope["app"].router.routes, scope) or scope["path"]
+
+
+def _match_route_path(routes, scope):
+    for route in routes:
+        # FastAPI wraps included routers; search the routes they contain
+        included = getattr(route, "original_router", None)
+        if included is not None:
+            path = _match_route_path(included.routes, scope)
+            if path is not None:
+                return path
+            continue
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return None
+
+
+# Development middleware counting the SQL statements of each request.
+# The count is returned in the X-Query-Count header and checked against the
+# endpoint's query budget (see utils.query_counter).
+class QueryCounterMiddleware:
+    def __init__(self, app, counter=query_counter):
+        self.app = app
+        self.counter = counter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        queries = self.counter.start()
+
+        async def send_with_count(message):
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Query-Count", str(queries[0]))
+            await send(message)
+
+        await self.app(scope, receive, send_with_count)
+        self.counter.record(scope["method"], route_path(scope), queries[0])
@@ -1,2 +1,8 @@
 # models/__init__.py
 from database import Base  # Import Base from database
+from models.assets_models import Asset
+from models.bid_models import Bid
+from models.dataroom_models import DataroomFile, Private_Invitation, Transaction
+from models.job_models import Job
+from models.nda_models import NDA, NDACounter
+from models.user_models import User
@@ -1,16 +1,42 @@
 import uuid
+from datetime import datetime
+from typing import List, Optional
 
 from database import Base  # Import SQLAlchemy Base for database models
 from pydantic import BaseModel
-from sqlalchemy import Boolean, Column, DateTime, Float, ForeignKey, String
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import (
+    Boolean,
+    Column,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    String,
+    text,
+)
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 
 
 # SQLAlchemy model for the Asset table
 class Asset(Base):
     __tablename__ = "assets"
+    __table_args__ = (
+        # Per-owner listing and (owner_id, id) lookups
+        Index("ix_assets_owner_id_created_at_id", "owner_id", "created_at", "id"),
+        # Listings of assets that are for sale, newest first
+        Index("ix_assets_for_sale_created_at", "for_sale", "created_at"),
+        # Marketplace full-text search and price sorting over listed assets
+        Index("ix_assets_search_vector", "search_vector", postgresql_using="gin"),
+        Index(
+            "ix_assets_listed_price_id",
+            "price",
+            "id",
+            postgresql_where=text("for_sale"),
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -28,8 +54,21 @@ class Asset(Base):
         UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
     )  # Assuming users table exists
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Full-text search document, maintained by Postgres whenever the row changes
+    search_vector = deferred(
+        Column(
+            TSVECTOR,
+            Computed(
+                "to_tsvector('english', coalesce(name, '') || ' ' || "
+                "coalesce(description, '') || ' ' || coalesce(additional_info, ''))",
+                persisted=True,
+            ),
+        )
+    )
 
-    owner = relationship("User", back_populates="assets")  # Define the back reference
+    # Define the back reference. Never loaded implicitly: queries that need the
+    # owner load it with joinedload(Asset.owner)
+    owner = relationship("User", back_populates="assets", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<Asset(id={self.id}, name={self.name}, for_sale={self.for_sale})>"
@@ -46,3 +85,20 @@ class AssetUpdate(BaseModel):
     description: str = None
     price: float = None
     additional_info: str = None
+
+
+# Pydantic models for responses (validated and serialized by the routes)
+class AssetOut(BaseModel):
+    id: uuid.UUID
+    name: str
+    description: Optional[str] = None
+    for_sale: Optional[bool] = None
+    price: Optional[float] = None
+    additional_info: Optional[str] = None
+    owner_id: uuid.UUID
+    created_at: Optional[datetime] = None
+
+
+class AssetPage(BaseModel):
+    assets: List[AssetOut]
+    next_cursor: Optional[str] = None
@@ -0,0 +1,54 @@
+import uuid
+
+from database import Base  # Import SQLAlchemy Base for database models
+from pydantic import BaseModel, Field
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Sequence,
+    String,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+# Global change sequence: every insert or status change of a bid takes the next
+# value, so in-memory order books can catch up with "update_seq > last seen"
+bid_update_seq = Sequence("bids_update_seq", metadata=Base.metadata)
+
+
+# SQLAlchemy model for the Bid table (the durable log behind the order books)
+class Bid(Base):
+    __tablename__ = "bids"
+    __table_args__ = (
+        # Order book catch-up: changes of one asset after a given sequence number
+        Index("ix_bids_asset_id_update_seq", "asset_id", "update_seq"),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        unique=True,
+        nullable=False,
+    )
+    asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"), nullable=False)
+    bidder_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    amount = Column(Float, nullable=False)
+    status = Column(String(32), nullable=False, default="active")
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    update_seq = Column(
+        BigInteger, server_default=bid_update_seq.next_value(), nullable=False
+    )
+
+    def __repr__(self):
+        return f"<Bid(asset_id={self.asset_id}, amount={self.amount}, status={self.status})>"
+
+
+# Pydantic models for validation
+class BidCreate(BaseModel):
+    # Positive and finite (NaN and infinity would poison the order book)
+    amount: float = Field(gt=0, allow_inf_nan=False)
@@ -0,0 +1,69 @@
+import uuid
+
+from database import Base  # Import SQLAlchemy Base for database models
+from sqlalchemy import Column, DateTime, Float, ForeignKey, Index, String
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+
+# SQLAlchemy model for completed purchases (buyers keep private data room access)
+class Transaction(Base):
+    __tablename__ = "transactions"
+    __table_args__ = (
+        Index("ix_transactions_asset_id_buyer_id", "asset_id", "buyer_id"),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        unique=True,
+        nullable=False,
+    )
+    asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"), nullable=False)
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    price = Column(Float, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<Transaction(asset_id={self.asset_id}, buyer_id={self.buyer_id})>"
+
+
+# SQLAlchemy model for invitations to an asset's private data room
+class Private_Invitation(Base):
+    __tablename__ = "private_invitations"
+    __table_args__ = (
+        Index(
+            "ix_private_invitations_asset_id_invited_user_id",
+            "asset_id",
+            "invited_user_id",
+        ),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        unique=True,
+        nullable=False,
+    )
+    asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"), nullable=False)
+    invited_user_id = Column(
+        UUID(as_uuid=True), ForeignKey("users.id"), nullable=False
+    )
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    def __repr__(self):
+        return f"<Private_Invitation(asset_id={self.asset_id}, invited_user_id={self.invited_user_id})>"
+
+
+# SQLAlchemy model for the files of the data room buckets, kept up to date from the
+# MinIO bucket notifications so that files are counted without listing buckets
+class DataroomFile(Base):
+    __tablename__ = "dataroom_files"
+
+    bucket_name = Column(String(255), primary_key=True)
+    object_name = Column(String, primary_key=True)
+
+    def __repr__(self):
+        return f"<DataroomFile(bucket_name={self.bucket_name}, object_name={self.object_name})>"
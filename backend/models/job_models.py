@@ -0,0 +1,38 @@
+import uuid
+
+from database import Base  # Import SQLAlchemy Base for database models
+from sqlalchemy import Column, DateTime, Index, Integer, String, Text
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.sql import func
+
+
+# SQLAlchemy model for background jobs (the persistent side of the job queue)
+class Job(Base):
+    __tablename__ = "jobs"
+    __table_args__ = (
+        # Workers claim due jobs: WHERE status = 'queued' AND run_at <= now()
+        Index("ix_jobs_status_run_at", "status", "run_at"),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        unique=True,
+        nullable=False,
+    )
+    kind = Column(String(64), nullable=False)
+    payload = Column(JSONB, nullable=False, default=dict)
+    # Enqueueing the same key twice creates a single job
+    idempotency_key = Column(String(255), unique=True, nullable=True)
+    status = Column(String(32), nullable=False, default="queued")
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    last_error = Column(Text, nullable=True)
+    run_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<Job(kind={self.kind}, status={self.status}, attempts={self.attempts})>"
@@ -0,0 +1,135 @@
+import uuid
+from typing import List, Literal
+
+from database import Base  # Import SQLAlchemy Base for database models
+from pydantic import BaseModel
+from sqlalchemy import (
+    DDL,
+    BigInteger,
+    CheckConstraint,
+    Column,
+    DateTime,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    UniqueConstraint,
+    event,
+    text,
+)
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+
+
+# NDA workflow: allowed status transitions (rejected, expired and confirmed are final)
+NDA_TRANSITIONS = {
+    "requested": ("signed", "rejected", "expired"),
+    "signed": ("confirmed", "rejected", "expired"),
+    "confirmed": (),
+    "rejected": (),
+    "expired": (),
+}
+NDA_STATUSES = tuple(NDA_TRANSITIONS)
+
+
+# Function to list the statuses an NDA may move to `status` from
+def nda_statuses_before(status: str):
+    return tuple(
+        source for source, targets in NDA_TRANSITIONS.items() if status in targets
+    )
+
+
+# SQLAlchemy model for the NDA table
+class NDA(Base):
+    __tablename__ = "ndas"
+    __table_args__ = (
+        CheckConstraint(
+            "status IN ({})".format(", ".join(f"'{s}'" for s in NDA_STATUSES)),
+            name="ck_ndas_status",
+        ),
+        # Owner inbox: pending NDAs of a set of assets
+        Index("ix_ndas_asset_id_status", "asset_id", "status"),
+        UniqueConstraint("asset_id", "nda_number", name="uq_ndas_asset_id_nda_number"),
+        # At most one open NDA per buyer and asset (makes retried requests idempotent)
+        Index(
+            "uq_ndas_asset_id_buyer_id_open",
+            "asset_id",
+            "buyer_id",
+            unique=True,
+            postgresql_where=text("status IN ('requested', 'signed', 'confirmed')"),
+        ),
+    )
+
+    id = Column(
+        UUID(as_uuid=True),
+        primary_key=True,
+        default=uuid.uuid4,
+        unique=True,
+        nullable=False,
+    )
+    asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"), nullable=False)
+    buyer_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
+    nda_number = Column(Integer, nullable=False)
+    status = Column(String(32), nullable=False, default="requested")
+    requested_at = Column(DateTime(timezone=True), server_default=func.now())
+    signed_at = Column(DateTime(timezone=True), nullable=True)
+    owner_confirmed_at = Column(DateTime(timezone=True), nullable=True)
+    # Size and SHA-256 of the uploaded signed NDA, recorded while it is streamed
+    file_size = Column(BigInteger, nullable=True)
+    file_sha256 = Column(String(64), nullable=True)
+
+    # Loaded explicitly (joinedload) where needed; a lazy load raises instead of
+    # silently adding a query per NDA
+    asset = relationship("Asset", lazy="raise_on_sql")
+    buyer = relationship("User", lazy="raise_on_sql")
+
+    def __repr__(self):
+        return f"<NDA(asset_id={self.asset_id}, nda_number={self.nda_number}, status={self.status})>"
+
+
+# SQLAlchemy model for the per-asset NDA number counter
+class NDACounter(Base):
+    __tablename__ = "nda_counters"
+
+    asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"), primary_key=True)
+    last_number = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<NDACounter(asset_id={self.asset_id}, last_number={self.last_number})>"
+
+
+# Pydantic models for validation
+class NDABulkUpdate(BaseModel):
+    action: Literal["confirm", "reject"]
+    nda_ids: List[uuid.UUID]
+
+
+# Enforce the NDA transitions in the database as well, so no code path (or manual
+# SQL) can move an NDA backwards or out of a final status ('%' is escaped for DDL)
+nda_transition_guard = DDL(
+    """
+    CREATE OR REPLACE FUNCTION ndas_guard_status_transition() RETURNS trigger AS $$
+    BEGIN
+        IF NEW.status <> OLD.status AND NOT (
+            {pairs}
+        ) THEN
+            RAISE EXCEPTION 'Invalid NDA status transition: %% -> %%',
+                OLD.status, NEW.status USING ERRCODE = 'check_violation';
+        END IF;
+        RETURN NEW;
+    END;
+    $$ LANGUAGE plpgsql;
+
+    CREATE TRIGGER ndas_status_transition
+        BEFORE UPDATE OF status ON ndas
+        FOR EACH ROW EXECUTE FUNCTION ndas_guard_status_transition();
+    """.format(
+        pairs="\n            OR ".join(
+            f"(OLD.status = '{source}' AND NEW.status = '{target}')"
+            for source, targets in NDA_TRANSITIONS.items()
+            for target in targets
+        )
+    )
+)
+event.listen(NDA.__table__, "after_create", nda_transition_guard)
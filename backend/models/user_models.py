@@ -1,8 +1,10 @@
 import uuid
+from datetime import datetime
+from typing import List, Optional
 
 from database import Base  # Import SQLAlchemy Base for database models
 from pydantic import BaseModel
-from sqlalchemy import Boolean, Column, DateTime, String
+from sqlalchemy import Boolean, Column, DateTime, Index, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -11,6 +13,17 @@ from sqlalchemy.sql import func
 # SQLAlchemy model for the User table
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Keyset pagination over (created_at, id), optionally filtered by is_active
+        Index("ix_users_created_at_id", "created_at", "id"),
+        Index("ix_users_is_active_created_at_id", "is_active", "created_at", "id"),
+        # Email prefix search (LIKE 'prefix%') independent of the database collation
+        Index(
+            "ix_users_email_prefix",
+            "email",
+            postgresql_ops={"email": "text_pattern_ops"},
+        ),
+    )
 
     id = Column(
         UUID(as_uuid=True),
@@ -25,8 +38,8 @@ class User(Base):
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
-    # Define the relationship to assets
-    assets = relationship("Asset", back_populates="owner")
+    # Define the relationship to assets (load with selectinload(User.assets))
+    assets = relationship("Asset", back_populates="owner", lazy="raise_on_sql")
 
     def __repr__(self):
         return f"<User(id={self.id}, username={self.username}, email={self.email}, is_active={self.is_active})>"
@@ -42,3 +55,17 @@ class UserCreate(BaseModel):
 class UserUpdate(BaseModel):
     username: str = None
     email: str = None
+
+
+# Pydantic models for responses (validated and serialized by the routes)
+class UserOut(BaseModel):
+    user_id: uuid.UUID
+    username: str
+    email: str
+    is_active: Optional[bool] = None
+    created_at: Optional[datetime] = None
+
+
+class UserPage(BaseModel):
+    users: List[UserOut]
+    next_cursor: Optional[str] = None
@@ -1,85 +1,264 @@
-from typing import List
+import hashlib
+from typing import Optional
 
-# from sqlalchemy.orm import Session  # Uncomment when using a database
-# from utils.auth import verify_jwt  # JWT verification function from utils/auth.py
-from demo_data import demo_assets  # Import demo assets from demo_data.py
-from fastapi import APIRouter, HTTPException
-from models.assets_models import Asset, AssetUpdate
+import orjson
+from database import get_async_db  # Database session management
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from models import NDA, Bid, DataroomFile
+from models.assets_models import Asset, AssetOut, AssetPage, AssetUpdate
+from routes.dataroom import enqueue_create_datarooms
+from sqlalchemy import func, or_, select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.auth import get_current_token  # Verified token payload
+from utils.downloads import is_not_modified
+from utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter()
 
 
+# Function to serialize an asset for the API
+def asset_to_dict(asset):
+    return {
+        "id": str(asset.id),
+        "name": asset.name,
+        "description": asset.description,
+        "for_sale": asset.for_sale,
+        "price": asset.price,
+        "additional_info": asset.additional_info,
+        "owner_id": str(asset.owner_id),
+        "created_at": asset.created_at,
+    }
+
+
+# Function to apply an update to an asset owned by the user in a single statement
+# (the caller commits)
+async def update_owned_asset(db: AsyncSession, asset_id: str, user_id: str, values):
+    result = await db.execute(
+        update(Asset)
+        .where(Asset.id == asset_id, Asset.owner_id == user_id)
+        .values(**values)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(
+            status_code=404, detail="Asset not found or not owned by the user"
+        )
+
+
 # Endpoint: Get assets for the current user
-@router.get("/assets/me", response_model=List[Asset])
-def get_user_assets():  # Remove the token dependency for now
-    # user_id = token.get("sub")  # Extract user ID from JWT token
-    user_id = "Testseller"  # For demonstration purposes, hardcoded user
+# Keyset-paginated on (created_at, id) via the (owner_id, created_at, id) index
+@router.get("/assets/me", response_model=AssetPage)
+async def get_user_assets(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user_id = token.get("sub")  # Extract user ID from JWT token
+
+    statement = (
+        select(Asset)
+        .where(Asset.owner_id == user_id)
+        .order_by(Asset.created_at, Asset.id)
+    )
+    if cursor:
+        created_at, asset_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(Asset.created_at, Asset.id) > tuple_(created_at, asset_id)
+        )
 
-    # Use demo assets based on the user_id
-    if user_id in demo_assets:
-        return demo_assets[user_id]
+    # Fetch one extra row to know whether there is a next page
+    assets = (await db.execute(statement.limit(limit + 1))).scalars().all()
+    next_cursor = None
+    if len(assets) > limit:
+        assets = assets[:limit]
+        next_cursor = encode_cursor(assets[-1].created_at, assets[-1].id)
 
-    raise HTTPException(status_code=404, detail="User not found")
+    return {
+        "assets": [asset_to_dict(asset) for asset in assets],
+        "next_cursor": next_cursor,
+    }
+
+
+# Function to count the files of the data rooms of a set of assets with one
+# grouped query: {asset_id: {"public": n, "private": n}}
+async def dataroom_file_counts(db: AsyncSession, asset_ids):
+    buckets = {
+        f"{room}-{asset_id}": (asset_id, room)
+        for asset_id in asset_ids
+        for room in ("public", "private")
+    }
+    counts = {asset_id: {"public": 0, "private": 0} for asset_id in asset_ids}
+    if not buckets:
+        return counts
+
+    file_counts = await db.execute(
+        select(DataroomFile.bucket_name, func.count())
+        .where(DataroomFile.bucket_name.in_(buckets))
+        .group_by(DataroomFile.bucket_name)
+    )
+    for bucket_name, count in file_counts:
+        asset_id, room = buckets[bucket_name]
+        counts[asset_id][room] = count
+    return counts
+
+
+# Function to summarize the NDAs and active bids of a set of assets with one
+# grouped query each: {asset_id: {...}}
+async def asset_activity(db: AsyncSession, asset_ids):
+    activity = {
+        asset_id: {"ndas": {}, "bids": {"count": 0, "best": None}}
+        for asset_id in asset_ids
+    }
+    if not asset_ids:
+        return activity
+
+    nda_counts = await db.execute(
+        select(NDA.asset_id, NDA.status, func.count())
+        .where(NDA.asset_id.in_(asset_ids))
+        .group_by(NDA.asset_id, NDA.status)
+    )
+    for asset_id, status, count in nda_counts:
+        activity[asset_id]["ndas"][status] = count
+
+    bid_summaries = await db.execute(
+        select(Bid.asset_id, func.count(), func.max(Bid.amount))
+        .where(Bid.asset_id.in_(asset_ids), Bid.status == "active")
+        .group_by(Bid.asset_id)
+    )
+    for asset_id, count, best in bid_summaries:
+        activity[asset_id]["bids"] = {"count": count, "best": best}
+    return activity
+
+
+# Endpoint: Dashboard of the current user's assets
+# Everything the assets page shows in one response: the assets with their sale
+# state, NDA counts per status, active bid summaries and data room file counts.
+# Four queries per page regardless of the number of assets; supports
+# If-None-Match (304 when the dashboard has not changed).
+@router.get("/assets/me/dashboard")
+async def get_assets_dashboard(
+    request: Request,
+    limit: int = Query(1000, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user_id = token.get("sub")
+
+    statement = (
+        select(Asset)
+        .where(Asset.owner_id == user_id)
+        .order_by(Asset.created_at, Asset.id)
+    )
+    if cursor:
+        created_at, asset_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(Asset.created_at, Asset.id) > tuple_(created_at, asset_id)
+        )
+
+    assets = (await db.execute(statement.limit(limit + 1))).scalars().all()
+    next_cursor = None
+    if len(assets) > limit:
+        assets = assets[:limit]
+        next_cursor = encode_cursor(assets[-1].created_at, assets[-1].id)
+
+    activity = await asset_activity(db, [asset.id for asset in assets])
+    # Data rooms only exist for assets that were offered for sale
+    datarooms = await dataroom_file_counts(
+        db, [asset.id for asset in assets if asset.for_sale]
+    )
+
+    body = orjson.dumps(
+        {
+            "assets": [
+                {
+                    **asset_to_dict(asset),
+                    **activity[asset.id],
+                    "dataroom_files": datarooms.get(asset.id),
+                }
+                for asset in assets
+            ],
+            "next_cursor": next_cursor,
+        }
+    )
+
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if is_not_modified(request, etag, None):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 # Endpoint: Offer an asset for sale
 @router.post("/assets/{asset_id}/offer")
-def offer_asset_for_sale(
+async def offer_asset_for_sale(
     asset_id: str,
     sale_info: AssetUpdate,
-    # token: dict = Depends(verify_jwt),  # JWT dependency removed
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_id = "Testseller"  # For demonstration purposes, hardcoded user
-
-    # Find the asset in demo data
-    asset = next((a for a in demo_assets[user_id] if a["id"] == asset_id), None)
-    if not asset:
-        raise HTTPException(
-            status_code=404, detail="Asset not found or not owned by the user"
-        )
+    user_id = token.get("sub")
 
     # Update asset for sale information
-    asset["for_sale"] = True
-    asset["price"] = sale_info.price
-    asset["additional_info"] = sale_info.additional_info
+    await update_owned_asset(
+        db,
+        asset_id,
+        user_id,
+        {
+            "for_sale": True,
+            "price": sale_info.price,
+            "additional_info": sale_info.additional_info,
+        },
+    )
+    # The data rooms are created in the background, committed with the listing
+    await enqueue_create_datarooms(db, asset_id)
+    await db.commit()
 
     return {"message": "Asset offered for sale successfully"}
 
 
-# Endpoint: Get details of a specific asset
-@router.get("/assets/{asset_id}", response_model=Asset)
-def get_asset_details(
-    asset_id: str,  # token: dict = Depends(verify_jwt),  # JWT dependency removed
+# Endpoint: Get details of a specific asset (own assets or assets listed for sale)
+@router.get("/assets/{asset_id}", response_model=AssetOut)
+async def get_asset_details(
+    asset_id: str,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_id = "Testseller"  # For demonstration purposes, hardcoded user
+    user_id = token.get("sub")
 
-    asset = next((a for a in demo_assets[user_id] if a["id"] == asset_id), None)
+    asset = await db.scalar(
+        select(Asset).where(
+            Asset.id == asset_id,
+            or_(Asset.owner_id == user_id, Asset.for_sale.is_(True)),
+        )
+    )
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    return asset
+    return asset_to_dict(asset)
 
 
 # Endpoint: Update asset information
 @router.patch("/assets/{asset_id}")
-def update_asset(
+async def update_asset(
     asset_id: str,
     updated_data: AssetUpdate,
-    # token: dict = Depends(verify_jwt),  # JWT dependency removed
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
-    user_id = "Testseller"  # For demonstration purposes, hardcoded user
-
-    # Retrieve the asset from demo data
-    asset = next((a for a in demo_assets[user_id] if a["id"] == asset_id), None)
-    if not asset:
-        raise HTTPException(
-            status_code=404, detail="Asset not found or not owned by the user"
-        )
+    user_id = token.get("sub")
 
     # Update asset data if provided
+    values = {}
     if updated_data.name:
-        asset["name"] = updated_data.name
+        values["name"] = updated_data.name
     if updated_data.description:
-        asset["description"] = updated_data.description
+        values["description"] = updated_data.description
+    if not values:
+        raise HTTPException(status_code=400, detail="No asset fields to update")
+
+    await update_owned_asset(db, asset_id, user_id, values)
+    await db.commit()
 
     return {"message": "Asset information updated successfully"}
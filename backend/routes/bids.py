@@ -0,0 +1,145 @@
+from database import get_async_db  # Database session management
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.assets_models import Asset
+from models.bid_models import Bid, BidCreate, bid_update_seq
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.auth import get_current_token  # Verified token payload
+from utils.events import asset_topic, event_broker
+from utils.order_book import order_books
+
+router = APIRouter()
+
+
+# Function to bring the in-memory order book of an asset up to date with the bids
+# table (only rows changed since the book's last sequence number are read)
+async def sync_order_book(db: AsyncSession, asset_id):
+    book = order_books.get(asset_id)
+    rows = (
+        await db.execute(
+            select(
+                Bid.id,
+                Bid.bidder_id,
+                Bid.amount,
+                Bid.status,
+                Bid.created_at,
+                Bid.update_seq,
+            )
+            .where(Bid.asset_id == asset_id, Bid.update_seq > book.last_seq)
+            .order_by(Bid.update_seq)
+        )
+    ).all()
+    book.apply(rows)
+    return book
+
+
+# Function to lock the asset row; bids on one asset are serialized on this lock, so
+# their update_seq values are committed in order
+async def lock_asset(db: AsyncSession, asset_id: str):
+    asset = await db.scalar(
+        select(Asset).where(Asset.id == asset_id).with_for_update()
+    )
+    if not asset:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return asset
+
+
+# Endpoint: Place a bid on an asset that is for sale
+@router.post("/assets/{asset_id}/bids")
+async def place_bid(
+    asset_id: str,
+    bid_data: BidCreate,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user_id = token.get("sub")
+
+    asset = await lock_asset(db, asset_id)
+    if not asset.for_sale:
+        raise HTTPException(status_code=409, detail="Asset is not for sale")
+    if str(asset.owner_id) == user_id:
+        raise HTTPException(status_code=403, detail="You cannot bid on your own asset")
+
+    bid = Bid(asset_id=asset.id, bidder_id=user_id, amount=bid_data.amount)
+    db.add(bid)
+    await db.flush()
+    bid_id = bid.id
+    await db.commit()
+
+    book = await sync_order_book(db, asset.id)
+    rank = book.rank(bid_id)
+    best_bid = book.best()
+    await event_broker.publish(
+        [asset_topic(asset.id)],
+        {
+            "type": "bid.placed",
+            "asset_id": asset.id,
+            "bid_id": bid_id,
+            "amount": bid_data.amount,
+            "rank": rank,
+            "best_bid": best_bid,
+        },
+    )
+
+    return {
+        "message": "Bid placed successfully",
+        "bid_id": bid_id,
+        "rank": rank,
+        "best_bid": best_bid,
+    }
+
+
+# Endpoint: Cancel one of your own active bids
+@router.delete("/assets/{asset_id}/bids/{bid_id}")
+async def cancel_bid(
+    asset_id: str,
+    bid_id: str,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    user_id = token.get("sub")
+
+    asset = await lock_asset(db, asset_id)
+    result = await db.execute(
+        update(Bid)
+        .where(
+            Bid.id == bid_id,
+            Bid.asset_id == asset.id,
+            Bid.bidder_id == user_id,
+            Bid.status == "active",
+        )
+        .values(status="cancelled", update_seq=bid_update_seq.next_value())
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount == 0:
+        raise HTTPException(status_code=404, detail="Active bid not found")
+    await db.commit()
+
+    book = await sync_order_book(db, asset.id)
+    await event_broker.publish(
+        [asset_topic(asset.id)],
+        {
+            "type": "bid.cancelled",
+            "asset_id": asset.id,
+            "bid_id": bid_id,
+            "best_bid": book.best(),
+        },
+    )
+
+    return {"message": "Bid cancelled successfully"}
+
+
+# Endpoint: Ranked list of the highest active bids on an asset
+@router.get("/assets/{asset_id}/bids")
+async def list_bids(
+    asset_id: str,
+    limit: int = Query(20, ge=1, le=500),
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    asset_uuid = await db.scalar(select(Asset.id).where(Asset.id == asset_id))
+    if not asset_uuid:
+        raise HTTPException(status_code=404, detail="Asset not found")
+
+    book = await sync_order_book(db, asset_uuid)
+    return {"best_bid": book.best(), "bid_count": len(book), "bids": book.top(limit)}
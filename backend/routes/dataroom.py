@@ -1,51 +1,200 @@
-from database import get_db
-from fastapi import APIRouter, Depends, HTTPException
-from minio_client import minio_client
-from models import Asset, Private_Invitation, Transaction, User
-from sqlalchemy.orm import Session
+import hmac
+import json
+import os
+import uuid
+from itertools import islice
+from typing import List, Optional
+from urllib.parse import unquote_plus
+
+import orjson
+from database import get_async_db, get_db
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from models import Asset, DataroomFile, Private_Invitation, Transaction, User
+from sqlalchemy import and_, delete, event, exists, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, object_session
+from starlette.concurrency import run_in_threadpool
+from utils.access_cache import access_cache
+from utils.auth import get_current_token  # Verified token payload
+from utils.downloads import object_download_response
+from utils.events import asset_topic, event_broker
+from utils.jobs import job_queue
+from utils.listing_cache import bucket_cache, listing_cache
+from utils.pagination import decode_cursor, encode_cursor
+from utils.presign import STORAGE_OFFLOAD, presigned_url_response, presigned_urls
+from utils.storage import object_store
 
 router = APIRouter()
 
+# Entries serialized per chunk when streaming a listing as NDJSON
+LISTING_STREAM_BATCH_SIZE = 500
 
-# Internal function: Create public and private data rooms when an asset is listed for sale
-def create_datarooms(asset_id: str):
-    public_bucket_name = f"public-{asset_id}"
-    private_bucket_name = f"private-{asset_id}"
+# Shared secret MinIO sends with bucket notifications (webhook target auth_token)
+STORAGE_WEBHOOK_TOKEN = os.getenv("STORAGE_WEBHOOK_TOKEN")
 
-    # Create public bucket if it doesn't exist
-    if not minio_client.bucket_exists(public_bucket_name):
-        minio_client.make_bucket(public_bucket_name)
 
-    # Create private bucket if it doesn't exist
-    if not minio_client.bucket_exists(private_bucket_name):
-        minio_client.make_bucket(private_bucket_name)
+# Function to serialize a listed object (or folder) with its metadata
+def object_to_dict(obj):
+    return {
+        "name": obj.name,
+        "is_dir": obj.is_dir,
+        "size": obj.size,
+        "etag": obj.etag,
+        "last_modified": obj.last_modified,
+        "content_type": obj.content_type,
+    }
 
 
-# Internal function: Check access to the private data room
-def check_private_access(asset_id: str, current_user: User, db: Session):
-    asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not asset:
-        raise HTTPException(status_code=404, detail="Asset not found")
+# Function to stream a bucket listing as NDJSON, in batches.
+# Encoded with orjson like the paged JSON responses (ISO 8601 timestamps).
+def stream_objects_ndjson(objects):
+    while True:
+        batch = list(islice(objects, LISTING_STREAM_BATCH_SIZE))
+        if not batch:
+            return
+        yield b"".join(orjson.dumps(object_to_dict(obj)) + b"\n" for obj in batch)
 
-    if current_user.id == asset.user_id and asset.status == "for_sale":
-        raise HTTPException(
-            status_code=403, detail="You do not have access to the private data room"
+
+# Function to check whether a bucket exists (cached)
+async def bucket_exists(bucket_name: str):
+    exists = bucket_cache.get(bucket_name)
+    if exists is None:
+        exists = await object_store.bucket_exists(bucket_name)
+        bucket_cache.set(bucket_name, exists)
+    return exists
+
+
+# Function to drop the cached listings of a bucket after its content changed
+def invalidate_bucket_listing(bucket_name: str):
+    listing_cache.invalidate(bucket_name)
+
+
+# Function to list a data room bucket: one page with a continuation cursor, or the
+# whole (remaining) listing streamed as NDJSON. Pages are served from the listing
+# cache until the bucket changes.
+# folders=True lists a single level ("/" delimiter) with sub-folders as entries.
+async def list_bucket(
+    bucket_name: str,
+    prefix: str,
+    folders: bool,
+    limit: int,
+    cursor: Optional[str],
+    stream: bool,
+):
+    start_after = decode_cursor(cursor, parsers=(str,))[0] if cursor else None
+
+    if stream:
+        objects = object_store.iter_objects(
+            bucket_name, prefix, not folders, start_after
         )
+        return StreamingResponse(
+            stream_objects_ndjson(objects), media_type="application/x-ndjson"
+        )
+
+    cache_key = json.dumps([prefix, folders, limit, cursor])
+    page, generation = listing_cache.get(bucket_name, cache_key)
+    if page is not None:
+        return page
+
+    # Fetch one extra entry to know whether there is a next page
+    entries = await object_store.list_objects(
+        bucket_name, prefix, not folders, start_after, limit=limit + 1
+    )
+    next_cursor = None
+    if len(entries) > limit:
+        entries = entries[:limit]
+        next_cursor = encode_cursor(entries[-1].name)
+
+    page = {
+        "files": [object_to_dict(obj) for obj in entries],
+        "next_cursor": next_cursor,
+    }
+    listing_cache.put(bucket_name, cache_key, page, generation)
+    return page
+
+
+# Dependency: the User record of the authenticated caller
+def get_current_user(
+    token: dict = Depends(get_current_token), db: Session = Depends(get_db)
+):
+    user = db.query(User).filter(User.id == token.get("sub")).first()
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    return user
+
 
-    transaction = (
-        db.query(Transaction)
-        .filter_by(asset_id=asset_id, buyer_id=current_user.id)
-        .first()
+# Job: Create buckets that do not exist yet
+@job_queue.handler("provision_buckets")
+async def provision_buckets(payload):
+    for bucket_name in payload["buckets"]:
+        if not await object_store.bucket_exists(bucket_name):
+            await object_store.make_bucket(bucket_name)
+        bucket_cache.set(bucket_name, True)
+
+
+# Internal function: Create public and private data rooms when an asset is listed for sale
+async def create_datarooms(asset_id: str):
+    await provision_buckets({"buckets": [f"public-{asset_id}", f"private-{asset_id}"]})
+
+
+# Internal function: Queue the creation of the data rooms of an asset in the
+# caller's transaction; the request returns without waiting for MinIO
+async def enqueue_create_datarooms(db, asset_id):
+    await job_queue.enqueue(
+        db,
+        "provision_buckets",
+        {"buckets": [f"public-{asset_id}", f"private-{asset_id}"]},
+        idempotency_key=f"provision_datarooms:{asset_id}",
     )
-    if transaction:
-        return True  # Buyer has permanent access
 
-    invitation = (
-        db.query(Private_Invitation)
-        .filter_by(asset_id=asset_id, invited_user_id=current_user.id)
-        .first()
+
+# Internal function: Select (asset id, access granted) for a user in a single query.
+# Access is granted to the owner, to buyers with a completed transaction and to
+# invited users.
+def private_access_query(user_id, asset_ids):
+    has_transaction = exists().where(
+        and_(Transaction.asset_id == Asset.id, Transaction.buyer_id == user_id)
     )
-    if not invitation:
+    has_invitation = exists().where(
+        and_(
+            Private_Invitation.asset_id == Asset.id,
+            Private_Invitation.invited_user_id == user_id,
+        )
+    )
+    granted = or_(Asset.owner_id == user_id, has_transaction, has_invitation)
+    return select(Asset.id, granted.label("granted")).where(Asset.id.in_(asset_ids))
+
+
+# Internal function: Parse asset ids, skipping the ones that are not valid UUIDs
+def parse_asset_ids(asset_ids):
+    parsed = []
+    for asset_id in asset_ids:
+        try:
+            parsed.append(uuid.UUID(str(asset_id)))
+        except ValueError:
+            continue
+    return parsed
+
+
+# Internal function: Check access to the private data room
+def check_private_access(asset_id: str, current_user: User, db: Session):
+    # Cache by the canonical UUID, as the invalidation listeners do
+    asset_ids = parse_asset_ids([asset_id])
+    if not asset_ids:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    asset_id = asset_ids[0]
+
+    allowed, generation = access_cache.get(current_user.id, asset_id)
+    if allowed is None:
+        row = db.execute(private_access_query(current_user.id, asset_ids)).first()
+        if row is None:
+            raise HTTPException(status_code=404, detail="Asset not found")
+        allowed = bool(row.granted)
+        access_cache.put(current_user.id, asset_id, allowed, generation)
+
+    if not allowed:
         raise HTTPException(
             status_code=403, detail="You do not have access to this private data room"
         )
@@ -53,25 +202,101 @@ def check_private_access(asset_id: str, current_user: User, db: Session):
     return True
 
 
+# Internal function: Which of the given assets can the user open (one query for
+# all assets that are not in the decision cache)
+def accessible_private_assets(asset_ids, current_user: User, db: Session):
+    accessible = set()
+    unknown = {}  # asset id -> cache generation
+    for asset_id in parse_asset_ids(asset_ids):
+        allowed, generation = access_cache.get(current_user.id, asset_id)
+        if allowed is None:
+            unknown[asset_id] = generation
+        elif allowed:
+            accessible.add(asset_id)
+
+    if unknown:
+        for row in db.execute(private_access_query(current_user.id, list(unknown))):
+            allowed = bool(row.granted)
+            access_cache.put(current_user.id, row.id, allowed, unknown[row.id])
+            if allowed:
+                accessible.add(row.id)
+
+    return accessible
+
+
+# Drop cached access decisions whenever invitations or transactions change.
+# Changes are collected at flush time and dropped once the transaction commits;
+# dropping them earlier would let a concurrent check re-cache the old decision.
+def invalidate_access_after_commit(target, asset_id, user_id):
+    session = object_session(target)
+    pending = session.info.get("access_invalidations")
+    if pending is None:
+        pending = session.info["access_invalidations"] = set()
+        event.listen(session, "after_commit", invalidate_committed_access, once=True)
+    pending.add((asset_id, user_id))
+
+
+def invalidate_committed_access(session):
+    for asset_id, user_id in session.info.pop("access_invalidations", ()):
+        access_cache.invalidate(asset_id, user_id)
+
+
+def invalidate_access_for_transaction(mapper, connection, target):
+    invalidate_access_after_commit(target, target.asset_id, target.buyer_id)
+
+
+def invalidate_access_for_invitation(mapper, connection, target):
+    invalidate_access_after_commit(target, target.asset_id, target.invited_user_id)
+
+
+for event_name in ("after_insert", "after_update", "after_delete"):
+    event.listen(Transaction, event_name, invalidate_access_for_transaction)
+    event.listen(Private_Invitation, event_name, invalidate_access_for_invitation)
+
+
+# Endpoint: Which of the given assets' private data rooms the user can open
+@router.post("/assets/private/access")
+def check_private_access_bulk(
+    asset_ids: List[str],
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    accessible = accessible_private_assets(asset_ids, current_user, db)
+    return {
+        "accessible": [
+            asset_id
+            for asset_id in parse_asset_ids(asset_ids)
+            if asset_id in accessible
+        ]
+    }
+
+
 # Endpoint: List all files in the public data room
+# Supports a prefix/folder view, cursor pagination and NDJSON streaming (stream=true)
 @router.get("/assets/{asset_id}/public/list-files")
-def list_public_files(asset_id: str):
+async def list_public_files(
+    asset_id: str,
+    prefix: str = "",
+    folders: bool = False,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+):
     public_bucket_name = f"public-{asset_id}"
 
     # Check if the public bucket exists
-    if not minio_client.bucket_exists(public_bucket_name):
+    if not await bucket_exists(public_bucket_name):
         raise HTTPException(
             status_code=404, detail="Public data room not found for this asset"
         )
 
-    # List all files in the public bucket
+    # List the files in the public bucket
     try:
-        file_list = []
-        objects = minio_client.list_objects(public_bucket_name)
-        for obj in objects:
-            file_list.append(obj.object_name)
-
-        return {"files": file_list}
+        return await list_bucket(
+            public_bucket_name, prefix, folders, limit, cursor, stream
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error listing public files: {str(e)}"
@@ -79,32 +304,156 @@ def list_public_files(asset_id: str):
 
 
 # Endpoint: List all files in the private data room
+# Supports a prefix/folder view, cursor pagination and NDJSON streaming (stream=true)
 @router.get("/assets/{asset_id}/private/list-files")
-def list_private_files(
+async def list_private_files(
     asset_id: str,
-    current_user: User = Depends(get_db),
+    prefix: str = "",
+    folders: bool = False,
+    limit: int = Query(1000, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    stream: bool = False,
+    current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
 ):
     private_bucket_name = f"private-{asset_id}"
 
     # Check access to the private data room
-    check_private_access(asset_id, current_user, db)
+    await run_in_threadpool(check_private_access, asset_id, current_user, db)
 
     # Check if the private bucket exists
-    if not minio_client.bucket_exists(private_bucket_name):
+    if not await bucket_exists(private_bucket_name):
         raise HTTPException(
             status_code=404, detail="Private data room not found for this asset"
         )
 
-    # List all files in the private bucket
+    # List the files in the private bucket
     try:
-        file_list = []
-        objects = minio_client.list_objects(private_bucket_name)
-        for obj in objects:
-            file_list.append(obj.object_name)
-
-        return {"files": file_list}
+        return await list_bucket(
+            private_bucket_name, prefix, folders, limit, cursor, stream
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=500, detail=f"Error listing private files: {str(e)}"
         )
+
+
+# Endpoint: Download a file from the public data room
+# Supports Range and conditional requests (ETag / Last-Modified)
+@router.get("/assets/{asset_id}/public/files/{file_name:path}")
+async def download_public_file(asset_id: str, file_name: str, request: Request):
+    public_bucket_name = f"public-{asset_id}"
+
+    # Offload mode: the client downloads the file directly from MinIO
+    if STORAGE_OFFLOAD:
+        return presigned_url_response(
+            presigned_urls.get_url(public_bucket_name, file_name)
+        )
+
+    return await object_download_response(
+        object_store, public_bucket_name, file_name, request
+    )
+
+
+# Endpoint: Download a file from the private data room
+# Supports Range and conditional requests (ETag / Last-Modified)
+@router.get("/assets/{asset_id}/private/files/{file_name:path}")
+async def download_private_file(
+    asset_id: str,
+    file_name: str,
+    request: Request,
+    current_user: User = Depends(get_current_user),
+    db: Session = Depends(get_db),
+):
+    private_bucket_name = f"private-{asset_id}"
+
+    # Check access to the private data room
+    await run_in_threadpool(check_private_access, asset_id, current_user, db)
+
+    # Offload mode: the client downloads the file directly from MinIO
+    if STORAGE_OFFLOAD:
+        return presigned_url_response(
+            presigned_urls.get_url(private_bucket_name, file_name)
+        )
+
+    return await object_download_response(
+        object_store, private_bucket_name, file_name, request
+    )
+
+
+# Endpoint: MinIO bucket notifications (webhook target)
+# Internal function: Apply the objects created and removed in data room buckets to
+# the file index (the caller commits). Repeated and overwriting notifications are
+# harmless: the index holds each object name once.
+async def update_dataroom_files(db: AsyncSession, changes):
+    for bucket_name, object_name, created in changes:
+        if created:
+            await db.execute(
+                insert(DataroomFile)
+                .values(bucket_name=bucket_name, object_name=object_name)
+                .on_conflict_do_nothing()
+            )
+        else:
+            await db.execute(
+                delete(DataroomFile).where(
+                    DataroomFile.bucket_name == bucket_name,
+                    DataroomFile.object_name == object_name,
+                )
+            )
+
+
+# Endpoint: MinIO bucket notifications (webhook target)
+# Invalidates the cached listings of every bucket named in the event and the
+# presigned URLs of every object that was overwritten or deleted, and keeps the
+# data room file index up to date
+@router.post("/storage/notifications")
+async def storage_notifications(
+    request: Request, db: AsyncSession = Depends(get_async_db)
+):
+    auth_header = request.headers.get("Authorization", "")
+    token = auth_header.removeprefix("Bearer ").strip()
+    if not STORAGE_WEBHOOK_TOKEN or not hmac.compare_digest(
+        token, STORAGE_WEBHOOK_TOKEN
+    ):
+        raise HTTPException(status_code=403, detail="Invalid notification token")
+
+    notification = await request.json()
+    buckets = set()
+    changes = []  # (bucket, object, created) of the data room buckets, in order
+    for record in notification.get("Records", []):
+        if "s3" not in record:
+            continue
+        bucket_name = record["s3"]["bucket"]["name"]
+        buckets.add(bucket_name)
+        # Object keys are URL-encoded in S3 event records
+        object_name = unquote_plus(record["s3"].get("object", {}).get("key", ""))
+        if not object_name:
+            continue
+        presigned_urls.invalidate(bucket_name, object_name)
+
+        event_name = record.get("eventName", "")
+        created = event_name.startswith("s3:ObjectCreated:")
+        removed = event_name.startswith("s3:ObjectRemoved:")
+        if bucket_name.partition("-")[0] in ("public", "private") and (
+            created or removed
+        ):
+            changes.append((bucket_name, object_name, created))
+
+    if changes:
+        await update_dataroom_files(db, changes)
+        await db.commit()
+
+    for bucket_name in buckets:
+        invalidate_bucket_listing(bucket_name)
+
+        # Let subscribers of the asset know that its data room changed
+        room, _, asset_id = bucket_name.partition("-")
+        if room in ("public", "private") and asset_id:
+            await event_broker.publish(
+                [asset_topic(asset_id)],
+                {"type": "dataroom.files_changed", "asset_id": asset_id, "room": room},
+            )
+
+    return {"invalidated": sorted(buckets)}
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from utils.auth import get_current_token  # Verified token payload
+from utils.events import asset_topic, dumps_event, event_broker, user_topic
+from utils.jobs import job_queue
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on idle event streams
+EVENTS_HEARTBEAT_INTERVAL = 15
+
+
+# Job: Publish queued notifications ({"events": [{"topics": [...], "event": {...}}]})
+@job_queue.handler("notify")
+async def notify(payload):
+    for message in payload["events"]:
+        await event_broker.publish(message["topics"], message["event"])
+
+
+# Function to stream the events of some topics as Server-Sent Events.
+# The subscription is opened by the generator itself, so it is always closed,
+# even if the client disconnects before the stream starts. With asset_id, events
+# about other assets are skipped.
+async def stream_events(topics, asset_id=None):
+    subscription = event_broker.subscribe(topics)
+    try:
+        yield ": connected\n\n"
+        while True:
+            event = await subscription.get(EVENTS_HEARTBEAT_INTERVAL)
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            if asset_id is not None and event.get("asset_id", asset_id) != asset_id:
+                continue
+            yield f"event: {event['type']}\ndata: {dumps_event(event)}\n\n"
+    finally:
+        subscription.close()
+
+
+# Endpoint: Server-Sent Events for an asset
+# Pushes bid updates and data room file changes for the asset, plus the caller's
+# own NDA status transitions for this asset
+@router.get("/assets/{asset_id}/events")
+async def asset_events(asset_id: str, token: dict = Depends(get_current_token)):
+    topics = [asset_topic(asset_id), user_topic(token.get("sub"))]
+    return StreamingResponse(
+        stream_events(topics, asset_id=asset_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
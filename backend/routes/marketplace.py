@@ -0,0 +1,91 @@
+import uuid
+from datetime import datetime
+from typing import Literal, Optional
+
+from database import get_async_db  # Database session management
+from fastapi import APIRouter, Depends, HTTPException, Query
+from models.assets_models import Asset
+from routes.assets import asset_to_dict
+from sqlalchemy import func, literal_column, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from utils.auth import get_current_token  # Verified token payload
+from utils.pagination import decode_cursor, encode_cursor
+
+router = APIRouter()
+
+# Supported orderings: sort key column(s), direction and cursor value parsers
+MARKETPLACE_SORTS = {
+    "newest": ("created_at", "desc", (datetime.fromisoformat, uuid.UUID)),
+    "price_asc": ("price", "asc", (float, uuid.UUID)),
+    "price_desc": ("price", "desc", (float, uuid.UUID)),
+    "relevance": ("rank", "desc", (float, uuid.UUID)),
+}
+
+
+# Endpoint: Search the assets that are listed for sale
+# Full-text search over name, description and additional info (GIN-indexed
+# tsvector), price range filters, sorting and keyset pagination
+@router.get("/marketplace")
+async def search_marketplace(
+    q: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    sort: Literal["newest", "price_asc", "price_desc", "relevance"] = "newest",
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
+    if sort == "relevance" and not q:
+        raise HTTPException(
+            status_code=400, detail="Sorting by relevance requires a search query"
+        )
+
+    key_name, direction, parsers = MARKETPLACE_SORTS[sort]
+
+    statement = select(Asset).where(Asset.for_sale.is_(True))
+    rank = None
+    if q:
+        # The configuration is inlined as a regconfig literal: asyncpg would bind a
+        # plain string parameter as VARCHAR, which websearch_to_tsquery rejects
+        query = func.websearch_to_tsquery(literal_column("'english'::regconfig"), q)
+        statement = statement.where(Asset.search_vector.op("@@")(query))
+        rank = func.ts_rank(Asset.search_vector, query)
+    if min_price is not None:
+        statement = statement.where(Asset.price >= min_price)
+    if max_price is not None:
+        statement = statement.where(Asset.price <= max_price)
+
+    if key_name == "rank":
+        sort_key = rank
+        statement = statement.add_columns(rank)
+    else:
+        sort_key = getattr(Asset, key_name)
+        # Unpriced listings cannot be ordered by price
+        statement = statement.where(sort_key.isnot(None))
+
+    if cursor:
+        last_key = tuple_(*decode_cursor(cursor, parsers))
+        row_key = tuple_(sort_key, Asset.id)
+        statement = statement.where(
+            row_key < last_key if direction == "desc" else row_key > last_key
+        )
+
+    if direction == "desc":
+        statement = statement.order_by(sort_key.desc(), Asset.id.desc())
+    else:
+        statement = statement.order_by(sort_key.asc(), Asset.id.asc())
+
+    # Fetch one extra row to know whether there is a next page
+    rows = (await db.execute(statement.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        last_value = last[1] if key_name == "rank" else getattr(last[0], key_name)
+        next_cursor = encode_cursor(last_value, last[0].id)
+
+    return {
+        "listings": [asset_to_dict(row[0]) for row in rows],
+        "next_cursor": next_cursor,
+    }
@@ -1,69 +1,296 @@
+import asyncio
+import hashlib
+import json
+import uuid
 from datetime import datetime
-from secrets import ALGORITHMS, API_AUDIENCE, AUTH0_DOMAIN  # Import Auth0 configuration
+from typing import Literal, Optional
 
-from database import get_db  # Import the database session management
-from fastapi import APIRouter, Depends, HTTPException, UploadFile
-from fastapi.responses import StreamingResponse
-from fastapi.security import OAuth2AuthorizationCodeBearer
-from jose import JWTError, jwt
-from models import NDA, Asset, User  # Import NDA, User, and Asset models
-from sqlalchemy.orm import Session
-
-from minio import Minio
+from database import async_session, get_async_db  # Database session management
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from models import NDA, Asset, NDACounter, User  # Import NDA, User, and Asset models
+from models.nda_models import NDABulkUpdate, nda_statuses_before
+from sqlalchemy import select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import joinedload
+from starlette.concurrency import run_in_threadpool
+from utils.auth import get_current_token  # Verified token payload
+from utils.downloads import object_download_response
+from utils.events import dumps_event, user_topic
+from utils.jobs import job_queue
+from utils.listing_cache import bucket_cache
+from utils.presign import STORAGE_OFFLOAD, presigned_url_response, presigned_urls
+from utils.storage import ObjectNotFound, object_store
+from utils.uploads import (
+    MAX_UPLOAD_SIZE,
+    UPLOAD_PART_SIZE,
+    StreamingUploadReader,
+    UploadTooLarge,
+)
 
 # Initialize the API router
 router = APIRouter()
 
-# Initialize the MinIO client
-minio_client = Minio(
-    "minio:9000",
-    access_key="MINIO_ACCESS_KEY",
-    secret_key="MINIO_SECRET_KEY",
-    secure=False,
-)
 
-# OAuth2 Authorization using Auth0
-oauth2_scheme = OAuth2AuthorizationCodeBearer(
-    authorizationUrl=f"https://{AUTH0_DOMAIN}/authorize",
-    tokenUrl=f"https://{AUTH0_DOMAIN}/oauth/token",
-    scopes={"openid": "OpenID Connect standard scope"},
-)
+# Function to look up a single NDA
+# with_owner=True also loads nda.asset.owner_id in the same query
+async def get_nda(
+    db: AsyncSession,
+    asset_id: str,
+    buyer_id: str,
+    nda_number: int,
+    with_owner: bool = False,
+):
+    statement = select(NDA).where(
+        NDA.asset_id == asset_id,
+        NDA.buyer_id == buyer_id,
+        NDA.nda_number == nda_number,
+    )
+    if with_owner:
+        statement = statement.options(
+            joinedload(NDA.asset).load_only(Asset.owner_id)
+        )
+    return await db.scalar(statement)
+
+
+# Function to push NDA status transitions to the buyers and the asset owners.
+# The events are queued as one notification job in the caller's transaction, so
+# they are only sent once the transition is committed (the caller commits).
+async def publish_nda_status(db: AsyncSession, ndas, status: str, owner_id=None):
+    if not ndas:
+        return
+    if owner_id is None:
+        asset_ids = {nda.asset_id for nda in ndas}
+        owners = dict(
+            (
+                await db.execute(
+                    select(Asset.id, Asset.owner_id).where(Asset.id.in_(asset_ids))
+                )
+            ).all()
+        )
+    events = [
+        {
+            "topics": [
+                user_topic(nda.buyer_id),
+                user_topic(owner_id or owners.get(nda.asset_id)),
+            ],
+            "event": {
+                "type": "nda.status",
+                "asset_id": nda.asset_id,
+                "buyer_id": nda.buyer_id,
+                "nda_number": nda.nda_number,
+                "status": status,
+            },
+        }
+        for nda in ndas
+    ]
+    # Job payloads are JSON: serialize UUIDs and datetimes up front
+    await job_queue.enqueue(db, "notify", {"events": json.loads(dumps_event(events))})
+
+
+# Function to move NDAs to a new status in a single guarded UPDATE.
+# Only NDAs whose current status allows the transition are changed; the changed
+# rows are returned.
+async def transition_ndas(db: AsyncSession, conditions, status: str, **values):
+    result = await db.execute(
+        update(NDA)
+        .where(*conditions, NDA.status.in_(nda_statuses_before(status)))
+        .values(status=status, **values)
+        .returning(NDA.id, NDA.asset_id, NDA.buyer_id, NDA.nda_number)
+        .execution_options(synchronize_session=False)
+    )
+    return result.all()
 
 
-# Function to verify JWT token and extract user
-def verify_jwt(token: str = Depends(oauth2_scheme)):
+# Function to check that an NDA can move to a status, raising 409 otherwise
+def require_nda_transition(nda: NDA, status: str):
+    if nda.status not in nda_statuses_before(status):
+        raise HTTPException(
+            status_code=409, detail=f"NDA cannot be {status} from status {nda.status}"
+        )
+
+
+# Function to check that the caller is the NDA's buyer, raising 403 otherwise.
+# Ids are compared as UUIDs, so any spelling of the caller's own id is accepted.
+def require_buyer(token: dict, buyer_id: str):
     try:
-        payload = jwt.decode(
-            token,
-            f"https://{AUTH0_DOMAIN}/.well-known/jwks.json",
-            algorithms=ALGORITHMS,
-            audience=API_AUDIENCE,
-            issuer=f"https://{AUTH0_DOMAIN}/",
+        is_buyer = uuid.UUID(str(token.get("sub"))) == uuid.UUID(str(buyer_id))
+    except ValueError:
+        is_buyer = False
+    if not is_buyer:
+        raise HTTPException(
+            status_code=403, detail="Only the buyer can request or sign this NDA"
         )
-        return payload  # Return the token payload (e.g., user information)
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+
+# NDA statuses that block a buyer from requesting another NDA for the same asset
+OPEN_NDA_STATUSES = ("requested", "signed", "confirmed")
+
+
+# Function to find the open NDA of a buyer for an asset
+async def get_open_nda(db: AsyncSession, asset_id, buyer_id):
+    return await db.scalar(
+        select(NDA).where(
+            NDA.asset_id == asset_id,
+            NDA.buyer_id == buyer_id,
+            NDA.status.in_(OPEN_NDA_STATUSES),
+        )
+    )
+
+
+# Function to allocate the next NDA number of an asset in O(1).
+# The upsert locks the asset's counter row until the transaction ends, so
+# concurrent requests for the same asset get distinct, gap-free numbers.
+async def allocate_nda_number(db: AsyncSession, asset_id):
+    statement = (
+        insert(NDACounter)
+        .values(asset_id=asset_id, last_number=1)
+        .on_conflict_do_update(
+            index_elements=[NDACounter.asset_id],
+            set_={"last_number": NDACounter.last_number + 1},
+        )
+        .returning(NDACounter.last_number)
+    )
+    return (await db.execute(statement)).scalar_one()
+
+
+# Function to build the response of an NDA request
+def nda_requested_response(asset_id: str, nda_number: int):
+    return {
+        "message": f"NDA number {nda_number} for asset {asset_id} has been requested."
+    }
+
+
+# Content types accepted for signed NDA uploads
+NDA_CONTENT_TYPES = {"application/pdf"}
+
+
+# First bytes of every PDF file
+PDF_MAGIC = b"%PDF-"
+
+
+# Function to create the NDA bucket of an asset if it does not exist yet
+# (normally already done by the provisioning job queued with the NDA request)
+async def ensure_nda_bucket(bucket_name: str):
+    if bucket_cache.get(bucket_name):
+        return
+    if not await object_store.bucket_exists(bucket_name):
+        await object_store.make_bucket(bucket_name)
+    bucket_cache.set(bucket_name, True)
+
+
+# Function to stream an uploaded NDA into the object store
+# The length is unknown up front, so it is uploaded in UPLOAD_PART_SIZE parts
+async def store_nda_file(
+    bucket_name: str, file_path: str, reader: StreamingUploadReader
+):
+    await ensure_nda_bucket(bucket_name)
+
+    await object_store.put_object(
+        bucket_name,
+        file_path,
+        reader,
+        length=-1,
+        part_size=UPLOAD_PART_SIZE,
+        content_type="application/pdf",
+    )
+
+
+# Function to read an opened NDA file (blocking, run in the threadpool).
+# Returns (size, SHA-256, whether it starts like a PDF).
+def digest_nda_file(stored):
+    digest = hashlib.sha256()
+    size = 0
+    head = b""
+    try:
+        for chunk in stored.stream(UPLOAD_PART_SIZE):
+            if len(head) < len(PDF_MAGIC):
+                head += chunk[: len(PDF_MAGIC) - len(head)]
+            digest.update(chunk)
+            size += len(chunk)
+    finally:
+        stored.close()
+    return size, digest.hexdigest(), head == PDF_MAGIC
+
+
+# Function to queue the validation of an uploaded NDA (the caller commits)
+async def enqueue_nda_post_process(
+    db: AsyncSession, nda_id, bucket_name: str, file_path: str, checksum: bool
+):
+    await job_queue.enqueue(
+        db,
+        "nda_post_process",
+        {
+            "nda_id": str(nda_id),
+            "bucket": bucket_name,
+            "file_path": file_path,
+            "checksum": checksum,
+        },
+    )
+
+
+# Job: Check that a signed NDA is a PDF and record its size and SHA-256 (if they
+# were not computed during the upload). NDAs whose file is not a PDF are rejected.
+@job_queue.handler("nda_post_process")
+async def post_process_nda(payload):
+    # Without checksum only the first bytes are read
+    stored = await object_store.open_object(
+        payload["bucket"],
+        payload["file_path"],
+        length=None if payload["checksum"] else len(PDF_MAGIC),
+    )
+    size, sha256, is_pdf = await run_in_threadpool(digest_nda_file, stored)
+
+    async with async_session() as db:
+        if not is_pdf:
+            rejected = await transition_ndas(
+                db, [NDA.id == payload["nda_id"]], "rejected"
+            )
+            await publish_nda_status(db, rejected, "rejected")
+        elif payload["checksum"]:
+            await db.execute(
+                update(NDA)
+                .where(NDA.id == payload["nda_id"])
+                .values(file_size=size, file_sha256=sha256)
+                .execution_options(synchronize_session=False)
+            )
+        await db.commit()
 
 
 # Endpoint: Request NDA
 # This endpoint allows a buyer to request an NDA for a specific asset
 @router.post("/assets/{asset_id}/nda/request")
-def request_nda(
+async def request_nda(
     asset_id: str,
     buyer_id: str,
-    db: Session = Depends(get_db),
-    token: dict = Depends(verify_jwt),
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
 ):
-    asset = db.query(Asset).filter(Asset.id == asset_id).first()
+    require_buyer(token, buyer_id)
+
+    asset = await db.scalar(select(Asset).where(Asset.id == asset_id))
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
 
-    buyer = db.query(User).filter(User.id == buyer_id).first()
+    owner_id = asset.owner_id
+
+    buyer = await db.scalar(select(User).where(User.id == buyer_id))
     if not buyer:
         raise HTTPException(status_code=404, detail="Buyer not found")
 
-    existing_ndas = db.query(NDA).filter(NDA.asset_id == asset_id).count()
-    nda_number = existing_ndas + 1
+    # Retried requests (e.g. double clicks) return the buyer's open NDA
+    existing_nda = await get_open_nda(db, asset_id, buyer_id)
+    if existing_nda is None:
+        nda_number = await allocate_nda_number(db, asset_id)
+        # Re-check now that the counter lock is held: a concurrent request for the
+        # same buyer has committed by the time we get here
+        existing_nda = await get_open_nda(db, asset_id, buyer_id)
+
+    if existing_nda is not None:
+        nda_number = existing_nda.nda_number
+        await db.rollback()
+        return nda_requested_response(asset_id, nda_number)
 
     new_nda = NDA(
         asset_id=asset_id,
@@ -73,43 +300,165 @@ def request_nda(
         requested_at=datetime.utcnow(),
     )
     db.add(new_nda)
-    db.commit()
+    # Create the asset's NDA bucket in the background, ahead of the upload
+    await job_queue.enqueue(
+        db,
+        "provision_buckets",
+        {"buckets": [f"nda-{asset_id}"]},
+        idempotency_key=f"provision_buckets:nda-{asset_id}",
+    )
+    await publish_nda_status(db, [new_nda], "requested", owner_id=owner_id)
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Lost a race on the open-NDA unique index: return the winner's NDA
+        await db.rollback()
+        existing_nda = await get_open_nda(db, asset_id, buyer_id)
+        if existing_nda is None:
+            raise HTTPException(status_code=409, detail="NDA request conflicted")
+        nda_number = existing_nda.nda_number
+        return nda_requested_response(asset_id, nda_number)
 
-    return {
-        "message": f"NDA number {nda_number} for asset {asset_id} has been requested."
-    }
+    return nda_requested_response(asset_id, nda_number)
 
 
 # Endpoint: Upload NDA
-# This endpoint allows a buyer to upload the signed NDA and stores it in the MinIO bucket
+# This endpoint allows a buyer to upload the signed NDA and stores it in the MinIO bucket.
+# The PDF is sent as the raw request body and streamed to MinIO as it arrives.
 @router.post("/assets/{asset_id}/nda/upload")
-def upload_nda(
+async def upload_nda(
     asset_id: str,
     buyer_id: str,
     nda_number: int,
-    nda_file: UploadFile,
-    db: Session = Depends(get_db),
-    token: dict = Depends(verify_jwt),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
 ):
-    nda = (
-        db.query(NDA)
-        .filter_by(asset_id=asset_id, buyer_id=buyer_id, nda_number=nda_number)
-        .first()
+    require_buyer(token, buyer_id)
+
+    # Reject unsupported or oversized uploads before reading the body
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+    if content_type not in NDA_CONTENT_TYPES:
+        raise HTTPException(status_code=415, detail="NDA must be uploaded as a PDF")
+    content_length = request.headers.get("Content-Length")
+    if content_length:
+        try:
+            content_length = int(content_length)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Content-Length header")
+        if content_length > MAX_UPLOAD_SIZE:
+            raise HTTPException(status_code=413, detail="NDA file is too large")
+
+    nda = await get_nda(db, asset_id, buyer_id, nda_number)
+    if not nda:
+        raise HTTPException(status_code=404, detail="NDA not found")
+    require_nda_transition(nda, "signed")
+    nda_id = nda.id
+    await db.commit()  # Release the connection while the file is transferred
+
+    bucket_name = f"nda-{asset_id}"
+    file_path = f"nda-{asset_id}-{nda_number}.pdf"
+
+    reader = StreamingUploadReader(request.stream(), asyncio.get_running_loop())
+    try:
+        await store_nda_file(bucket_name, file_path, reader)
+    except UploadTooLarge:
+        raise HTTPException(status_code=413, detail="NDA file is too large")
+
+    updated = await transition_ndas(
+        db,
+        [NDA.id == nda_id],
+        "signed",
+        signed_at=datetime.utcnow(),
+        file_size=reader.size,
+        file_sha256=reader.sha256,
     )
+    if not updated:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="NDA status changed during upload")
+
+    # The file was hashed while streaming; the job only checks it is a PDF
+    await enqueue_nda_post_process(db, nda_id, bucket_name, file_path, checksum=False)
+    await publish_nda_status(db, updated, "signed")
+    await db.commit()
+
+    return {
+        "message": "NDA has been uploaded and marked as signed.",
+        "size": reader.size,
+        "sha256": reader.sha256,
+    }
+
+
+# Endpoint: Get a presigned upload URL for the signed NDA (offload mode)
+# The buyer PUTs the PDF directly to MinIO and then calls /nda/upload/complete
+@router.post("/assets/{asset_id}/nda/upload-url")
+async def get_nda_upload_url(
+    asset_id: str,
+    buyer_id: str,
+    nda_number: int,
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
+):
+    require_buyer(token, buyer_id)
+
+    if not STORAGE_OFFLOAD:
+        raise HTTPException(status_code=400, detail="Presigned uploads are disabled")
+
+    nda = await get_nda(db, asset_id, buyer_id, nda_number)
+    if not nda:
+        raise HTTPException(status_code=404, detail="NDA not found")
+    require_nda_transition(nda, "signed")
+
+    bucket_name = f"nda-{asset_id}"
+    file_path = f"nda-{asset_id}-{nda_number}.pdf"
+
+    await ensure_nda_bucket(bucket_name)
+    return presigned_url_response(presigned_urls.put_url(bucket_name, file_path))
+
+
+# Endpoint: Complete a presigned NDA upload (offload mode)
+# Checks with a HEAD request that the file exists before marking the NDA as signed
+@router.post("/assets/{asset_id}/nda/upload/complete")
+async def complete_nda_upload(
+    asset_id: str,
+    buyer_id: str,
+    nda_number: int,
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
+):
+    require_buyer(token, buyer_id)
+
+    nda = await get_nda(db, asset_id, buyer_id, nda_number)
     if not nda:
         raise HTTPException(status_code=404, detail="NDA not found")
+    require_nda_transition(nda, "signed")
+    nda_id = nda.id
 
     bucket_name = f"nda-{asset_id}"
     file_path = f"nda-{asset_id}-{nda_number}.pdf"
 
-    if not minio_client.bucket_exists(bucket_name):
-        minio_client.make_bucket(bucket_name)
+    try:
+        stat = await object_store.stat_object(bucket_name, file_path)
+    except ObjectNotFound:
+        raise HTTPException(status_code=409, detail="NDA file has not been uploaded")
+    if stat.size > MAX_UPLOAD_SIZE:
+        raise HTTPException(status_code=413, detail="NDA file is too large")
 
-    minio_client.fput_object(bucket_name, file_path, nda_file.file)
+    updated = await transition_ndas(
+        db,
+        [NDA.id == nda_id],
+        "signed",
+        signed_at=datetime.utcnow(),
+        file_size=stat.size,
+    )
+    if not updated:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="NDA cannot be signed")
 
-    nda.signed_at = datetime.utcnow()
-    nda.status = "signed"
-    db.commit()
+    # Validation and hashing of the file happen in the background
+    await enqueue_nda_post_process(db, nda_id, bucket_name, file_path, checksum=True)
+    await publish_nda_status(db, updated, "signed")
+    await db.commit()
 
     return {"message": "NDA has been uploaded and marked as signed."}
 
@@ -117,51 +466,127 @@ def upload_nda(
 # Endpoint: Confirm NDA
 # This endpoint allows the asset owner to confirm the NDA submitted by the buyer
 @router.post("/assets/{asset_id}/nda/confirm")
-def confirm_nda(
+async def confirm_nda(
     asset_id: str,
     buyer_id: str,
     nda_number: int,
-    db: Session = Depends(get_db),
-    token: dict = Depends(verify_jwt),
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
 ):
-    nda = (
-        db.query(NDA)
-        .filter_by(asset_id=asset_id, buyer_id=buyer_id, nda_number=nda_number)
-        .first()
-    )
+    nda = await get_nda(db, asset_id, buyer_id, nda_number, with_owner=True)
     if not nda:
         raise HTTPException(status_code=404, detail="NDA not found")
 
-    nda.owner_confirmed_at = datetime.utcnow()
-    nda.status = "confirmed"
-    db.commit()
+    owner_id = nda.asset.owner_id
+    if str(owner_id) != token.get("sub"):
+        raise HTTPException(
+            status_code=403, detail="Only the asset owner can confirm this NDA"
+        )
+    require_nda_transition(nda, "confirmed")
+
+    updated = await transition_ndas(
+        db, [NDA.id == nda.id], "confirmed", owner_confirmed_at=datetime.utcnow()
+    )
+    if not updated:
+        await db.rollback()
+        raise HTTPException(status_code=409, detail="NDA cannot be confirmed")
+
+    await publish_nda_status(db, updated, "confirmed", owner_id=owner_id)
+    await db.commit()
 
     return {"message": "NDA has been confirmed."}
 
 
+# Endpoint: Confirm or reject many NDAs at once (asset owner)
+# All NDAs are updated by one guarded UPDATE in one transaction; NDAs that are not
+# the caller's or cannot make the transition are reported as skipped
+@router.post("/nda/bulk")
+async def bulk_update_ndas(
+    bulk_update: NDABulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
+):
+    user_id = token.get("sub")
+    if bulk_update.action == "confirm":
+        status, values = "confirmed", {"owner_confirmed_at": datetime.utcnow()}
+    else:
+        status, values = "rejected", {}
+
+    owned_assets = select(Asset.id).where(Asset.owner_id == user_id)
+    updated = await transition_ndas(
+        db,
+        [NDA.id.in_(bulk_update.nda_ids), NDA.asset_id.in_(owned_assets)],
+        status,
+        **values,
+    )
+    # One notification job for the whole batch
+    await publish_nda_status(db, updated, status, owner_id=user_id)
+    await db.commit()
+
+    updated_ids = {row.id for row in updated}
+    return {
+        "status": status,
+        "updated": [row.id for row in updated],
+        "skipped": [
+            nda_id for nda_id in bulk_update.nda_ids if nda_id not in updated_ids
+        ],
+    }
+
+
+# Endpoint: Owner inbox - pending NDAs across all of the caller's assets
+# Served by the (asset_id, status) index on ndas
+@router.get("/nda/inbox")
+async def nda_inbox(
+    status: Optional[Literal["requested", "signed"]] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
+):
+    statuses = (status,) if status else ("requested", "signed")
+    rows = (
+        await db.execute(
+            select(
+                NDA.id,
+                NDA.asset_id,
+                Asset.name.label("asset_name"),
+                NDA.buyer_id,
+                NDA.nda_number,
+                NDA.status,
+                NDA.requested_at,
+                NDA.signed_at,
+            )
+            .join(Asset, Asset.id == NDA.asset_id)
+            .where(Asset.owner_id == token.get("sub"), NDA.status.in_(statuses))
+            .order_by(NDA.requested_at, NDA.id)
+            .limit(limit)
+        )
+    ).all()
+    return {"ndas": [dict(row._mapping) for row in rows]}
+
+
 # Endpoint: View NDA
 # This endpoint allows either the seller or the buyer to view the NDA
+# Supports Range and conditional requests so PDF viewers only fetch what they need
 @router.get("/assets/{asset_id}/nda/view")
-def view_nda(
+async def view_nda(
     asset_id: str,
     buyer_id: str,
     nda_number: int,
-    db: Session = Depends(get_db),
-    token: dict = Depends(verify_jwt),
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+    token: dict = Depends(get_current_token),
 ):
-    nda = (
-        db.query(NDA)
-        .filter_by(asset_id=asset_id, buyer_id=buyer_id, nda_number=nda_number)
-        .first()
-    )
+    # The owner is loaded with the NDA (one query)
+    nda = await get_nda(db, asset_id, buyer_id, nda_number, with_owner=True)
     if not nda:
         raise HTTPException(status_code=404, detail="NDA not found")
+    owner_id = nda.asset.owner_id
 
     current_user_id = token.get(
         "sub"
     )  # Extract the user ID from JWT token (Auth0 provides it under 'sub')
 
-    if current_user_id != nda.buyer_id and current_user_id != nda.asset.user_id:
+    if current_user_id not in (str(nda.buyer_id), str(owner_id)):
         raise HTTPException(
             status_code=403, detail="You are not authorized to view this NDA"
         )
@@ -169,8 +594,15 @@ def view_nda(
     bucket_name = f"nda-{asset_id}"
     file_path = f"nda-{asset_id}-{nda_number}.pdf"
 
+    # Offload mode: the client downloads the file directly from MinIO
+    if STORAGE_OFFLOAD:
+        return presigned_url_response(presigned_urls.get_url(bucket_name, file_path))
+
     try:
-        response = minio_client.get_object(bucket_name, file_path)
-        return StreamingResponse(response, media_type="application/pdf")
+        return await object_download_response(
+            object_store, bucket_name, file_path, request, media_type="application/pdf"
+        )
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error retrieving NDA: {str(e)}")
@@ -1,29 +1,56 @@
-from typing import List
+from typing import Optional
 
-from database import get_db  # Database session management
-from fastapi import APIRouter, Depends, HTTPException
+import orjson
+from database import get_async_db, stream_rows  # Database session management
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from models.user_models import (  # Import the User model and Pydantic models
     User,
     UserCreate,
+    UserOut,
+    UserPage,
     UserUpdate,
 )
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from utils.auth import (
-    verify_jwt,  # Import the JWT verification function from utils/auth.py
+    get_current_token,  # Verified token payload (reused from the AuthMiddleware)
 )
+from utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter()
 
+# Rows fetched per round trip when streaming the user directory
+USERS_STREAM_BATCH_SIZE = 1000
+
+
+# Function to serialize a user row for the admin user listing
+# Ids are converted with str(): asyncpg returns its own UUID type, which orjson
+# does not serialize (datetimes are rendered natively)
+def user_row_to_dict(row):
+    return {
+        "user_id": str(row.id),
+        "username": row.username,
+        "email": row.email,
+        "is_active": row.is_active,
+    }
+
+
+# Function to stream user rows as NDJSON without loading the whole table
+async def stream_users_ndjson(statement):
+    async for rows in stream_rows(statement, USERS_STREAM_BATCH_SIZE):
+        yield b"".join(orjson.dumps(user_row_to_dict(row)) + b"\n" for row in rows)
+
 
 # Endpoint: Get current user information (requires authentication)
-@router.get("/user/me")
-def get_current_user_info(
-    token: dict = Depends(verify_jwt), db: Session = Depends(get_db)
+@router.get("/user/me", response_model=UserOut)
+async def get_current_user_info(
+    token: dict = Depends(get_current_token), db: AsyncSession = Depends(get_async_db)
 ):
     user_id = token.get("sub")  # Extract the user ID from the JWT token
 
     # Retrieve user information from the database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -38,11 +65,11 @@ def get_current_user_info(
 
 # Endpoint: Update user information (authenticated user)
 @router.patch("/user/{user_id}/update")
-def update_user_info(
+async def update_user_info(
     user_id: str,
     update_data: UserUpdate,
-    token: dict = Depends(verify_jwt),
-    db: Session = Depends(get_db),
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Ensure that the user is updating their own profile
     if user_id != token.get("sub"):
@@ -51,7 +78,7 @@ def update_user_info(
         )
 
     # Retrieve user from the database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
@@ -61,42 +88,72 @@ def update_user_info(
     if update_data.email:
         user.email = update_data.email
 
-    db.commit()  # Save changes to the database
+    await db.commit()  # Save changes to the database
     return {"message": "User information updated successfully"}
 
 
 # Admin Endpoint: Get all users (admin only)
-@router.get("/users", response_model=List[dict])
-def get_all_users(token: dict = Depends(verify_jwt), db: Session = Depends(get_db)):
+# Keyset-paginated on (created_at, id); pass stream=true for an NDJSON stream of all
+# remaining matches instead of a single page
+@router.get("/users", response_model=UserPage)
+async def get_all_users(
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    is_active: Optional[bool] = None,
+    email_prefix: Optional[str] = None,
+    stream: bool = False,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
+):
     # Check if the user is an admin (this logic depends on your implementation, adjust accordingly)
     if "admin" not in token.get("roles", []):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
-    users = db.query(User).all()
-    return [
-        {
-            "user_id": user.id,
-            "username": user.username,
-            "email": user.email,
-            "is_active": user.is_active,
-        }
-        for user in users
-    ]
+    statement = select(
+        User.id, User.username, User.email, User.is_active, User.created_at
+    ).order_by(User.created_at, User.id)
+    if is_active is not None:
+        statement = statement.where(User.is_active == is_active)
+    if email_prefix:
+        statement = statement.where(User.email.startswith(email_prefix, autoescape=True))
+
+    if cursor:
+        created_at, user_id = decode_cursor(cursor)
+        statement = statement.where(
+            tuple_(User.created_at, User.id) > tuple_(created_at, user_id)
+        )
+
+    if stream:
+        return StreamingResponse(
+            stream_users_ndjson(statement), media_type="application/x-ndjson"
+        )
+
+    # Fetch one extra row to know whether there is a next page
+    rows = (await db.execute(statement.limit(limit + 1))).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return {
+        "users": [user_row_to_dict(row) for row in rows],
+        "next_cursor": next_cursor,
+    }
 
 
 # Admin Endpoint: Create a new user (admin only)
 @router.post("/user/create")
-def create_user(
+async def create_user(
     user_data: UserCreate,
-    token: dict = Depends(verify_jwt),
-    db: Session = Depends(get_db),
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Check if the user is an admin
     if "admin" not in token.get("roles", []):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
     # Check if email is already registered
-    existing_user = db.query(User).filter(User.email == user_data.email).first()
+    existing_user = await db.scalar(select(User).where(User.email == user_data.email))
     if existing_user:
         raise HTTPException(status_code=400, detail="Email is already registered")
 
@@ -108,27 +165,30 @@ def create_user(
         is_active=True,
     )
     db.add(new_user)
-    db.commit()
+    await db.commit()
 
     return {"message": f"User {user_data.username} created successfully"}
 
 
 # Admin Endpoint: Deactivate user account (admin only)
 @router.patch("/user/{user_id}/deactivate")
-def deactivate_user(
-    user_id: str, token: dict = Depends(verify_jwt), db: Session = Depends(get_db)
+async def deactivate_user(
+    user_id: str,
+    token: dict = Depends(get_current_token),
+    db: AsyncSession = Depends(get_async_db),
 ):
     # Check if the current user is an admin
     if "admin" not in token.get("roles", []):
         raise HTTPException(status_code=403, detail="Admin privileges required")
 
     # Retrieve the user from the database
-    user = db.query(User).filter(User.id == user_id).first()
+    user = await db.scalar(select(User).where(User.id == user_id))
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
 
     # Deactivate the user account
+    username = user.username
     user.is_active = False
-    db.commit()
+    await db.commit()
 
-    return {"message": f"User {user.username} has been deactivated successfully"}
+    return {"message": f"User {username} has been deactivated successfully"}
@@ -14,3 +14,12 @@ AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE")
 
 # API configuration
 API_URL = os.getenv("API_URL")  # Make sure this variable is defined in your .env file
+
+# MinIO configuration
+MINIO_ENDPOINT = os.getenv("MINIO_ENDPOINT", "minio:9000")
+MINIO_ACCESS_KEY = os.getenv("MINIO_ACCESS_KEY")
+MINIO_SECRET_KEY = os.getenv("MINIO_SECRET_KEY")
+MINIO_REGION = os.getenv("MINIO_REGION", "us-east-1")
+# Endpoint clients use for presigned URLs (must be reachable from the browser)
+MINIO_PUBLIC_ENDPOINT = os.getenv("MINIO_PUBLIC_ENDPOINT", MINIO_ENDPOINT)
+MINIO_PUBLIC_SECURE = os.getenv("MINIO_PUBLIC_SECURE", "false").lower() == "true"
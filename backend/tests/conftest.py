@@ -0,0 +1,183 @@
+import json
+import os
+import tempfile
+import time
+import uuid
+
+import pytest
+
+# The suite runs against a real Postgres: TEST_DATABASE_URL if set, otherwise an
+# embedded server started with pgserver (see requirements-dev.txt)
+_postgres = None
+
+
+def _database_url():
+    global _postgres
+    url = os.getenv("TEST_DATABASE_URL")
+    if url:
+        return url
+    try:
+        import pgserver
+    except ImportError:
+        return None
+    _postgres = pgserver.get_server(
+        tempfile.mkdtemp(prefix="dealclub-pg-"), cleanup_mode="delete"
+    )
+    return _postgres.get_uri()
+
+
+DATABASE_URL = _database_url()
+if DATABASE_URL is None:
+    # Nothing to run the app against
+    collect_ignore_glob = ["test_*.py"]
+
+# Signing key of the test identity provider (published through a file:// JWKS)
+AUTH0_DOMAIN = "dealclub-test.auth0.local"
+AUTH0_AUDIENCE = "https://api.dealclub.test"
+KEY_ID = "test-key"
+STORAGE_WEBHOOK_TOKEN = "test-webhook-token"
+
+
+def _signing_key(directory):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from jose import jwk
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    public_pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    public_jwk = jwk.construct(public_pem, "RS256").to_dict()
+    public_jwk.update({"kid": KEY_ID, "use": "sig", "alg": "RS256"})
+
+    jwks_path = os.path.join(directory, "jwks.json")
+    with open(jwks_path, "w") as f:
+        json.dump({"keys": [public_jwk]}, f)
+    # Parsed once: loading the PEM on every signature dominates load tests
+    return jwk.construct(private_pem, "RS256"), jwks_path
+
+
+_work_dir = tempfile.mkdtemp(prefix="dealclub-test-")
+PRIVATE_KEY, _jwks_path = _signing_key(_work_dir)
+
+# The app reads its configuration at import time
+os.environ.update(
+    {
+        "DATABASE_URL": DATABASE_URL or "postgresql://localhost/unused",
+        "AUTH0_DOMAIN": AUTH0_DOMAIN,
+        "AUTH0_AUDIENCE": AUTH0_AUDIENCE,
+        "JWKS_URL": f"file://{_jwks_path}",
+        "STORAGE_BACKEND": "filesystem",
+        "STORAGE_ROOT": os.path.join(_work_dir, "storage"),
+        "STORAGE_WEBHOOK_TOKEN": STORAGE_WEBHOOK_TOKEN,
+        "EVENTS_BACKEND": "memory",
+        # Jobs only run where a test starts workers or runs them itself
+        "JOB_WORKERS": "0",
+        # Every request of the suite is held to its query budget
+        "QUERY_COUNTER": "true",
+        "QUERY_BUDGET_STRICT": "true",
+    }
+)
+os.environ.pop("LISTING_CACHE_REDIS_URL", None)
+
+
+# Function to issue an access token for a user, signed by the test key
+def make_token(user_id, roles=(), expires_in=3600):
+    from jose import jwt
+
+    now = int(time.time())
+    claims = {
+        "sub": str(user_id),
+        "iss": f"https://{AUTH0_DOMAIN}/",
+        "aud": AUTH0_AUDIENCE,
+        "iat": now,
+        "exp": now + expires_in,
+        "roles": list(roles),
+    }
+    return jwt.encode(claims, PRIVATE_KEY, algorithm="RS256", headers={"kid": KEY_ID})
+
+
+def auth_headers(user_id, roles=()):
+    return {"Authorization": f"Bearer {make_token(user_id, roles)}"}
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+# Tables of the test database (created once, like the app does on startup)
+@pytest.fixture(scope="session")
+def schema():
+    import models
+    from database import engine
+
+    models.Base.metadata.create_all(bind=engine)
+
+
+# The application, started and stopped around each test (the async engine's
+# connections belong to the test's event loop)
+@pytest.fixture
+async def app(schema):
+    from main import app
+
+    async with app.router.lifespan_context(app):
+        yield app
+
+
+@pytest.fixture
+async def client(app):
+    import httpx
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+        yield c
+
+
+# Factory creating users (committed with the sync engine)
+@pytest.fixture
+def make_user(schema):
+    from database import SessionLocal
+    from models.user_models import User
+
+    def make_user(username="user"):
+        suffix = uuid.uuid4().hex[:12]
+        with SessionLocal() as db:
+            user = User(
+                username=f"{username}-{suffix}",
+                email=f"{username}-{suffix}@example.com",
+                hashed_password="hashed",
+                is_active=True,
+            )
+            db.add(user)
+            db.commit()
+            return user.id
+
+    return make_user
+
+
+# Factory creating assets (optionally listed for sale) for an owner
+@pytest.fixture
+def make_asset(schema):
+    from database import SessionLocal
+    from models.assets_models import Asset
+
+    def make_asset(owner_id, name="Asset", price=None, **values):
+        with SessionLocal() as db:
+            asset = Asset(
+                name=name,
+                owner_id=owner_id,
+                for_sale=price is not None,
+                price=price,
+                **values,
+            )
+            db.add(asset)
+            db.commit()
+            return asset.id
+
+    return make_asset
@@ -0,0 +1,145 @@
+import pytest
+from conftest import STORAGE_WEBHOOK_TOKEN, auth_headers
+from models.assets_models import AssetOut, AssetPage
+from routes.dataroom import create_datarooms
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_own_assets_match_the_response_model(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    asset_ids = [make_asset(owner_id, name=f"Asset {i}") for i in range(3)]
+
+    response = await client.get(
+        "/assets/me", params={"limit": 2}, headers=auth_headers(owner_id)
+    )
+    assert response.status_code == 200
+    page = AssetPage(**response.json())
+    assert [asset.id for asset in page.assets] == asset_ids[:2]
+    assert all(asset.owner_id == owner_id for asset in page.assets)
+
+    response = await client.get(
+        "/assets/me",
+        params={"cursor": page.next_cursor},
+        headers=auth_headers(owner_id),
+    )
+    assert [asset.id for asset in AssetPage(**response.json()).assets] == asset_ids[2:]
+
+
+async def test_asset_details_match_the_response_model(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, name="Listed", price=100.0)
+
+    response = await client.get(f"/assets/{asset_id}", headers=auth_headers(owner_id))
+
+    assert response.status_code == 200
+    assert set(response.json()) == set(AssetOut.model_fields)
+    asset = AssetOut(**response.json())
+    assert (asset.id, asset.owner_id, asset.price) == (asset_id, owner_id, 100.0)
+
+
+async def dashboard(client, owner_id, **headers):
+    return await client.get(
+        "/assets/me/dashboard", headers={**auth_headers(owner_id), **headers}
+    )
+
+
+async def test_dashboard_runs_the_same_queries_for_any_number_of_assets(
+    client, make_user, make_asset
+):
+    owner_id = make_user("owner")
+    buyer_ids = [make_user("buyer") for _ in range(4)]
+    asset_ids = [make_asset(owner_id, name="Listed", price=10.0)]
+
+    response = await dashboard(client, owner_id)
+    assert response.status_code == 200
+    single_asset_queries = int(response.headers["X-Query-Count"])
+
+    for i in range(4):
+        asset_id = make_asset(owner_id, name=f"Listed {i}", price=100.0 * (i + 1))
+        asset_ids.append(asset_id)
+        await create_datarooms(str(asset_id))
+        for buyer_id in buyer_ids[: i + 1]:
+            await client.post(
+                f"/assets/{asset_id}/nda/request",
+                params={"buyer_id": str(buyer_id)},
+                headers=auth_headers(buyer_id),
+            )
+            await client.post(
+                f"/assets/{asset_id}/bids",
+                json={"amount": 50.0 + i},
+                headers=auth_headers(buyer_id),
+            )
+    asset_ids.append(make_asset(owner_id, name="Unlisted"))
+
+    response = await dashboard(client, owner_id)
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) == single_asset_queries <= 4
+
+    assets = response.json()["assets"]
+    assert [asset["id"] for asset in assets] == [str(a) for a in asset_ids]
+    assert assets[0]["dataroom_files"] == {"public": 0, "private": 0}
+    assert assets[-1]["dataroom_files"] is None
+    for i, asset in enumerate(assets[1:-1]):
+        assert asset["ndas"] == {"requested": i + 1}
+        assert asset["bids"] == {"count": i + 1, "best": 50.0 + i}
+        assert asset["dataroom_files"] == {"public": 0, "private": 0}
+
+
+async def test_dashboard_answers_not_modified(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    make_asset(owner_id)
+
+    response = await dashboard(client, owner_id)
+    etag = response.headers["ETag"]
+
+    response = await dashboard(client, owner_id, **{"If-None-Match": etag})
+    assert response.status_code == 304
+
+    make_asset(owner_id, name="Another")
+    response = await dashboard(client, owner_id, **{"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+# What MinIO sends to the webhook when objects are created or removed
+async def notify(client, bucket_name, *changes):
+    records = [
+        {
+            "eventName": f"s3:Object{change}",
+            "s3": {"bucket": {"name": bucket_name}, "object": {"key": key}},
+        }
+        for change, key in changes
+    ]
+    response = await client.post(
+        "/storage/notifications",
+        json={"Records": records},
+        headers={"Authorization": f"Bearer {STORAGE_WEBHOOK_TOKEN}"},
+    )
+    assert response.status_code == 200
+
+
+async def test_dashboard_counts_files_from_storage_notifications(
+    client, make_user, make_asset
+):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, price=100.0)
+
+    await notify(
+        client,
+        f"public-{asset_id}",
+        ("Created:Put", "teaser.pdf"),
+        ("Created:Put", "financials/2023.xlsx"),
+        ("Created:Put", "teaser.pdf"),  # Overwritten
+        ("Created:CompleteMultipartUpload", "video.mp4"),
+        ("Removed:Delete", "financials/2023.xlsx"),
+    )
+    await notify(client, f"private-{asset_id}", ("Created:Put", "contracts/spa.pdf"))
+    # Replayed notification
+    await notify(client, f"private-{asset_id}", ("Created:Put", "contracts/spa.pdf"))
+    # Buckets of other kinds are not data rooms
+    await notify(client, f"nda-{asset_id}", ("Created:Put", "nda.pdf"))
+
+    response = await dashboard(client, owner_id)
+
+    assert response.json()["assets"][0]["dataroom_files"] == {"public": 2, "private": 1}
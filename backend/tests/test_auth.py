@@ -0,0 +1,56 @@
+import middleware
+import pytest
+from conftest import auth_headers, make_token
+from utils.auth import token_cache
+
+pytestmark = pytest.mark.anyio
+
+
+def lookups():
+    return token_cache.hits + token_cache.misses
+
+
+async def test_requests_look_the_token_up_once(client, make_user):
+    user_id = make_user()
+    headers = auth_headers(user_id)
+
+    before = (token_cache.hits, token_cache.misses)
+    assert (await client.get("/user/me", headers=headers)).status_code == 200
+    assert (token_cache.hits, token_cache.misses) == (before[0], before[1] + 1)
+
+    # The verified payload is served from the cache afterwards
+    assert (await client.get("/user/me", headers=headers)).status_code == 200
+    assert (token_cache.hits, token_cache.misses) == (before[0] + 1, before[1] + 1)
+
+
+async def test_expired_tokens_are_rejected(client, make_user):
+    token = make_token(make_user(), expires_in=-60)
+
+    before = lookups()
+    response = await client.get(
+        "/user/me", headers={"Authorization": f"Bearer {token}"}
+    )
+
+    assert response.status_code == 401
+    assert lookups() == before + 1
+
+
+async def test_health_check_needs_no_token(client, monkeypatch):
+    def verify_jwt(token):
+        raise AssertionError("the health check must not validate tokens")
+
+    monkeypatch.setattr(middleware, "verify_jwt", verify_jwt)
+    before = lookups()
+
+    assert (await client.get("/health")).json() == {"status": "healthy"}
+    # A token sent anyway is ignored
+    response = await client.get("/health", headers={"Authorization": "Bearer junk"})
+    assert response.status_code == 200
+    assert lookups() == before
+
+
+async def test_other_routes_need_a_token(client):
+    response = await client.get("/metrics")
+
+    assert response.status_code == 401
+    assert response.json() == {"detail": "Authorization header missing"}
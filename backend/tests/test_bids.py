@@ -0,0 +1,163 @@
+import asyncio
+import os
+
+import pytest
+from conftest import auth_headers
+from database import SessionLocal
+from models.bid_models import Bid
+from sqlalchemy import select
+
+pytestmark = pytest.mark.anyio
+
+# Bids placed on one asset by the load test, and how many requests are in flight
+# at once (more than the database pool can serve within its checkout timeout)
+LOAD_BIDS = int(os.getenv("BID_LOAD_BIDS", "2000"))
+LOAD_CONCURRENCY = int(os.getenv("BID_LOAD_CONCURRENCY", "100"))
+
+
+async def place_bid(client, asset_id, bidder_id, amount):
+    return await client.post(
+        f"/assets/{asset_id}/bids",
+        json={"amount": amount},
+        headers=auth_headers(bidder_id),
+    )
+
+
+async def test_concurrent_bids_keep_the_order_book_consistent(
+    client, make_user, make_asset
+):
+    asset_id = make_asset(make_user("owner"), price=1000.0)
+    bidder_ids = [make_user("bidder") for _ in range(20)]
+    amounts = [100.0 + (i * 37) % 20 for i in range(20)]
+
+    responses = await asyncio.gather(
+        *(
+            place_bid(client, asset_id, bidder_id, amount)
+            for bidder_id, amount in zip(bidder_ids, amounts)
+        )
+    )
+    assert [response.status_code for response in responses] == [200] * 20
+
+    # Cancel a few bids while more are placed
+    cancelled = [responses[i].json()["bid_id"] for i in (0, 5, 10)]
+    late_bidder_ids = [make_user("bidder") for _ in range(5)]
+    late_amounts = [150.0 + i for i in range(5)]
+    await asyncio.gather(
+        *(
+            client.delete(
+                f"/assets/{asset_id}/bids/{bid_id}",
+                headers=auth_headers(bidder_ids[i]),
+            )
+            for i, bid_id in zip((0, 5, 10), cancelled)
+        ),
+        *(
+            place_bid(client, asset_id, bidder_id, amount)
+            for bidder_id, amount in zip(late_bidder_ids, late_amounts)
+        ),
+    )
+
+    response = await client.get(
+        f"/assets/{asset_id}/bids",
+        params={"limit": 100},
+        headers=auth_headers(bidder_ids[1]),
+    )
+    assert response.status_code == 200
+    book = response.json()
+    expected = sorted(
+        [amount for i, amount in enumerate(amounts) if i not in (0, 5, 10)]
+        + late_amounts,
+        reverse=True,
+    )
+    assert book["bid_count"] == len(expected)
+    assert [bid["amount"] for bid in book["bids"]] == expected
+    assert [bid["rank"] for bid in book["bids"]] == list(range(1, len(expected) + 1))
+    assert book["best_bid"]["amount"] == expected[0]
+    assert not set(cancelled) & {bid["id"] for bid in book["bids"]}
+
+
+@pytest.mark.parametrize("amount", ["NaN", "Infinity", "-Infinity", "0", "-5"])
+async def test_bid_amount_must_be_positive_and_finite(
+    client, make_user, make_asset, amount
+):
+    asset_id = make_asset(make_user("owner"), price=1000.0)
+    bidder_id = make_user("bidder")
+
+    response = await client.post(
+        f"/assets/{asset_id}/bids",
+        content=f'{{"amount": {amount}}}',
+        headers={**auth_headers(bidder_id), "Content-Type": "application/json"},
+    )
+
+    assert response.status_code == 422
+
+
+async def test_owner_cannot_bid_on_their_asset(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, price=1000.0)
+
+    response = await place_bid(client, asset_id, owner_id, 500.0)
+
+    assert response.status_code == 403
+
+
+# Active bids of an asset from the bids table, in order book order
+def active_bids(asset_id):
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(Bid.id, Bid.amount, Bid.created_at).where(
+                Bid.asset_id == asset_id, Bid.status == "active"
+            )
+        ).all()
+    rows.sort(key=lambda row: (-row.amount, row.created_at, str(row.id)))
+    return [(str(row.id), row.amount) for row in rows]
+
+
+async def test_order_book_matches_the_bids_table_under_load(
+    client, make_user, make_asset
+):
+    asset_id = make_asset(make_user("owner"), price=1_000_000.0)
+    bidder_ids = [make_user("bidder") for _ in range(50)]
+    placed = LOAD_BIDS * 3 // 4
+    in_flight = asyncio.Semaphore(LOAD_CONCURRENCY)
+
+    async def bid(i):
+        async with in_flight:
+            return await place_bid(
+                client,
+                asset_id,
+                bidder_ids[i % len(bidder_ids)],
+                1000.0 + (i * 7919) % 997,
+            )
+
+    async def cancel(i, bid_id):
+        async with in_flight:
+            return await client.delete(
+                f"/assets/{asset_id}/bids/{bid_id}",
+                headers=auth_headers(bidder_ids[i % len(bidder_ids)]),
+            )
+
+    responses = await asyncio.gather(*(bid(i) for i in range(placed)))
+    assert {response.status_code for response in responses} == {200}
+
+    # Cancel every fifth bid while the rest are placed
+    cancelled = range(0, placed, 5)
+    responses = await asyncio.gather(
+        *(cancel(i, responses[i].json()["bid_id"]) for i in cancelled),
+        *(bid(i) for i in range(placed, LOAD_BIDS)),
+    )
+    assert {response.status_code for response in responses} == {200}
+
+    expected = active_bids(asset_id)
+    assert len(expected) == LOAD_BIDS - len(cancelled)
+    response = await client.get(
+        f"/assets/{asset_id}/bids",
+        params={"limit": 500},
+        headers=auth_headers(bidder_ids[0]),
+    )
+    book = response.json()
+    assert book["bid_count"] == len(expected)
+    assert [(bid["id"], bid["amount"]) for bid in book["bids"]] == expected[:500]
+    assert [bid["rank"] for bid in book["bids"]] == list(
+        range(1, len(book["bids"]) + 1)
+    )
+    assert book["best_bid"]["id"] == expected[0][0]
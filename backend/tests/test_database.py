@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import auth_headers
+from database import (
+    DATABASE_URL,
+    DB_MAX_OVERFLOW,
+    DB_POOL_SIZE,
+    InstrumentedQueuePool,
+    engine,
+    get_db,
+    pool_stats,
+)
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+
+
+def test_get_db_sessions_share_the_pool_concurrently(schema):
+    workers = DB_POOL_SIZE + DB_MAX_OVERFLOW
+    all_checked_out = threading.Barrier(workers, timeout=30)
+    before = pool_stats()
+
+    def use_session():
+        sessions = get_db()
+        db = next(sessions)
+        try:
+            backend_pid = db.execute(text("SELECT pg_backend_pid()")).scalar()
+            # Every session holds its connection until all of them have one
+            all_checked_out.wait()
+            return backend_pid
+        finally:
+            sessions.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        backend_pids = list(executor.map(lambda _: use_session(), range(workers)))
+
+    after = pool_stats()
+    assert len(set(backend_pids)) == workers
+    assert after["checkouts"] - before["checkouts"] == workers
+    assert after["checkout_failures"] == before["checkout_failures"]
+    assert after["checked_out"] == 0
+    # Overflow connections are closed on return, the pool keeps pool_size of them
+    assert after["checked_in"] <= DB_POOL_SIZE
+
+
+def test_pool_counts_checkout_timeouts():
+    small_engine = create_engine(
+        DATABASE_URL,
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.1,
+    )
+    try:
+        with small_engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                small_engine.connect()
+
+        stats = pool_stats(small_engine)
+        assert stats["checkouts"] == 1
+        assert stats["checkout_failures"] == 1
+        assert stats["wait_time_max"] < 0.1
+
+        # The counters survive recreating the pool
+        small_engine.dispose()
+        assert pool_stats(small_engine)["checkout_failures"] == 1
+    finally:
+        small_engine.dispose()
+
+
+def test_engine_uses_the_instrumented_pool():
+    assert isinstance(engine.pool, InstrumentedQueuePool)
+    assert pool_stats()["pool"] == "InstrumentedQueuePool"
+
+
+@pytest.mark.anyio
+async def test_metrics_report_the_async_pool(client, make_user):
+    user_id = make_user()
+    response = await client.get("/user/me", headers=auth_headers(user_id))
+    assert response.status_code == 200
+
+    metrics = (await client.get("/metrics", headers=auth_headers(user_id))).json()
+    assert metrics["db_pool"]["pool"] == "InstrumentedQueuePool"
+    assert metrics["async_db_pool"]["pool"] == "InstrumentedAsyncQueuePool"
+    assert metrics["async_db_pool"]["checkouts"] >= 1
+    assert metrics["async_db_pool"]["checkout_failures"] == 0
@@ -0,0 +1,256 @@
+import io
+import time
+
+import orjson
+import pytest
+from conftest import STORAGE_WEBHOOK_TOKEN, auth_headers
+from database import SessionLocal
+from fastapi import HTTPException
+from models import Private_Invitation, User
+from routes.dataroom import (
+    check_private_access,
+    create_datarooms,
+    invalidate_bucket_listing,
+)
+from utils.access_cache import AccessDecisionCache, access_cache
+from utils.listing_cache import ListingCache
+from utils.presign import presigned_urls
+from utils.storage import object_store
+
+pytestmark = pytest.mark.anyio
+
+
+async def upload(bucket_name, object_name, data):
+    await object_store.put_object(
+        bucket_name, object_name, io.BytesIO(data), length=len(data)
+    )
+
+
+# What MinIO sends to the webhook after an upload
+async def notify_upload(client, bucket_name, object_name):
+    return await client.post(
+        "/storage/notifications",
+        json={
+            "Records": [
+                {
+                    "eventName": "s3:ObjectCreated:Put",
+                    "s3": {
+                        "bucket": {"name": bucket_name},
+                        "object": {"key": object_name},
+                    },
+                }
+            ]
+        },
+        headers={"Authorization": f"Bearer {STORAGE_WEBHOOK_TOKEN}"},
+    )
+
+
+async def list_files(client, asset_id, user_id, **params):
+    response = await client.get(
+        f"/assets/{asset_id}/public/list-files",
+        params=params,
+        headers=auth_headers(user_id),
+    )
+    assert response.status_code == 200
+    return response
+
+
+async def test_listing_reflects_uploads(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, price=100.0)
+    await create_datarooms(str(asset_id))
+    bucket_name = f"public-{asset_id}"
+
+    await upload(bucket_name, "teaser.pdf", b"teaser")
+    response = await list_files(client, asset_id, owner_id)
+    assert [f["name"] for f in response.json()["files"]] == ["teaser.pdf"]
+
+    # Served from the listing cache until the bucket notification arrives
+    await upload(bucket_name, "financials/2023.xlsx", b"numbers")
+    response = await list_files(client, asset_id, owner_id)
+    assert [f["name"] for f in response.json()["files"]] == ["teaser.pdf"]
+
+    response = await notify_upload(client, bucket_name, "financials/2023.xlsx")
+    assert response.json() == {"invalidated": [bucket_name]}
+
+    response = await list_files(client, asset_id, owner_id)
+    assert [f["name"] for f in response.json()["files"]] == [
+        "financials/2023.xlsx",
+        "teaser.pdf",
+    ]
+    response = await list_files(client, asset_id, owner_id, folders=True)
+    assert [(f["name"], f["is_dir"]) for f in response.json()["files"]] == [
+        ("financials/", True),
+        ("teaser.pdf", False),
+    ]
+
+
+async def test_notifications_require_the_webhook_token(client):
+    response = await client.post(
+        "/storage/notifications",
+        json={"Records": []},
+        headers={"Authorization": "Bearer wrong"},
+    )
+
+    assert response.status_code == 403
+
+
+async def test_notifications_drop_the_presigned_urls_of_the_object(client):
+    kept = presigned_urls.get_url("public-presign", "summary.pdf")
+    replaced = presigned_urls.get_url("public-presign", "deck 2023.pdf")
+
+    response = await notify_upload(client, "public-presign", "deck+2023.pdf")
+    assert response.status_code == 200
+
+    assert presigned_urls.get_url("public-presign", "summary.pdf") == kept
+    assert presigned_urls.get_url("public-presign", "deck 2023.pdf") != replaced
+
+
+async def test_streamed_listing_matches_the_paged_listing(
+    client, make_user, make_asset
+):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, price=100.0)
+    await create_datarooms(str(asset_id))
+    for i in range(3):
+        await upload(f"public-{asset_id}", f"doc-{i}.pdf", b"x" * (i + 1))
+
+    paged = (await list_files(client, asset_id, owner_id)).json()["files"]
+    response = await list_files(client, asset_id, owner_id, stream=True)
+    streamed = [orjson.loads(line) for line in response.text.splitlines()]
+
+    assert streamed == paged
+    assert paged[0]["last_modified"].endswith("+00:00")
+
+
+# Shared tier stand-in counting the generation lookups
+class FakeSharedTier:
+    def __init__(self):
+        self.generations = {}
+        self.pages = {}
+        self.generation_lookups = 0
+
+    def generation(self, bucket_name):
+        self.generation_lookups += 1
+        return self.generations.get(bucket_name, 0)
+
+    def get(self, bucket_name, generation, key):
+        return self.pages.get((bucket_name, generation, key))
+
+    def put(self, bucket_name, generation, key, value):
+        self.pages[(bucket_name, generation, key)] = value
+
+    def invalidate(self, bucket_name):
+        self.generations[bucket_name] = self.generations.get(bucket_name, 0) + 1
+        return self.generations[bucket_name]
+
+
+def test_local_hits_reuse_the_shared_generation():
+    shared = FakeSharedTier()
+    cache = ListingCache(shared=shared, generation_ttl=0.5)
+
+    cache.put("bucket", "page", ["a"], 0)
+    assert [cache.get("bucket", "page") for _ in range(3)] == [(["a"], 0)] * 3
+    assert shared.generation_lookups == 1
+
+    # A local invalidation knows the new generation without asking again
+    cache.invalidate("bucket")
+    assert cache.get("bucket", "page") == (None, 1)
+    assert shared.generation_lookups == 1
+
+    # Another worker's invalidation is seen once the generation expires
+    cache.put("bucket", "page", ["a", "b"], 1)
+    shared.invalidate("bucket")
+    assert cache.get("bucket", "page") == (["a", "b"], 1)
+    time.sleep(0.6)
+    assert cache.get("bucket", "page") == (None, 2)
+    assert shared.generation_lookups == 2
+
+
+@pytest.mark.parametrize("shared", [None, FakeSharedTier()])
+def test_pages_fetched_before_an_invalidation_are_not_stored(shared):
+    cache = ListingCache(shared=shared)
+
+    page, generation = cache.get("bucket", "page")
+    assert page is None
+    cache.invalidate("bucket")
+    cache.put("bucket", "page", ["stale"], generation)
+
+    assert cache.get("bucket", "page")[0] is None
+    assert cache.stats()["stale_puts"] == 1
+
+
+async def test_listing_racing_a_notification_is_not_cached(
+    client, make_user, make_asset, monkeypatch
+):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, price=100.0)
+    await create_datarooms(str(asset_id))
+    bucket_name = f"public-{asset_id}"
+    await upload(bucket_name, "teaser.pdf", b"teaser")
+    list_objects = object_store.list_objects
+
+    # An upload and its notification land while the listing is being fetched
+    async def list_objects_during_upload(*args, **kwargs):
+        entries = await list_objects(*args, **kwargs)
+        await upload(bucket_name, "late.pdf", b"late")
+        invalidate_bucket_listing(bucket_name)
+        return entries
+
+    monkeypatch.setattr(object_store, "list_objects", list_objects_during_upload)
+    response = await list_files(client, asset_id, owner_id)
+    assert [f["name"] for f in response.json()["files"]] == ["teaser.pdf"]
+
+    monkeypatch.setattr(object_store, "list_objects", list_objects)
+    response = await list_files(client, asset_id, owner_id)
+    assert [f["name"] for f in response.json()["files"]] == ["late.pdf", "teaser.pdf"]
+
+
+def test_invitations_refresh_decisions_cached_under_any_id_spelling(
+    make_user, make_asset
+):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    user_id = make_user("invitee")
+    spelling = str(asset_id).upper()
+
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        with pytest.raises(HTTPException) as denied:
+            check_private_access(spelling, user, db)
+        assert denied.value.status_code == 403
+
+        db.add(Private_Invitation(asset_id=asset_id, invited_user_id=user_id))
+        db.commit()
+
+        assert check_private_access(spelling, user, db)
+
+
+def test_access_changes_are_dropped_from_the_cache_on_commit(make_user, make_asset):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    user_id = make_user("invitee")
+
+    with SessionLocal() as db:
+        user = db.get(User, user_id)
+        with pytest.raises(HTTPException):
+            check_private_access(str(asset_id), user, db)
+
+        # Until the invitation commits, other requests must keep the old decision
+        db.add(Private_Invitation(asset_id=asset_id, invited_user_id=user_id))
+        db.flush()
+        assert access_cache.get(user_id, asset_id)[0] is False
+
+        db.commit()
+        assert access_cache.get(user_id, asset_id)[0] is None
+        assert check_private_access(str(asset_id), user, db)
+
+
+def test_decisions_computed_before_an_invalidation_are_not_stored():
+    cache = AccessDecisionCache()
+
+    allowed, generation = cache.get("user", "asset")
+    assert allowed is None
+    cache.invalidate("asset", "user")
+    cache.put("user", "asset", False, generation)
+
+    assert cache.get("user", "asset")[0] is None
+    assert cache.stats()["stale_puts"] == 1
@@ -0,0 +1,136 @@
+import io
+from datetime import timedelta
+from email.utils import format_datetime, parsedate_to_datetime
+
+import pytest
+from conftest import auth_headers
+from routes.dataroom import create_datarooms
+from utils.storage import object_store
+
+pytestmark = pytest.mark.anyio
+
+CONTENT = b"0123456789abcdef"
+
+
+@pytest.fixture
+async def download(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, price=100.0)
+    await create_datarooms(str(asset_id))
+    await object_store.put_object(
+        f"public-{asset_id}", "teaser.pdf", io.BytesIO(CONTENT), length=len(CONTENT)
+    )
+
+    # Function to download the file with extra request headers
+    async def download(**headers):
+        return await client.get(
+            f"/assets/{asset_id}/public/files/teaser.pdf",
+            headers={**auth_headers(owner_id), **headers},
+        )
+
+    return download
+
+
+async def test_full_download_describes_the_object(download):
+    response = await download()
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["Content-Length"] == str(len(CONTENT))
+    assert response.headers["Accept-Ranges"] == "bytes"
+    assert response.headers["ETag"].startswith('"')
+    assert parsedate_to_datetime(response.headers["Last-Modified"])
+
+
+@pytest.mark.parametrize(
+    "byte_range, content_range, content",
+    [
+        ("bytes=2-5", "bytes 2-5/16", CONTENT[2:6]),
+        ("bytes=10-", "bytes 10-15/16", CONTENT[10:]),
+        ("bytes=-3", "bytes 13-15/16", CONTENT[-3:]),
+        ("bytes=12-100", "bytes 12-15/16", CONTENT[12:]),
+        ("bytes=-100", "bytes 0-15/16", CONTENT),
+    ],
+)
+async def test_ranges_are_served_partially(
+    download, byte_range, content_range, content
+):
+    response = await download(Range=byte_range)
+
+    assert response.status_code == 206
+    assert response.headers["Content-Range"] == content_range
+    assert response.headers["Content-Length"] == str(len(content))
+    assert response.content == content
+
+
+@pytest.mark.parametrize(
+    "byte_range", ["bytes=5-3", "bytes=0-1,4-5", "bytes=x-2", "bytes=-0", "items=0-1"]
+)
+async def test_invalid_or_unsupported_ranges_are_ignored(download, byte_range):
+    response = await download(Range=byte_range)
+
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+async def test_ranges_past_the_end_are_not_satisfiable(download):
+    response = await download(Range="bytes=16-")
+
+    assert response.status_code == 416
+    assert response.headers["Content-Range"] == "bytes */16"
+
+
+async def test_if_range_only_applies_to_the_current_version(download):
+    etag = (await download()).headers["ETag"]
+
+    response = await download(Range="bytes=0-3", **{"If-Range": etag})
+    assert response.status_code == 206
+    assert response.content == CONTENT[:4]
+
+    response = await download(Range="bytes=0-3", **{"If-Range": '"outdated"'})
+    assert response.status_code == 200
+    assert response.content == CONTENT
+
+
+async def test_if_none_match(download):
+    etag = (await download()).headers["ETag"]
+
+    for if_none_match in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+        response = await download(**{"If-None-Match": if_none_match})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert response.content == b""
+
+    response = await download(**{"If-None-Match": '"other"'})
+    assert response.status_code == 200
+
+
+async def test_if_modified_since(download):
+    last_modified = parsedate_to_datetime((await download()).headers["Last-Modified"])
+
+    not_modified = [
+        format_datetime(last_modified, usegmt=True),
+        # Dates with a "-0000" zone parse without a timezone
+        format_datetime(last_modified.replace(tzinfo=None)),
+        format_datetime(last_modified + timedelta(hours=1), usegmt=True),
+    ]
+    for since in not_modified:
+        response = await download(**{"If-Modified-Since": since})
+        assert response.status_code == 304
+
+    for since in (
+        format_datetime(last_modified - timedelta(seconds=1), usegmt=True),
+        "not a date",
+    ):
+        response = await download(**{"If-Modified-Since": since})
+        assert response.status_code == 200
+
+
+async def test_if_none_match_takes_precedence(download):
+    last_modified = (await download()).headers["Last-Modified"]
+
+    response = await download(
+        **{"If-None-Match": '"other"', "If-Modified-Since": last_modified}
+    )
+
+    assert response.status_code == 200
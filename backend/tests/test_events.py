@@ -0,0 +1,72 @@
+import asyncio
+
+import asyncpg
+import pytest
+from conftest import DATABASE_URL
+from routes.events import stream_events
+from utils.events import EventBroker, event_broker
+
+pytestmark = pytest.mark.anyio
+
+
+def subscriptions():
+    return event_broker.stats()["subscriptions"]
+
+
+async def test_streams_subscribe_only_while_they_run(app):
+    before = subscriptions()
+
+    # A response that is never sent (e.g. the client left) holds no subscription
+    stream = stream_events(["asset:test-stream"])
+    assert subscriptions() == before
+
+    assert await stream.__anext__() == ": connected\n\n"
+    assert subscriptions() == before + 1
+
+    await event_broker.publish(["asset:test-stream"], {"type": "bid", "amount": 5})
+    assert await stream.__anext__() == (
+        'event: bid\ndata: {"type": "bid", "amount": 5}\n\n'
+    )
+
+    await stream.aclose()
+    assert subscriptions() == before
+
+
+async def test_asset_streams_skip_events_about_other_assets(app):
+    stream = stream_events(["asset:a", "user:buyer"], asset_id="a")
+    assert await stream.__anext__() == ": connected\n\n"
+
+    # NDA updates reach the buyer's topic for every asset
+    await event_broker.publish(["user:buyer"], {"type": "nda", "asset_id": "b"})
+    await event_broker.publish(["user:buyer"], {"type": "nda", "asset_id": "a"})
+    assert await stream.__anext__() == (
+        'event: nda\ndata: {"type": "nda", "asset_id": "a"}\n\n'
+    )
+    await stream.aclose()
+
+
+async def test_postgres_listener_reconnects_after_its_connection_drops(monkeypatch):
+    monkeypatch.setattr("utils.events.EVENTS_RECONNECT_BASE_DELAY", 0.05)
+    broker = EventBroker(backend="postgres", channel="test_reconnect")
+    await broker.start(DATABASE_URL)
+    subscription = broker.subscribe(["asset:reconnect"])
+    try:
+        # Both connections are killed, like on a database restart
+        pids = [broker._listener.get_server_pid(), broker._notifier.get_server_pid()]
+        admin = await asyncpg.connect(DATABASE_URL)
+        await admin.execute(
+            "SELECT pg_terminate_backend(pid) FROM unnest($1::int[]) pid", pids
+        )
+        await admin.close()
+        for _ in range(100):
+            listener = broker._listener
+            if listener is not None and listener.get_server_pid() not in pids:
+                break
+            await asyncio.sleep(0.05)
+
+        await broker.publish(["asset:reconnect"], {"type": "bid"})
+        assert await subscription.get(timeout=5) == {"type": "bid"}
+        assert broker.stats()["reconnects"] == 2
+    finally:
+        subscription.close()
+        await broker.stop()
@@ -0,0 +1,172 @@
+import asyncio
+import time
+
+import pytest
+from conftest import auth_headers
+from database import SessionLocal, async_session
+from models import NDA, Job
+from sqlalchemy import select
+from utils.events import event_broker, user_topic
+from utils.jobs import job_queue
+from utils.storage import object_store
+
+pytestmark = pytest.mark.anyio
+
+
+# Start the app's job workers for one test (the suite runs with JOB_WORKERS=0)
+@pytest.fixture
+async def workers(app, monkeypatch):
+    monkeypatch.setattr(job_queue, "workers", 2)
+    await job_queue.start()
+    yield job_queue
+    await job_queue.stop()
+
+
+# Function to wait until a (blocking) condition holds
+async def wait_until(condition, timeout=15):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out waiting for the job queue"
+        await asyncio.sleep(0.05)
+
+
+def job_row(idempotency_key):
+    with SessionLocal() as db:
+        return db.scalar(select(Job).where(Job.idempotency_key == idempotency_key))
+
+
+def nda_status(asset_id):
+    with SessionLocal() as db:
+        return db.scalar(select(NDA.status).where(NDA.asset_id == asset_id))
+
+
+async def test_workers_provision_buckets_and_post_process_ndas(
+    client, workers, make_user, make_asset
+):
+    owner_id = make_user("owner")
+    buyer_id = make_user("buyer")
+    asset_id = make_asset(owner_id)
+    subscription = event_broker.subscribe([user_topic(buyer_id)])
+
+    response = await client.post(
+        f"/assets/{asset_id}/offer",
+        json={"price": 250.0},
+        headers=auth_headers(owner_id),
+    )
+    assert response.status_code == 200
+    response = await client.post(
+        f"/assets/{asset_id}/nda/request",
+        params={"buyer_id": str(buyer_id)},
+        headers=auth_headers(buyer_id),
+    )
+    assert response.status_code == 200
+
+    await wait_until(
+        lambda: job_row(f"provision_datarooms:{asset_id}").status == "succeeded"
+        and job_row(f"provision_buckets:nda-{asset_id}").status == "succeeded"
+    )
+    for bucket_name in (f"public-{asset_id}", f"private-{asset_id}", f"nda-{asset_id}"):
+        assert await object_store.bucket_exists(bucket_name)
+
+    # A signed "NDA" that is not a PDF is rejected by the post-processing job
+    response = await client.post(
+        f"/assets/{asset_id}/nda/upload",
+        params={"buyer_id": str(buyer_id), "nda_number": 1},
+        content=b"not a pdf",
+        headers={**auth_headers(buyer_id), "Content-Type": "application/pdf"},
+    )
+    assert response.status_code == 200
+    await wait_until(lambda: nda_status(asset_id) == "rejected")
+
+    # Status notifications are delivered by the notify jobs
+    statuses = []
+    while len(statuses) < 3:
+        event = await subscription.get(timeout=15)
+        assert event is not None
+        statuses.append(event["status"])
+    subscription.close()
+    assert sorted(statuses) == ["rejected", "requested", "signed"]
+
+
+async def test_failed_jobs_are_queued_again(workers, monkeypatch):
+    calls = []
+
+    async def flaky(payload):
+        calls.append(payload)
+        if len(calls) == 1:
+            raise RuntimeError("first attempt fails")
+
+    monkeypatch.setitem(job_queue._handlers, "test_flaky", flaky)
+    key = f"test_flaky:{time.monotonic_ns()}"
+
+    async def enqueue(payload):
+        async with async_session() as db:
+            await job_queue.enqueue(
+                db, "test_flaky", payload, idempotency_key=key, max_attempts=1
+            )
+            await db.commit()
+
+    await enqueue({"run": 1})
+    await wait_until(lambda: job_row(key).status == "failed")
+
+    await enqueue({"run": 2})
+    await wait_until(lambda: job_row(key).status == "succeeded")
+    assert calls == [{"run": 1}, {"run": 2}]
+    assert job_row(key).attempts == 1
+
+    # A job that succeeded is not run again
+    await enqueue({"run": 3})
+    await asyncio.sleep(0.2)
+    assert job_row(key).status == "succeeded"
+    assert calls == [{"run": 1}, {"run": 2}]
+
+
+async def test_workers_are_woken_after_the_enqueue_commits(app):
+    job_queue._wakeup.clear()
+
+    async with async_session() as db:
+        await job_queue.enqueue(db, "notify", {"events": []})
+        await asyncio.sleep(0)
+        assert not job_queue._wakeup.is_set()
+
+        await db.commit()
+        await asyncio.sleep(0)
+        assert job_queue._wakeup.is_set()
+
+
+async def test_reclaimed_jobs_keep_their_new_owner(app, monkeypatch):
+    async def handler(payload):
+        pass
+
+    monkeypatch.setitem(job_queue._handlers, "test_reclaimed", handler)
+    key = f"test_reclaimed:{time.monotonic_ns()}"
+    with SessionLocal() as db:
+        job = Job(
+            kind="test_reclaimed",
+            payload={},
+            idempotency_key=key,
+            status="running",
+            attempts=1,
+            max_attempts=5,
+        )
+        db.add(job)
+        db.commit()
+        claimed = {
+            "id": job.id,
+            "kind": job.kind,
+            "payload": {},
+            "attempts": 1,
+            "max_attempts": 5,
+            "waited": 0.0,
+        }
+
+        # Another worker reclaims the job after JOB_TIMEOUT
+        job.attempts = 2
+        db.commit()
+
+    succeeded = job_queue.succeeded
+    await job_queue._run(claimed)
+
+    job = job_row(key)
+    assert (job.status, job.attempts, job.finished_at) == ("running", 2, None)
+    assert job_queue.succeeded == succeeded
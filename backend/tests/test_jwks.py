@@ -0,0 +1,121 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from conftest import KEY_ID
+from utils.jwks import JWKSKeyStore
+
+# The test identity provider's JWKS document (written by conftest)
+with open(os.environ["JWKS_URL"].removeprefix("file://")) as f:
+    JWKS = json.load(f)
+
+
+# Stand-in for the identity provider, counting the fetches
+class FakeProvider:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.fetches = 0
+        self.down = False
+        self._lock = threading.Lock()
+
+    def __call__(self):
+        with self._lock:
+            self.fetches += 1
+        time.sleep(self.delay)
+        if self.down:
+            raise ConnectionError("identity provider unreachable")
+        return JWKS
+
+
+def key_store(provider, **options):
+    store = JWKSKeyStore("https://idp.test/.well-known/jwks.json", **options)
+    store._load_jwks = provider
+    return store
+
+
+def test_known_keys_are_served_from_the_cache():
+    provider = FakeProvider()
+    store = key_store(provider)
+    store.refresh()
+
+    assert all(store.get_key(KEY_ID) is not None for _ in range(5))
+    assert provider.fetches == 1
+    assert store.stats()["hits"] == 5
+    assert store.stats()["misses"] == 0
+    assert store.stats()["keys"] == 1
+
+
+def test_unknown_kids_are_refetched_once_by_concurrent_requests():
+    provider = FakeProvider(delay=0.2)
+    store = key_store(provider)
+
+    with ThreadPoolExecutor(max_workers=10) as executor:
+        keys = list(executor.map(lambda _: store.get_key(KEY_ID), range(10)))
+
+    assert all(key is not None for key in keys)
+    assert provider.fetches == 1
+    assert store.stats()["misses"] == 10
+
+
+def test_refetches_for_unknown_kids_are_rate_limited():
+    provider = FakeProvider()
+    store = key_store(provider, min_refetch_interval=0.3)
+    store.refresh()
+
+    assert store.get_key("rotated-key") is None
+    assert store.get_key("rotated-key") is None
+    assert provider.fetches == 2
+
+    time.sleep(0.35)
+    assert store.get_key("rotated-key") is None
+    assert provider.fetches == 3
+
+
+def test_failed_fetches_are_retried_without_waiting_for_the_rate_limit():
+    provider = FakeProvider()
+    store = key_store(provider, min_refetch_interval=60)
+
+    # The warm-up fetch at startup fails, and so does the first refetch
+    provider.down = True
+    store.refresh()
+    assert store.get_key(KEY_ID) is None
+
+    provider.down = False
+    assert store.get_key(KEY_ID) is not None
+    assert provider.fetches == 3
+    assert store.stats()["refresh_failures"] == 2
+    assert store.stats()["refreshes"] == 1
+
+
+def test_stale_keys_are_served_while_refreshing_in_the_background():
+    provider = FakeProvider(delay=0.2)
+    store = key_store(provider, ttl=0.1)
+    store.refresh()
+    time.sleep(0.15)
+
+    started = time.monotonic()
+    assert store.get_key(KEY_ID) is not None
+    assert time.monotonic() - started < 0.1
+
+    deadline = time.monotonic() + 5
+    while store.stats()["refreshes"] < 2:
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+    assert provider.fetches == 2
+
+
+@pytest.mark.anyio
+async def test_startup_fetches_the_keys_off_the_event_loop(monkeypatch):
+    from main import jwks_store, warm_jwks_cache
+
+    threads = []
+    monkeypatch.setattr(
+        jwks_store, "refresh", lambda: threads.append(threading.current_thread())
+    )
+
+    await warm_jwks_cache()
+
+    assert threads and threads[0] is not threading.main_thread()
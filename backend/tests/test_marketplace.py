@@ -0,0 +1,57 @@
+import uuid
+
+import pytest
+from conftest import auth_headers
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_search_matches_listed_assets(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    # A word no other test uses, so only these assets match
+    word = f"zephyr{uuid.uuid4().hex[:8]}"
+    match = make_asset(owner_id, name=f"Harbor {word} warehouse", price=500.0)
+    better_match = make_asset(
+        owner_id, name=f"{word} yard", description=f"{word} lots", price=900.0
+    )
+    make_asset(owner_id, name=f"Unlisted {word}")
+    make_asset(owner_id, name="Harbor warehouse", price=100.0)
+    headers = auth_headers(make_user("buyer"))
+
+    response = await client.get("/marketplace", params={"q": word}, headers=headers)
+    assert response.status_code == 200
+    listings = response.json()["listings"]
+    assert {listing["id"] for listing in listings} == {str(match), str(better_match)}
+
+    response = await client.get(
+        "/marketplace", params={"q": word, "sort": "relevance"}, headers=headers
+    )
+    assert [listing["id"] for listing in response.json()["listings"]] == [
+        str(better_match),
+        str(match),
+    ]
+
+    response = await client.get(
+        "/marketplace", params={"q": word, "max_price": 600}, headers=headers
+    )
+    assert [listing["id"] for listing in response.json()["listings"]] == [str(match)]
+
+
+async def test_search_pages_by_relevance(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    word = f"quasar{uuid.uuid4().hex[:8]}"
+    asset_ids = {make_asset(owner_id, name=f"{word} {i}", price=10.0) for i in range(3)}
+    headers = auth_headers(make_user("buyer"))
+
+    seen = []
+    params = {"q": word, "sort": "relevance", "limit": 2}
+    while True:
+        response = await client.get("/marketplace", params=params, headers=headers)
+        assert response.status_code == 200
+        page = response.json()
+        seen += [listing["id"] for listing in page["listings"]]
+        if not page["next_cursor"]:
+            break
+        params["cursor"] = page["next_cursor"]
+
+    assert sorted(seen) == sorted(str(asset_id) for asset_id in asset_ids)
@@ -0,0 +1,288 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+from conftest import auth_headers
+from database import SessionLocal
+from models import NDA
+from sqlalchemy import select, update
+from sqlalchemy.exc import IntegrityError
+
+pytestmark = pytest.mark.anyio
+
+PDF = b"%PDF-1.4\n% signed NDA\n"
+# Concurrent NDA requests for one asset (NDA_LOAD_REQUESTS scales the load test)
+PARALLEL_REQUESTS = int(os.getenv("NDA_LOAD_REQUESTS", "300"))
+
+
+# Function to read the NDAs of an asset as {buyer_id: (nda_number, status)}
+def asset_ndas(asset_id):
+    with SessionLocal() as db:
+        rows = db.execute(
+            select(NDA.buyer_id, NDA.nda_number, NDA.status).where(
+                NDA.asset_id == asset_id
+            )
+        )
+        return {row.buyer_id: (row.nda_number, row.status) for row in rows}
+
+
+async def request_nda(client, asset_id, buyer_id):
+    return await client.post(
+        f"/assets/{asset_id}/nda/request",
+        params={"buyer_id": str(buyer_id)},
+        headers=auth_headers(buyer_id),
+    )
+
+
+async def test_parallel_requests_get_distinct_consecutive_numbers(
+    client, make_user, make_asset
+):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_ids = [make_user("buyer") for _ in range(PARALLEL_REQUESTS)]
+
+    responses = await asyncio.gather(
+        *(request_nda(client, asset_id, buyer_id) for buyer_id in buyer_ids)
+    )
+
+    assert {response.status_code for response in responses} == {200}
+    ndas = asset_ndas(asset_id)
+    assert set(ndas) == set(buyer_ids)
+    assert sorted(number for number, _ in ndas.values()) == list(
+        range(1, PARALLEL_REQUESTS + 1)
+    )
+
+
+async def test_buyers_request_ndas_only_for_themselves(client, make_user, make_asset):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+
+    response = await client.post(
+        f"/assets/{asset_id}/nda/request",
+        params={"buyer_id": str(buyer_id)},
+        headers=auth_headers(make_user("other")),
+    )
+    assert response.status_code == 403
+    assert asset_ndas(asset_id) == {}
+
+    # The buyer's own id is accepted in any spelling
+    response = await client.post(
+        f"/assets/{asset_id}/nda/request",
+        params={"buyer_id": str(buyer_id).upper()},
+        headers=auth_headers(buyer_id),
+    )
+    assert response.status_code == 200
+    assert asset_ndas(asset_id) == {buyer_id: (1, "requested")}
+
+
+async def test_repeated_requests_return_the_open_nda(client, make_user, make_asset):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+
+    responses = await asyncio.gather(
+        *(request_nda(client, asset_id, buyer_id) for _ in range(5))
+    )
+
+    assert {response.status_code for response in responses} == {200}
+    assert {response.json()["message"] for response in responses} == {
+        f"NDA number 1 for asset {asset_id} has been requested."
+    }
+    assert asset_ndas(asset_id) == {buyer_id: (1, "requested")}
+
+    # The counter did not skip numbers for the retried requests
+    other_buyer_id = make_user("buyer")
+    await request_nda(client, asset_id, other_buyer_id)
+    assert asset_ndas(asset_id)[other_buyer_id] == (2, "requested")
+
+
+async def test_buyer_uploads_the_signed_nda(client, make_user, make_asset):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+    await request_nda(client, asset_id, buyer_id)
+
+    response = await client.post(
+        f"/assets/{asset_id}/nda/upload",
+        params={"buyer_id": str(buyer_id), "nda_number": 1},
+        content=PDF,
+        headers={**auth_headers(buyer_id), "Content-Type": "application/pdf"},
+    )
+
+    assert response.status_code == 200
+    assert response.json()["size"] == len(PDF)
+    assert asset_ndas(asset_id) == {buyer_id: (1, "signed")}
+
+
+@pytest.mark.parametrize(
+    "path", ["/nda/upload", "/nda/upload-url", "/nda/upload/complete"]
+)
+async def test_only_the_buyer_can_upload(client, make_user, make_asset, path):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+    await request_nda(client, asset_id, buyer_id)
+
+    response = await client.post(
+        f"/assets/{asset_id}{path}",
+        params={"buyer_id": str(buyer_id), "nda_number": 1},
+        content=PDF,
+        headers={**auth_headers(make_user("other")), "Content-Type": "application/pdf"},
+    )
+
+    assert response.status_code == 403
+    assert asset_ndas(asset_id) == {buyer_id: (1, "requested")}
+
+
+async def test_upload_urls_are_only_handed_out_for_unsigned_ndas(
+    client, make_user, make_asset, monkeypatch
+):
+    monkeypatch.setattr("routes.nda.STORAGE_OFFLOAD", True)
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+    await request_nda(client, asset_id, buyer_id)
+
+    async def upload_url():
+        return await client.post(
+            f"/assets/{asset_id}/nda/upload-url",
+            params={"buyer_id": str(buyer_id), "nda_number": 1},
+            headers=auth_headers(buyer_id),
+        )
+
+    response = await upload_url()
+    assert response.status_code == 200
+    assert response.json()["url"]
+
+    set_status(nda_id(asset_id, buyer_id), "signed")
+    response = await upload_url()
+    assert response.status_code == 409
+
+
+async def test_upload_rejects_a_malformed_content_length(client, make_user, make_asset):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+    await request_nda(client, asset_id, buyer_id)
+
+    response = await client.post(
+        f"/assets/{asset_id}/nda/upload",
+        params={"buyer_id": str(buyer_id), "nda_number": 1},
+        content=PDF,
+        headers={
+            **auth_headers(buyer_id),
+            "Content-Type": "application/pdf",
+            "Content-Length": "twenty",
+        },
+    )
+
+    assert response.status_code == 400
+
+
+# Function to read the id of a buyer's NDA for an asset
+def nda_id(asset_id, buyer_id):
+    with SessionLocal() as db:
+        return db.scalar(
+            select(NDA.id).where(NDA.asset_id == asset_id, NDA.buyer_id == buyer_id)
+        )
+
+
+def set_status(nda_id, status):
+    with SessionLocal() as db:
+        db.execute(update(NDA).where(NDA.id == nda_id).values(status=status))
+        db.commit()
+
+
+async def test_database_rejects_illegal_transitions(client, make_user, make_asset):
+    asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_id = make_user("buyer")
+    await request_nda(client, asset_id, buyer_id)
+    requested_id = nda_id(asset_id, buyer_id)
+
+    # Skipping the signature, or leaving a final status, is refused by the trigger
+    with pytest.raises(IntegrityError, match="Invalid NDA status transition"):
+        set_status(requested_id, "confirmed")
+    set_status(requested_id, "rejected")
+    with pytest.raises(IntegrityError, match="rejected -> requested"):
+        set_status(requested_id, "requested")
+
+    assert asset_ndas(asset_id) == {buyer_id: (1, "rejected")}
+
+
+async def test_bulk_update_skips_ndas_that_cannot_change(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    asset_ids = [make_asset(owner_id, price=100.0) for _ in range(2)]
+    other_asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_ids = [make_user("buyer") for _ in range(3)]
+    for asset_id in asset_ids + [other_asset_id]:
+        for buyer_id in buyer_ids:
+            await request_nda(client, asset_id, buyer_id)
+    signed = [nda_id(asset_id, buyer_ids[0]) for asset_id in asset_ids]
+    for signed_id in signed:
+        set_status(signed_id, "signed")
+    requested = nda_id(asset_ids[0], buyer_ids[1])
+    rejected = nda_id(asset_ids[1], buyer_ids[1])
+    set_status(rejected, "rejected")
+    not_owned = nda_id(other_asset_id, buyer_ids[0])
+    unknown = uuid.uuid4()
+
+    response = await client.post(
+        "/nda/bulk",
+        json={
+            "action": "confirm",
+            "nda_ids": [
+                str(i) for i in (*signed, requested, rejected, not_owned, unknown)
+            ],
+        },
+        headers=auth_headers(owner_id),
+    )
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == "confirmed"
+    assert sorted(body["updated"]) == sorted(str(i) for i in signed)
+    assert body["skipped"] == [
+        str(i) for i in (requested, rejected, not_owned, unknown)
+    ]
+    assert asset_ndas(asset_ids[0])[buyer_ids[0]] == (1, "confirmed")
+    assert asset_ndas(other_asset_id)[buyer_ids[0]] == (1, "requested")
+
+    # Rejecting: the confirmed NDAs are final now
+    response = await client.post(
+        "/nda/bulk",
+        json={"action": "reject", "nda_ids": [str(i) for i in (*signed, requested)]},
+        headers=auth_headers(owner_id),
+    )
+    assert response.json()["updated"] == [str(requested)]
+    assert asset_ndas(asset_ids[0])[buyer_ids[1]] == (2, "rejected")
+
+
+async def test_inbox_lists_pending_ndas_of_the_callers_assets(
+    client, make_user, make_asset
+):
+    owner_id = make_user("owner")
+    asset_id = make_asset(owner_id, name="Inbox asset", price=100.0)
+    other_asset_id = make_asset(make_user("owner"), price=100.0)
+    buyer_ids = [make_user("buyer") for _ in range(4)]
+    for buyer_id in buyer_ids:
+        await request_nda(client, asset_id, buyer_id)
+        await request_nda(client, other_asset_id, buyer_id)
+    set_status(nda_id(asset_id, buyer_ids[1]), "signed")
+    set_status(nda_id(asset_id, buyer_ids[2]), "rejected")
+
+    async def inbox(**params):
+        response = await client.get(
+            "/nda/inbox", params=params, headers=auth_headers(owner_id)
+        )
+        assert response.status_code == 200
+        return response.json()["ndas"]
+
+    ndas = await inbox()
+    assert [(nda["buyer_id"], nda["status"]) for nda in ndas] == [
+        (str(buyer_ids[0]), "requested"),
+        (str(buyer_ids[1]), "signed"),
+        (str(buyer_ids[3]), "requested"),
+    ]
+    assert {nda["asset_id"] for nda in ndas} == {str(asset_id)}
+    assert {nda["asset_name"] for nda in ndas} == {"Inbox asset"}
+    assert ndas[0]["id"] == str(nda_id(asset_id, buyer_ids[0]))
+
+    assert [nda["buyer_id"] for nda in await inbox(status="signed")] == [
+        str(buyer_ids[1])
+    ]
+    assert len(await inbox(limit=2)) == 2
@@ -0,0 +1,110 @@
+import base64
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from conftest import auth_headers
+from database import SessionLocal
+from fastapi import HTTPException
+from models.user_models import User
+from utils.pagination import decode_cursor, encode_cursor
+
+pytestmark = pytest.mark.anyio
+
+
+def test_cursors_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone.utc)
+    row_id = uuid.uuid4()
+
+    cursor = encode_cursor(created_at, row_id)
+
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == (created_at, row_id)
+    assert decode_cursor(encode_cursor("a/b.pdf"), parsers=(str,)) == ("a/b.pdf",)
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(value.encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not a cursor!",
+        raw_cursor("not json"),
+        raw_cursor('"2024-05-01T12:30:15"'),
+        raw_cursor(json.dumps(["2024-05-01T12:30:15"])),
+        raw_cursor(json.dumps(["2024-05-01T12:30:15", "not-a-uuid"])),
+        raw_cursor(json.dumps(["yesterday", str(uuid.uuid4())])),
+        raw_cursor(json.dumps([1, 2])),
+        encode_cursor("a/b.pdf"),
+    ],
+)
+def test_tampered_cursors_are_rejected(cursor):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor)
+
+    assert error.value.status_code == 400
+
+
+# Users sharing creation times, under an email prefix of their own
+def make_users_created_at(times):
+    prefix = f"page-{uuid.uuid4().hex[:8]}-"
+    with SessionLocal() as db:
+        users = [
+            User(
+                username=f"{prefix}{i}",
+                email=f"{prefix}{i}@example.com",
+                hashed_password="hashed",
+                created_at=created_at,
+            )
+            for i, created_at in enumerate(times)
+        ]
+        db.add_all(users)
+        db.commit()
+        order = sorted(users, key=lambda user: (user.created_at, user.id))
+        return prefix, [user.id for user in order]
+
+
+async def list_users(client, **params):
+    response = await client.get(
+        "/users",
+        params=params,
+        headers=auth_headers(uuid.uuid4(), roles=["admin"]),
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.parametrize("limit", [1, 2, 3, 5, 6])
+async def test_pages_split_rows_with_the_same_sort_key(client, schema, limit):
+    now = datetime.now(timezone.utc)
+    # Page boundaries fall inside groups of rows created at the same time
+    prefix, user_ids = make_users_created_at([now] * 3 + [now + timedelta(1)] * 2)
+
+    pages, cursor = [], None
+    while True:
+        params = {"limit": limit, "email_prefix": prefix}
+        if cursor:
+            params["cursor"] = cursor
+        page = await list_users(client, **params)
+        pages.append([uuid.UUID(user["user_id"]) for user in page["users"]])
+        cursor = page["next_cursor"]
+        if cursor is None:
+            break
+
+    assert [user_id for page in pages for user_id in page] == user_ids
+    assert all(len(page) == limit for page in pages[:-1])
+    assert 0 < len(pages[-1]) <= limit
+
+
+async def test_tampered_cursors_are_rejected_by_the_listing(client, schema):
+    response = await client.get(
+        "/users",
+        params={"cursor": raw_cursor(json.dumps(["yesterday", "nobody"]))},
+        headers=auth_headers(uuid.uuid4(), roles=["admin"]),
+    )
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid pagination cursor"}
@@ -0,0 +1,61 @@
+from utils.presign import PresignedURLCache
+
+
+# Storage backend counting the URLs it signs
+class FakeBackend:
+    def __init__(self):
+        self.signed = 0
+
+    def presigned_url(self, method, bucket_name, object_name, expires):
+        self.signed += 1
+        return f"https://storage/{bucket_name}/{object_name}?{method}&n={self.signed}"
+
+
+def test_urls_are_reused_within_their_expiry():
+    backend = FakeBackend()
+    urls = PresignedURLCache(backend, expiry=300, min_remaining=60)
+
+    first = urls.get_url("public-a", "deck.pdf")
+    assert urls.get_url("public-a", "deck.pdf") == first
+    # Uploads and downloads of the same object are signed separately
+    assert urls.put_url("public-a", "deck.pdf") != first
+    assert backend.signed == 2
+    assert urls.stats() == {"hits": 1, "misses": 2, "size": 2}
+
+
+def test_urls_close_to_expiry_are_signed_again():
+    backend = FakeBackend()
+    urls = PresignedURLCache(backend, expiry=300, min_remaining=400)
+
+    # min_remaining is capped at half the expiry
+    assert urls.min_remaining == 150
+    urls._urls[("GET", "public-a", "deck.pdf")] = ("https://stale", 0)
+    assert urls.get_url("public-a", "deck.pdf")[0] != "https://stale"
+
+
+def test_least_recently_used_urls_are_evicted():
+    backend = FakeBackend()
+    urls = PresignedURLCache(backend, maxsize=2)
+
+    urls.get_url("public-a", "first.pdf")
+    urls.get_url("public-a", "second.pdf")
+    urls.get_url("public-a", "first.pdf")  # Now the most recently used
+    urls.get_url("public-a", "third.pdf")
+
+    assert urls.stats()["size"] == 2
+    assert set(urls._urls) == {
+        ("GET", "public-a", "first.pdf"),
+        ("GET", "public-a", "third.pdf"),
+    }
+
+
+def test_invalidate_drops_every_url_of_the_object():
+    backend = FakeBackend()
+    urls = PresignedURLCache(backend)
+    urls.get_url("public-a", "deck.pdf")
+    urls.put_url("public-a", "deck.pdf")
+    urls.get_url("public-a", "other.pdf")
+
+    urls.invalidate("public-a", "deck.pdf")
+
+    assert set(urls._urls) == {("GET", "public-a", "other.pdf")}
@@ -0,0 +1,73 @@
+import pytest
+from conftest import auth_headers
+from database import SessionLocal
+from models import Asset
+from sqlalchemy.exc import InvalidRequestError
+from utils.query_counter import QueryBudgetExceeded, QueryCounter, query_counter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_route_over_its_budget_fails(client, make_user, make_asset, monkeypatch):
+    owner_id = make_user("owner")
+    make_asset(owner_id)
+    monkeypatch.setitem(query_counter.budgets, ("GET", "/assets/me"), 0)
+
+    with pytest.raises(QueryBudgetExceeded, match="GET /assets/me ran 1 queries"):
+        await client.get("/assets/me", headers=auth_headers(owner_id))
+
+
+async def test_routes_report_their_query_count(client, make_user, make_asset):
+    owner_id = make_user("owner")
+    make_asset(owner_id)
+
+    response = await client.get("/assets/me", headers=auth_headers(owner_id))
+
+    assert response.status_code == 200
+    assert int(response.headers["X-Query-Count"]) == 1
+    stats = query_counter.stats()["GET /assets/me"]
+    assert stats["queries_max"] <= stats["budget"] == 1
+
+
+def test_record_enforces_budgets_in_strict_mode_only():
+    budgets = {("GET", "/things"): 2}
+
+    strict = QueryCounter(budgets=budgets, strict=True)
+    strict.record("GET", "/things", 2)
+    with pytest.raises(QueryBudgetExceeded):
+        strict.record("GET", "/things", 3)
+    # Routes without a budget are only counted
+    strict.record("GET", "/other", 50)
+
+    lenient = QueryCounter(budgets=budgets, strict=False)
+    lenient.record("GET", "/things", 3)
+    assert lenient.stats()["GET /things"]["over_budget"] == 1
+    assert strict.stats()["GET /things"] == {
+        "requests": 2,
+        "queries_avg": 2.5,
+        "queries_max": 3,
+        "budget": 2,
+        "over_budget": 1,
+    }
+
+
+# Relationships must be loaded explicitly, a lazy load would be an N+1 query
+def test_lazy_relationship_loads_are_refused(make_user, make_asset):
+    asset_id = make_asset(make_user("owner"))
+
+    with SessionLocal() as db:
+        asset = db.get(Asset, asset_id)
+        with pytest.raises(InvalidRequestError, match="raise_on_sql"):
+            asset.owner
+
+
+async def test_rejected_requests_are_counted_under_the_route_template(
+    client, make_user
+):
+    response = await client.get(
+        f"/assets/{make_user()}", headers={"Authorization": "Bearer invalid"}
+    )
+
+    assert response.status_code == 401
+    assert response.headers["X-Query-Count"] == "0"
+    assert "GET /assets/{asset_id}" in query_counter.stats()
@@ -0,0 +1,44 @@
+import io
+
+import pytest
+from utils.storage import FilesystemBackend
+
+
+# Upload body that breaks off after its first chunk (e.g. a client disconnect)
+class BrokenUpload(io.RawIOBase):
+    def __init__(self):
+        self.reads = 0
+
+    def readable(self):
+        return True
+
+    def read(self, size=-1):
+        self.reads += 1
+        if self.reads > 1:
+            raise ConnectionResetError("client went away")
+        return b"x" * size
+
+
+def test_aborted_uploads_leave_no_partial_file(tmp_path):
+    backend = FilesystemBackend(tmp_path)
+    backend.make_bucket("bucket")
+
+    with pytest.raises(ConnectionResetError):
+        backend.put_object(
+            "bucket", "docs/big.pdf", BrokenUpload(), 1024, 256, "application/pdf"
+        )
+
+    assert [path.name for path in tmp_path.rglob("*") if path.is_file()] == []
+
+
+def test_uploads_replace_objects_in_one_step(tmp_path):
+    backend = FilesystemBackend(tmp_path)
+    backend.make_bucket("bucket")
+
+    backend.put_object("bucket", "a.txt", io.BytesIO(b"first"), 5, 2, "text/plain")
+    backend.put_object("bucket", "a.txt", io.BytesIO(b"second"), 6, 2, "text/plain")
+
+    assert backend.stat_object("bucket", "a.txt").size == 6
+    assert sorted(path.name for path in tmp_path.rglob("*") if path.is_file()) == [
+        "a.txt"
+    ]
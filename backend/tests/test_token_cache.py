@@ -0,0 +1,67 @@
+import time
+
+from utils.token_cache import TokenCache
+
+
+def test_entries_expire_with_the_token():
+    cache = TokenCache(max_ttl=300)
+    cache.put("short-lived", {"sub": "a", "exp": time.time() + 0.2})
+    cache.put("long-lived", {"sub": "b", "exp": time.time() + 3600})
+
+    assert cache.get("short-lived")["sub"] == "a"
+    time.sleep(0.25)
+    assert cache.get("short-lived") is None
+    assert cache.get("long-lived")["sub"] == "b"
+    assert cache.stats()["size"] == 1
+
+
+def test_entries_without_exp_are_kept_for_max_ttl():
+    cache = TokenCache(max_ttl=0.2)
+    cache.put("opaque", {"sub": "a"})
+    cache.put("long-lived", {"sub": "b", "exp": time.time() + 3600})
+
+    assert cache.get("opaque") == {"sub": "a"}
+    time.sleep(0.25)
+    # max_ttl also bounds tokens that expire later
+    assert cache.get("opaque") is None
+    assert cache.get("long-lived") is None
+
+
+def test_expired_tokens_are_not_stored():
+    cache = TokenCache()
+    cache.put("expired", {"sub": "a", "exp": time.time() - 1})
+
+    assert cache.get("expired") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_least_recently_used_tokens_are_evicted():
+    cache = TokenCache(maxsize=2)
+    cache.put("first", {"sub": "1"})
+    cache.put("second", {"sub": "2"})
+    assert cache.get("first") == {"sub": "1"}
+
+    cache.put("third", {"sub": "3"})
+
+    assert cache.get("second") is None
+    assert cache.get("first") == {"sub": "1"}
+    assert cache.get("third") == {"sub": "3"}
+    assert cache.stats()["size"] == 2
+
+
+def test_tokens_are_stored_hashed():
+    cache = TokenCache()
+    cache.put("secret-token", {"sub": "a"})
+
+    assert "secret-token" not in cache._entries
+    assert cache.stats()["hits"] == 0
+    assert cache.get("secret-token") == {"sub": "a"}
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (1, 0)
+
+
+def test_disabled_cache_stores_nothing():
+    cache = TokenCache(enabled=False)
+    cache.put("token", {"sub": "a"})
+
+    assert cache.get("token") is None
+    assert cache.stats()["size"] == 0
@@ -0,0 +1,51 @@
+import database
+import orjson
+import pytest
+from conftest import auth_headers
+from models.user_models import UserOut, UserPage
+
+pytestmark = pytest.mark.anyio
+
+
+# The routes below read through the async engine
+def test_routes_use_the_async_engine():
+    assert database.async_engine is not None
+
+
+async def test_current_user_matches_the_response_model(client, make_user):
+    user_id = make_user()
+
+    response = await client.get("/user/me", headers=auth_headers(user_id))
+
+    assert response.status_code == 200
+    assert set(response.json()) == set(UserOut.model_fields)
+    user = UserOut(**response.json())
+    assert user.user_id == user_id
+    assert response.json()["user_id"] == str(user_id)
+
+
+async def test_user_listing_pages_and_streams(client, make_user):
+    admin_id = make_user("admin")
+    user_ids = {make_user() for _ in range(3)}
+    headers = auth_headers(admin_id, roles=["admin"])
+
+    response = await client.get("/users", params={"limit": 2}, headers=headers)
+    assert response.status_code == 200
+    page = UserPage(**response.json())
+    assert set(response.json()["users"][0]) == set(UserOut.model_fields)
+    assert len(page.users) == 2
+    assert page.next_cursor
+
+    response = await client.get("/users", params={"stream": True}, headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    streamed = [UserOut(**orjson.loads(line)) for line in response.text.splitlines()]
+    assert user_ids <= {user.user_id for user in streamed}
+
+
+async def test_user_listing_requires_admin(client, make_user):
+    user_id = make_user()
+
+    response = await client.get("/users", headers=auth_headers(user_id))
+
+    assert response.status_code == 403
@@ -0,0 +1,77 @@
+import os
+import threading
+import time
+
+# Access decision cache configuration
+ACCESS_CACHE_TTL = float(os.getenv("ACCESS_CACHE_TTL", "30"))
+ACCESS_CACHE_SIZE = int(os.getenv("ACCESS_CACHE_SIZE", "10000"))
+
+
+# Short-lived cache of private data room access decisions per (user, asset).
+# Entries are invalidated when invitations or transactions change; the TTL bounds
+# staleness for changes made by other workers.
+class AccessDecisionCache:
+    def __init__(self, ttl=ACCESS_CACHE_TTL, maxsize=ACCESS_CACHE_SIZE):
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self._decisions = {}  # (user_id, asset_id) -> (expires_at, allowed)
+        self._generations = {}  # asset_id -> number of invalidations
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.stale_puts = 0
+
+    # (cached decision True/False or None if unknown, asset generation). On a
+    # miss, pass the generation to put() along with the decision computed next.
+    def get(self, user_id, asset_id):
+        key = (str(user_id), str(asset_id))
+        with self._lock:
+            generation = self._generations.get(key[1], 0)
+            entry = self._decisions.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1], generation
+            self.misses += 1
+            return None, generation
+
+    # Store a decision computed at the given generation. It is dropped if the
+    # asset's access changed meanwhile, as it may predate the change.
+    def put(self, user_id, asset_id, allowed, generation):
+        now = time.monotonic()
+        with self._lock:
+            if self._generations.get(str(asset_id), 0) != generation:
+                self.stale_puts += 1
+                return
+            if len(self._decisions) >= self.maxsize:
+                self._decisions = {
+                    k: v for k, v in self._decisions.items() if v[0] > now
+                }
+                if len(self._decisions) >= self.maxsize:
+                    self._decisions.clear()
+            self._decisions[(str(user_id), str(asset_id))] = (now + self.ttl, allowed)
+
+    # Drop the decision for one user, or for every user of the asset
+    def invalidate(self, asset_id, user_id=None):
+        asset_id = str(asset_id)
+        with self._lock:
+            self._generations[asset_id] = self._generations.get(asset_id, 0) + 1
+            if user_id is not None:
+                self._decisions.pop((str(user_id), asset_id), None)
+                return
+            for key in [k for k in self._decisions if k[1] == asset_id]:
+                del self._decisions[key]
+
+    # Counters for monitoring the cache
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "stale_puts": self.stale_puts,
+                "size": len(self._decisions),
+            }
+
+
+# Process-wide access decision cache
+access_cache = AccessDecisionCache()
@@ -1,14 +1,32 @@
-from secrets import AUTH0_AUDIENCE, AUTH0_DOMAIN
+import os
 
-import requests
-from fastapi import HTTPException
+from fastapi import HTTPException, Request
 from jose import jwt
+from settings import AUTH0_AUDIENCE, AUTH0_DOMAIN
+from utils.jwks import JWKSKeyStore
+from utils.token_cache import TokenCache
 
+# JWKS location (override with a file:// path or a local stub server for testing)
+JWKS_URL = os.getenv("JWKS_URL", f"https://{AUTH0_DOMAIN}/.well-known/jwks.json")
 
-# Function to verify the JWT token
+# Process-wide signing key store shared by all requests
+jwks_store = JWKSKeyStore(JWKS_URL)
+
+# Process-wide cache of already verified tokens
+token_cache = TokenCache()
+
+
+# Function to verify the JWT token and cache its payload.
+# Callers look the token up in token_cache first (once per request).
 def verify_jwt(token: str):
-    header = jwt.get_unverified_header(token)
+    try:
+        header = jwt.get_unverified_header(token)
+    except jwt.JWTError:
+        raise HTTPException(status_code=401, detail="Invalid token")
+
     rsa_key = get_rsa_key(header)
+    if rsa_key is None:
+        raise HTTPException(status_code=401, detail="Invalid token")
 
     try:
         payload = jwt.decode(
@@ -18,25 +36,43 @@ def verify_jwt(token: str):
             audience=AUTH0_AUDIENCE,
             issuer=f"https://{AUTH0_DOMAIN}/",
         )
-        return payload
     except jwt.JWTError:
         raise HTTPException(status_code=401, detail="Invalid token")
 
+    token_cache.put(token, payload)
+    return payload
+
+
+# Extract the bearer token from an Authorization header value
+def get_bearer_token(auth_header):
+    if not auth_header:
+        return None
+    scheme, _, token = auth_header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return token.strip()
+
+
+# Dependency: token payload for the current request.
+# Reuses the payload the AuthMiddleware already verified instead of decoding again.
+def get_current_token(request: Request):
+    payload = getattr(request.state, "token_payload", None)
+    if payload is not None:
+        return payload
+
+    token = get_bearer_token(request.headers.get("Authorization"))
+    if not token:
+        raise HTTPException(status_code=401, detail="Authorization header missing")
+    # Skip signature verification for tokens we have already verified
+    payload = token_cache.get(token)
+    if payload is not None:
+        return payload
+    return verify_jwt(token)
+
 
-# Get the RSA key from Auth0 to validate the JWT
+# Get the (cached) RSA public key from Auth0 to validate the JWT
 def get_rsa_key(header):
-    jwks_url = f"https://{AUTH0_DOMAIN}/.well-known/jwks.json"
-    jwks = requests.get(jwks_url).json()
-
-    rsa_key = {}
-    for key in jwks["keys"]:
-        if key["kid"] == header["kid"]:
-            rsa_key = {
-                "kty": key["kty"],
-                "kid": key["kid"],
-                "use": key["use"],
-                "n": key["n"],
-                "e": key["e"],
-            }
-            break
-    return rsa_key
+    kid = header.get("kid")
+    if not kid:
+        return None
+    return jwks_store.get_key(kid)
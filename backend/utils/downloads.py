@@ -0,0 +1,129 @@
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from utils.storage import ObjectNotFound
+
+# Bytes read from the object store per streamed chunk
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+
+# Function to check If-None-Match / If-Modified-Since against the object
+def is_not_modified(request: Request, etag: str, last_modified):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in candidates or any(
+            tag.removeprefix("W/") == etag for tag in candidates
+        )
+
+    if_modified_since = request.headers.get("If-Modified-Since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)  # "-0000" dates parse naive
+        return last_modified.replace(microsecond=0) <= since
+    return False
+
+
+# Function to parse a single "bytes=start-end" range into (offset, length).
+# Returns None when the whole object should be sent, which includes invalid
+# ranges (RFC 7233 says to ignore them rather than answer 416).
+def parse_range(request: Request, etag: str, size: int):
+    range_header = request.headers.get("Range")
+    if not range_header or not range_header.startswith("bytes="):
+        return None
+
+    # If-Range: only honour the range if the client's copy is still current
+    if_range = request.headers.get("If-Range")
+    if if_range is not None and if_range.strip() != etag:
+        return None
+
+    ranges = range_header[len("bytes=") :].split(",")
+    if len(ranges) != 1:
+        return None  # Multipart ranges are not supported; send the whole object
+
+    start, _, end = ranges[0].strip().partition("-")
+    try:
+        if start:
+            offset = int(start)
+            last = int(end) if end else size - 1
+            if end and last < offset:
+                return None  # Invalid range (e.g. "bytes=5-3"): ignore it
+            last = min(last, size - 1)
+        else:
+            suffix = int(end)  # "bytes=-N": the last N bytes
+            if suffix == 0:
+                raise ValueError
+            offset = max(size - suffix, 0)
+            last = size - 1
+    except ValueError:
+        return None
+
+    # Valid but unsatisfiable (starts past the end of the object)
+    if offset >= size:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"},
+        )
+    return offset, last - offset + 1
+
+
+# Function to build a download response for an object in the object store.
+# Honours Range, If-Range, If-None-Match and If-Modified-Since, passes the ETag,
+# size and modification date through, and always releases the storage connection.
+async def object_download_response(
+    store, bucket_name: str, object_name: str, request: Request, media_type=None
+):
+    try:
+        stat = await store.stat_object(bucket_name, object_name)
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    etag = f'"{stat.etag}"'
+    headers = {"ETag": etag, "Accept-Ranges": "bytes"}
+    if stat.last_modified is not None:
+        headers["Last-Modified"] = format_datetime(stat.last_modified, usegmt=True)
+
+    if is_not_modified(request, etag, stat.last_modified):
+        return Response(status_code=304, headers=headers)
+
+    byte_range = parse_range(request, etag, stat.size)
+    if byte_range is None:
+        offset, length, status_code = 0, stat.size, 200
+    else:
+        offset, length = byte_range
+        status_code = 206
+        headers["Content-Range"] = f"bytes {offset}-{offset + length - 1}/{stat.size}"
+    headers["Content-Length"] = str(length)
+
+    if length == 0:
+        return Response(status_code=status_code, headers=headers, media_type=media_type)
+
+    try:
+        stored = await store.open_object(
+            bucket_name, object_name, offset=offset, length=length
+        )
+    except ObjectNotFound:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    def iterate():
+        try:
+            yield from stored.stream(DOWNLOAD_CHUNK_SIZE)
+        finally:
+            stored.close()
+
+    return StreamingResponse(
+        iterate(),
+        status_code=status_code,
+        headers=headers,
+        media_type=media_type or stat.content_type,
+        # Also runs if the client disconnects before the body is consumed
+        background=BackgroundTask(stored.close),
+    )
@@ -0,0 +1,206 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Event fan-out configuration
+EVENTS_BACKEND = os.getenv("EVENTS_BACKEND", "memory")  # "memory" or "postgres"
+EVENTS_CHANNEL = os.getenv("EVENTS_CHANNEL", "dealclub_events")
+EVENTS_QUEUE_SIZE = int(os.getenv("EVENTS_QUEUE_SIZE", "100"))
+# Backoff between attempts to reopen a dropped Postgres connection
+EVENTS_RECONNECT_BASE_DELAY = float(os.getenv("EVENTS_RECONNECT_BASE_DELAY", "0.5"))
+EVENTS_RECONNECT_MAX_DELAY = float(os.getenv("EVENTS_RECONNECT_MAX_DELAY", "30"))
+
+
+# Function to serialize events (UUIDs and datetimes included)
+def dumps_event(event):
+    return json.dumps(
+        event, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v)
+    )
+
+
+# Subscription to one or more topics; events are queued until the client reads them
+class Subscription:
+    def __init__(self, broker, topics, maxsize=EVENTS_QUEUE_SIZE):
+        self.broker = broker
+        self.topics = topics
+        self.queue = asyncio.Queue(maxsize=maxsize)
+
+    # Next event, or None if nothing arrived within timeout seconds
+    async def get(self, timeout):
+        try:
+            published_at, event = await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+        self.broker.record_delivery(time.monotonic() - published_at)
+        return event
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+# In-process pub/sub for server push (bids, NDA status changes, data room files).
+# With EVENTS_BACKEND=postgres events are sent through Postgres LISTEN/NOTIFY so
+# that subscribers on every worker receive them; otherwise they stay in-process.
+# Dropped Postgres connections are reopened; events notified while the LISTEN
+# connection is down are not delivered.
+class EventBroker:
+    def __init__(self, backend=EVENTS_BACKEND, channel=EVENTS_CHANNEL):
+        self.backend = backend
+        self.channel = channel
+        self._topics = {}  # topic -> set of subscriptions
+        self._dsn = None
+        self._listener = None  # asyncpg connection used for LISTEN
+        self._notifier = None  # asyncpg connection used for NOTIFY
+        self._notify_lock = asyncio.Lock()
+        self._reconnect_task = None
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.reconnects = 0
+
+    # Connect the Postgres backend (if configured)
+    async def start(self, dsn=None):
+        if self.backend != "postgres":
+            return
+        import asyncpg  # Only needed for the Postgres backend
+
+        self._dsn = dsn
+        self._notifier = await asyncpg.connect(dsn)
+        await self._listen()
+
+    async def stop(self):
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        # Cleared first, so closing the listener does not trigger a reconnect
+        connections = (self._listener, self._notifier)
+        self._listener = self._notifier = None
+        for connection in connections:
+            if connection is not None:
+                await connection.close()
+
+    def subscribe(self, topics):
+        subscription = Subscription(self, list(topics))
+        for topic in subscription.topics:
+            self._topics.setdefault(topic, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        for topic in subscription.topics:
+            subscribers = self._topics.get(topic)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._topics[topic]
+
+    # Publish an event to the subscribers of the given topics
+    async def publish(self, topics, event):
+        self.published += 1
+        if self._notifier is not None:
+            payload = dumps_event({"topics": list(topics), "event": event})
+            async with self._notify_lock:
+                if self._notifier.is_closed():
+                    await self._reopen_notifier()
+                await self._notifier.execute(
+                    "SELECT pg_notify($1, $2)", self.channel, payload
+                )
+            return
+        self._fan_out(topics, json.loads(dumps_event(event)))
+
+    def record_delivery(self, latency):
+        self.delivered += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    # Counters for monitoring the fan-out
+    def stats(self):
+        return {
+            "backend": self.backend,
+            "topics": len(self._topics),
+            "subscriptions": sum(len(subs) for subs in self._topics.values()),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "fanout_latency_avg": (
+                self.latency_total / self.delivered if self.delivered else 0.0
+            ),
+            "fanout_latency_max": self.latency_max,
+            "reconnects": self.reconnects,
+        }
+
+    # Open the LISTEN connection, watching for it to drop
+    async def _listen(self):
+        import asyncpg
+
+        listener = await asyncpg.connect(self._dsn)
+        listener.add_termination_listener(self._on_listener_closed)
+        await listener.add_listener(self.channel, self._on_notification)
+        self._listener = listener
+
+    async def _reopen_notifier(self):
+        import asyncpg
+
+        self._notifier = await asyncpg.connect(self._dsn)
+        self.reconnects += 1
+
+    def _on_listener_closed(self, connection):
+        if connection is self._listener:
+            self._listener = None
+            self._reconnect_task = asyncio.ensure_future(self._relisten())
+
+    # Reopen the LISTEN connection with exponential backoff until it succeeds
+    async def _relisten(self):
+        attempt = 0
+        while True:
+            try:
+                await self._listen()
+            except Exception:
+                logger.exception("Could not reopen the event LISTEN connection")
+                attempt += 1
+                await asyncio.sleep(
+                    min(
+                        EVENTS_RECONNECT_BASE_DELAY * 2 ** (attempt - 1),
+                        EVENTS_RECONNECT_MAX_DELAY,
+                    )
+                )
+            else:
+                self.reconnects += 1
+                self._reconnect_task = None
+                return
+
+    def _on_notification(self, connection, pid, channel, payload):
+        message = json.loads(payload)
+        self._fan_out(message["topics"], message["event"])
+
+    def _fan_out(self, topics, event):
+        published_at = time.monotonic()
+        # A subscription to several of the topics receives the event once
+        subscriptions = set()
+        for topic in topics:
+            subscriptions.update(self._topics.get(topic, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait((published_at, event))
+            except asyncio.QueueFull:
+                self.dropped += 1  # Slow consumer: drop rather than block everyone
+
+
+# Topic names
+def asset_topic(asset_id):
+    return f"asset:{asset_id}"
+
+
+def user_topic(user_id):
+    return f"user:{user_id}"
+
+
+# Process-wide event broker
+event_broker = EventBroker()
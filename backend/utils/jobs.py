@@ -0,0 +1,254 @@
+import asyncio
+import inspect
+import logging
+import os
+import time
+from datetime import datetime, timedelta, timezone
+
+from database import async_session
+from models.job_models import Job
+from sqlalchemy import and_, event, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from starlette.concurrency import run_in_threadpool
+
+logger = logging.getLogger(__name__)
+
+# Job queue configuration
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "4"))
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_DELAY = float(os.getenv("JOB_RETRY_BASE_DELAY", "2"))
+JOB_RETRY_MAX_DELAY = float(os.getenv("JOB_RETRY_MAX_DELAY", "300"))
+# Running jobs older than this are assumed to be from a crashed worker and retried
+JOB_TIMEOUT = float(os.getenv("JOB_TIMEOUT", "300"))
+
+
+# Lightweight job queue backed by the jobs table.
+# Request handlers enqueue (in their own transaction) and return immediately; a pool
+# of in-process workers claims due jobs with SELECT ... FOR UPDATE SKIP LOCKED, so
+# several app workers can share the queue. Failed jobs are retried with
+# exponential backoff until max_attempts; enqueuing a job whose key belongs to a
+# job that failed for good queues it again.
+class JobQueue:
+    def __init__(self, workers=JOB_WORKERS):
+        self.workers = workers
+        self._handlers = {}  # kind -> function(payload), sync or async
+        self._tasks = []
+        self._wakeup = None
+        self._loop = None
+
+        self.enqueued = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.failed = 0
+        self.wait_time_total = 0.0
+        self.run_time_total = 0.0
+        self.run_time_max = 0.0
+
+    # Decorator registering the handler of a job kind
+    def handler(self, kind):
+        def register(function):
+            self._handlers[kind] = function
+            return function
+
+        return register
+
+    # Add a job in the caller's transaction (the caller commits).
+    # A job whose idempotency key already exists is not added again, unless that
+    # job has failed for good: it is then reset and queued again.
+    # The workers are woken up once the caller's transaction commits.
+    async def enqueue(self, db, kind, payload, idempotency_key=None, max_attempts=None):
+        statement = insert(Job).values(
+            kind=kind,
+            payload=payload,
+            idempotency_key=idempotency_key,
+            max_attempts=max_attempts or JOB_MAX_ATTEMPTS,
+        )
+        if idempotency_key is not None:
+            statement = statement.on_conflict_do_update(
+                index_elements=[Job.idempotency_key],
+                set_={
+                    "payload": statement.excluded.payload,
+                    "max_attempts": statement.excluded.max_attempts,
+                    "status": "queued",
+                    "attempts": 0,
+                    "last_error": None,
+                    "run_at": func.now(),
+                    "started_at": None,
+                    "finished_at": None,
+                },
+                where=Job.status == "failed",
+            )
+        await db.execute(statement)
+        self.enqueued += 1
+        self._wake_after_commit(db.sync_session)
+
+    # Start the worker pool
+    async def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._worker(), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+
+    # Stop the worker pool (jobs being run are retried after JOB_TIMEOUT)
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    # Number of queued jobs per kind
+    async def depth(self):
+        async with async_session() as db:
+            rows = await db.execute(
+                select(Job.kind, func.count())
+                .where(Job.status == "queued")
+                .group_by(Job.kind)
+            )
+            return {kind: count for kind, count in rows.all()}
+
+    # Counters for monitoring the queue
+    def stats(self):
+        finished = self.succeeded + self.failed + self.retried
+        return {
+            "workers": len(self._tasks),
+            "enqueued": self.enqueued,
+            "succeeded": self.succeeded,
+            "retried": self.retried,
+            "failed": self.failed,
+            "wait_time_avg": self.wait_time_total / finished if finished else 0.0,
+            "run_time_avg": self.run_time_total / finished if finished else 0.0,
+            "run_time_max": self.run_time_max,
+        }
+
+    # Wake the workers when the session's transaction commits (jobs enqueued in it
+    # are not visible to them before). Commits may run in the threadpool.
+    def _wake_after_commit(self, session):
+        if self._loop is None or session.info.get("wake_job_workers"):
+            return
+        session.info["wake_job_workers"] = True
+        event.listen(session, "after_commit", self._on_commit, once=True)
+
+    def _on_commit(self, session):
+        session.info.pop("wake_job_workers", None)
+        self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    async def _worker(self):
+        while True:
+            try:
+                job = await self._claim()
+            except Exception:
+                logger.exception("Could not claim a job")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), JOB_POLL_INTERVAL)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._run(job)
+
+    async def _claim(self):
+        async with async_session() as db:
+            job = await db.scalar(
+                select(Job)
+                .where(
+                    or_(
+                        and_(Job.status == "queued", Job.run_at <= func.now()),
+                        and_(
+                            Job.status == "running",
+                            Job.started_at
+                            < func.now() - timedelta(seconds=JOB_TIMEOUT),
+                        ),
+                    )
+                )
+                .order_by(Job.run_at)
+                .limit(1)
+                .with_for_update(skip_locked=True)
+            )
+            if job is None:
+                return None
+
+            now = datetime.now(timezone.utc)
+            claimed = {
+                "id": job.id,
+                "kind": job.kind,
+                "payload": job.payload,
+                "attempts": job.attempts + 1,
+                "max_attempts": job.max_attempts,
+                "waited": (now - job.run_at).total_seconds() if job.run_at else 0.0,
+            }
+            job.status = "running"
+            job.attempts = claimed["attempts"]
+            job.started_at = now
+            await db.commit()
+            return claimed
+
+    async def _run(self, job):
+        start = time.monotonic()
+        error = None
+        try:
+            handler = self._handlers.get(job["kind"])
+            if handler is None:
+                raise LookupError(f"No handler for job kind {job['kind']}")
+            if inspect.iscoroutinefunction(handler):
+                await handler(job["payload"])
+            else:
+                await run_in_threadpool(handler, job["payload"])
+        except Exception as e:
+            logger.exception("Job %s (%s) failed", job["id"], job["kind"])
+            error = f"{type(e).__name__}: {e}"
+
+        elapsed = time.monotonic() - start
+        self.wait_time_total += max(job["waited"], 0.0)
+        self.run_time_total += elapsed
+        self.run_time_max = max(self.run_time_max, elapsed)
+
+        values = {"finished_at": func.now(), "last_error": error}
+        if error is None:
+            values["status"] = outcome = "succeeded"
+        elif job["attempts"] >= job["max_attempts"]:
+            values["status"] = outcome = "failed"
+        else:
+            delay = min(
+                JOB_RETRY_BASE_DELAY * 2 ** (job["attempts"] - 1), JOB_RETRY_MAX_DELAY
+            )
+            values["status"] = "queued"
+            values["run_at"] = func.now() + timedelta(seconds=delay)
+            outcome = "retried"
+
+        # Only record the result if this worker still owns the job: after
+        # JOB_TIMEOUT it may have been reclaimed (and counted as a new attempt)
+        try:
+            async with async_session() as db:
+                result = await db.execute(
+                    update(Job)
+                    .where(
+                        Job.id == job["id"],
+                        Job.status == "running",
+                        Job.attempts == job["attempts"],
+                    )
+                    .values(**values)
+                )
+                await db.commit()
+        except Exception:
+            logger.exception("Could not record the result of job %s", job["id"])
+            return
+
+        if result.rowcount == 0:
+            logger.warning(
+                "Job %s (%s) was reclaimed by another worker; result discarded",
+                job["id"],
+                job["kind"],
+            )
+            return
+        setattr(self, outcome, getattr(self, outcome) + 1)
+
+
+# Process-wide job queue
+job_queue = JobQueue()
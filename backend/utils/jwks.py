@@ -0,0 +1,165 @@
+import json
+import os
+import threading
+import time
+
+import requests
+from jose import jwk
+
+# JWKS cache configuration (seconds)
+JWKS_CACHE_TTL = float(os.getenv("JWKS_CACHE_TTL", "600"))
+JWKS_MIN_REFETCH_INTERVAL = float(os.getenv("JWKS_MIN_REFETCH_INTERVAL", "30"))
+JWKS_HTTP_TIMEOUT = float(os.getenv("JWKS_HTTP_TIMEOUT", "5"))
+
+
+# Process-wide store for the identity provider's signing keys.
+# Keys are cached by "kid" together with their parsed public key objects, refreshed
+# in the background once the TTL has passed, and refetched synchronously only when
+# a token carries a kid we have never seen (single-flight and rate limited).
+class JWKSKeyStore:
+    def __init__(
+        self,
+        jwks_url,
+        ttl=JWKS_CACHE_TTL,
+        min_refetch_interval=JWKS_MIN_REFETCH_INTERVAL,
+        algorithm="RS256",
+    ):
+        self.jwks_url = jwks_url  # http(s):// URL or file:// path to a local JWKS file
+        self.ttl = ttl
+        self.min_refetch_interval = min_refetch_interval
+        self.algorithm = algorithm
+
+        self._keys = {}  # kid -> parsed public key object
+        self._fetched_at = 0.0
+        self._last_forced_fetch = 0.0
+        self._lock = threading.Lock()  # Guards the cache and counters
+        self._fetch_lock = threading.Lock()  # Single-flight for fetches
+        self._refreshing = False
+        self._session = requests.Session()
+
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.fetch_attempts = 0
+
+    # Return the parsed public key for a kid, or None if the provider does not know it
+    def get_key(self, kid):
+        with self._lock:
+            key = self._keys.get(kid)
+            stale = time.monotonic() - self._fetched_at > self.ttl
+            if key is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if key is not None:
+            if stale:
+                self._refresh_in_background()
+            return key
+
+        # Unknown kid: refetch once (if allowed) and look again
+        self._refetch_for_unknown_kid(kid)
+        with self._lock:
+            return self._keys.get(kid)
+
+    # Fetch the JWKS document and replace the cached keys
+    def refresh(self):
+        with self._fetch_lock:
+            self._fetch_and_store()
+
+    # Counters for monitoring the cache
+    def stats(self):
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": self.refreshes,
+                "refresh_failures": self.refresh_failures,
+                "keys": len(self._keys),
+                "age_seconds": (
+                    time.monotonic() - self._fetched_at if self._fetched_at else None
+                ),
+            }
+
+    # Drop all cached keys and reset the counters (mainly for tests)
+    def clear(self):
+        with self._lock:
+            self._keys = {}
+            self._fetched_at = 0.0
+            self._last_forced_fetch = 0.0
+            self.hits = self.misses = self.refreshes = self.refresh_failures = 0
+
+    def _refetch_for_unknown_kid(self, kid):
+        with self._lock:
+            attempts = self.fetch_attempts
+        # Only one thread fetches; the others wait for it and reuse its result
+        with self._fetch_lock:
+            with self._lock:
+                if kid in self._keys or self.fetch_attempts != attempts:
+                    return
+                now = time.monotonic()
+                if (
+                    self._last_forced_fetch
+                    and now - self._last_forced_fetch < self.min_refetch_interval
+                ):
+                    return  # Rate limited: a burst of bad tokens cannot hammer the provider
+            # A failed fetch does not count, so the next token can retry at once
+            if self._fetch_and_store():
+                with self._lock:
+                    self._last_forced_fetch = now
+
+    def _refresh_in_background(self):
+        with self._lock:
+            if self._refreshing:
+                return
+            self._refreshing = True
+
+        def run():
+            try:
+                self.refresh()
+            finally:
+                with self._lock:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name="jwks-refresh", daemon=True).start()
+
+    # Returns whether the keys could be fetched
+    def _fetch_and_store(self):
+        with self._lock:
+            self.fetch_attempts += 1
+        try:
+            jwks = self._load_jwks()
+            keys = {}
+            for key_data in jwks.get("keys", []):
+                if key_data.get("kty") != "RSA" or "kid" not in key_data:
+                    continue
+                keys[key_data["kid"]] = jwk.construct(
+                    {
+                        "kty": key_data["kty"],
+                        "kid": key_data["kid"],
+                        "use": key_data.get("use", "sig"),
+                        "n": key_data["n"],
+                        "e": key_data["e"],
+                    },
+                    algorithm=self.algorithm,
+                )
+        except Exception:
+            # Keep serving the previous keys if the provider is unreachable
+            with self._lock:
+                self.refresh_failures += 1
+            return False
+
+        with self._lock:
+            self._keys = keys
+            self._fetched_at = time.monotonic()
+            self.refreshes += 1
+        return True
+
+    def _load_jwks(self):
+        if self.jwks_url.startswith("file://"):
+            with open(self.jwks_url[len("file://") :]) as f:
+                return json.load(f)
+        response = self._session.get(self.jwks_url, timeout=JWKS_HTTP_TIMEOUT)
+        response.raise_for_status()
+        return response.json()
@@ -0,0 +1,218 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+
+# Listing cache configuration
+LISTING_CACHE_SIZE = int(os.getenv("LISTING_CACHE_SIZE", "2048"))
+LISTING_CACHE_TTL = float(os.getenv("LISTING_CACHE_TTL", "60"))
+BUCKET_CACHE_TTL = float(os.getenv("BUCKET_CACHE_TTL", "300"))
+BUCKET_CACHE_MISSING_TTL = float(os.getenv("BUCKET_CACHE_MISSING_TTL", "5"))
+# Optional shared tier so that all workers see the same listings and invalidations
+LISTING_CACHE_REDIS_URL = os.getenv("LISTING_CACHE_REDIS_URL")
+# Seconds a bucket's shared generation is reused before asking Redis again (bounds
+# how long another worker's invalidation can go unnoticed)
+LISTING_CACHE_GENERATION_TTL = float(os.getenv("LISTING_CACHE_GENERATION_TTL", "1"))
+
+
+# Function to serialize cached listings for the shared tier
+def _dumps(value):
+    return json.dumps(
+        value, default=lambda v: v.isoformat() if isinstance(v, datetime) else str(v)
+    )
+
+
+# Shared (Redis) tier of the listing cache.
+# Every bucket has a generation counter; invalidating a bucket bumps it, which
+# makes all cached pages of that bucket unreachable on every worker at once.
+class RedisListingTier:
+    def __init__(self, url, ttl=LISTING_CACHE_TTL):
+        import redis  # Optional dependency, only needed for the shared tier
+
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def generation(self, bucket_name):
+        return int(self.client.get(f"listing-gen:{bucket_name}") or 0)
+
+    def get(self, bucket_name, generation, key):
+        value = self.client.get(f"listing:{bucket_name}:{generation}:{key}")
+        return json.loads(value) if value is not None else None
+
+    def put(self, bucket_name, generation, key, value):
+        self.client.set(
+            f"listing:{bucket_name}:{generation}:{key}",
+            _dumps(value),
+            ex=max(int(self.ttl), 1),
+        )
+
+    # Bump the bucket's generation; returns the new one
+    def invalidate(self, bucket_name):
+        return self.client.incr(f"listing-gen:{bucket_name}")
+
+
+# Per-bucket cache of data room listing pages.
+# An in-process LRU with a TTL fallback, optionally backed by a shared Redis tier.
+# Entries are dropped when the bucket changes (bucket notifications or the
+# backend's own uploads and deletes).
+class ListingCache:
+    def __init__(
+        self,
+        maxsize=LISTING_CACHE_SIZE,
+        ttl=LISTING_CACHE_TTL,
+        shared=None,
+        generation_ttl=LISTING_CACHE_GENERATION_TTL,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.shared = shared
+        self.generation_ttl = generation_ttl
+        self._entries = OrderedDict()  # (bucket, generation, key) -> (expires, value)
+        self._generations = {}  # bucket -> local generation
+        self._shared_generations = {}  # bucket -> (expires, shared generation)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.stale_puts = 0
+
+    # Return (cached listing page or None, bucket generation). On a miss, pass the
+    # generation to put() along with the page fetched afterwards.
+    def get(self, bucket_name, key):
+        generation = self._generation(bucket_name)
+        entry_key = (bucket_name, generation, key)
+        with self._lock:
+            entry = self._entries.get(entry_key)
+            if entry is not None and entry[0] > time.monotonic():
+                self._entries.move_to_end(entry_key)
+                self.hits += 1
+                return entry[1], generation
+
+        if self.shared is not None:
+            value = self.shared.get(bucket_name, generation, key)
+            if value is not None:
+                self._store(entry_key, value)
+                with self._lock:
+                    self.shared_hits += 1
+                return value, generation
+
+        with self._lock:
+            self.misses += 1
+        return None, generation
+
+    # Store a listing page fetched at the given generation. A page is dropped if
+    # the bucket was invalidated meanwhile, as it may predate the change.
+    def put(self, bucket_name, key, value, generation):
+        if self._generation(bucket_name) != generation:
+            with self._lock:
+                self.stale_puts += 1
+            return
+        self._store((bucket_name, generation, key), value)
+        if self.shared is not None:
+            self.shared.put(bucket_name, generation, key, value)
+
+    # Drop every cached page of a bucket
+    def invalidate(self, bucket_name):
+        with self._lock:
+            self._generations[bucket_name] = self._generations.get(bucket_name, 0) + 1
+            for entry_key in [k for k in self._entries if k[0] == bucket_name]:
+                del self._entries[entry_key]
+            self.invalidations += 1
+        if self.shared is not None:
+            generation = self.shared.invalidate(bucket_name)
+            with self._lock:
+                self._shared_generations[bucket_name] = (
+                    time.monotonic() + self.generation_ttl,
+                    generation,
+                )
+
+    # Counters for monitoring the cache
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.shared_hits + self.misses
+            return {
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits + self.shared_hits) / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "stale_puts": self.stale_puts,
+                "size": len(self._entries),
+                "shared": self.shared is not None,
+            }
+
+    # Current generation of a bucket. The shared one is reused for generation_ttl
+    # seconds, so local hits do not cost a Redis round trip.
+    def _generation(self, bucket_name):
+        if self.shared is None:
+            with self._lock:
+                return self._generations.get(bucket_name, 0)
+
+        now = time.monotonic()
+        with self._lock:
+            entry = self._shared_generations.get(bucket_name)
+            if entry is not None and entry[0] > now:
+                return entry[1]
+        generation = self.shared.generation(bucket_name)
+        with self._lock:
+            if len(self._shared_generations) >= self.maxsize:
+                self._shared_generations.clear()
+            self._shared_generations[bucket_name] = (
+                now + self.generation_ttl,
+                generation,
+            )
+        return generation
+
+    def _store(self, entry_key, value):
+        with self._lock:
+            self._entries[entry_key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(entry_key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+
+# Cache of bucket_exists results, so the hot listing path skips that round trip.
+# Existing buckets are remembered longer than missing ones.
+class BucketExistenceCache:
+    def __init__(self, ttl=BUCKET_CACHE_TTL, missing_ttl=BUCKET_CACHE_MISSING_TTL):
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self._buckets = {}  # bucket -> (expires, exists)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # Whether the bucket exists, or None if it is not cached
+    def get(self, bucket_name):
+        with self._lock:
+            entry = self._buckets.get(bucket_name)
+            if entry is not None and entry[0] > time.monotonic():
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+            return None
+
+    # Record the state of a bucket (e.g. right after creating it)
+    def set(self, bucket_name, exists):
+        ttl = self.ttl if exists else self.missing_ttl
+        with self._lock:
+            self._buckets[bucket_name] = (time.monotonic() + ttl, exists)
+
+    # Counters for monitoring the cache
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._buckets)}
+
+
+# Process-wide caches for the data room buckets
+listing_cache = ListingCache(
+    shared=(
+        RedisListingTier(LISTING_CACHE_REDIS_URL) if LISTING_CACHE_REDIS_URL else None
+    )
+)
+bucket_cache = BucketExistenceCache()
@@ -0,0 +1,100 @@
+import os
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+
+# Number of asset order books kept in memory
+ORDER_BOOK_CACHE_SIZE = int(os.getenv("ORDER_BOOK_CACHE_SIZE", "1000"))
+
+
+# In-memory order book of the active bids on one asset.
+# Bids are kept in a list sorted by (highest amount, earliest bid), maintained with
+# bisect, so the best bid and a bid's rank are O(log n) lookups and the top N is
+# a slice. The book is a cache of the bids table: apply() folds in the rows that
+# changed since last_seq.
+class OrderBook:
+    def __init__(self):
+        self.last_seq = 0
+        self._sorted = []  # (-amount, created_at, bid_id)
+        self._entries = {}  # bid_id -> (sort key, bid dict)
+        self._lock = threading.Lock()
+
+    # Fold changed bid rows (ordered by update_seq) into the book
+    def apply(self, rows):
+        with self._lock:
+            for row in rows:
+                if row.update_seq <= self.last_seq:
+                    continue
+                self.last_seq = row.update_seq
+                bid_id = str(row.id)
+                if row.status == "active" and bid_id not in self._entries:
+                    key = (-row.amount, row.created_at.timestamp(), bid_id)
+                    insort(self._sorted, key)
+                    self._entries[bid_id] = (
+                        key,
+                        {
+                            "id": row.id,
+                            "bidder_id": row.bidder_id,
+                            "amount": row.amount,
+                            "created_at": row.created_at,
+                        },
+                    )
+                elif row.status != "active" and bid_id in self._entries:
+                    key, _ = self._entries.pop(bid_id)
+                    del self._sorted[bisect_left(self._sorted, key)]
+
+    # Highest active bid, or None
+    def best(self):
+        with self._lock:
+            if not self._sorted:
+                return None
+            return self._entries[self._sorted[0][2]][1]
+
+    # The n highest active bids with their rank (1 = best)
+    def top(self, n):
+        with self._lock:
+            return [
+                dict(self._entries[key[2]][1], rank=rank)
+                for rank, key in enumerate(self._sorted[:n], start=1)
+            ]
+
+    # Rank of a bid in the book (1 = best), or None if it is not active
+    def rank(self, bid_id):
+        with self._lock:
+            entry = self._entries.get(str(bid_id))
+            if entry is None:
+                return None
+            return bisect_left(self._sorted, entry[0]) + 1
+
+    def __len__(self):
+        return len(self._sorted)
+
+
+# Process-wide registry of order books, least recently used books are dropped
+class OrderBookRegistry:
+    def __init__(self, maxsize=ORDER_BOOK_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._books = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, asset_id):
+        asset_id = str(asset_id)
+        with self._lock:
+            book = self._books.get(asset_id)
+            if book is None:
+                book = self._books[asset_id] = OrderBook()
+            self._books.move_to_end(asset_id)
+            while len(self._books) > self.maxsize:
+                self._books.popitem(last=False)
+            return book
+
+    def stats(self):
+        with self._lock:
+            return {
+                "books": len(self._books),
+                "bids": sum(len(book) for book in self._books.values()),
+            }
+
+
+# Process-wide order books
+order_books = OrderBookRegistry()
@@ -0,0 +1,30 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+
+
+# Function to encode the sort key of the last row of a page into an opaque cursor
+def encode_cursor(*values):
+    raw = json.dumps(
+        [
+            value.isoformat() if isinstance(value, datetime) else str(value)
+            for value in values
+        ]
+    )
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+# Function to decode a cursor back into its keyset values.
+# parsers converts each encoded value; the default is a (created_at, id) cursor.
+def decode_cursor(cursor: str, parsers=(datetime.fromisoformat, uuid.UUID)):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded))
+        if len(values) != len(parsers):
+            raise ValueError("Cursor does not match the requested ordering")
+        return tuple(parse(value) for parse, value in zip(parsers, values))
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
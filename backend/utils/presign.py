@@ -0,0 +1,92 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from utils.storage import presign_backend
+
+# Presigned-URL offload: when enabled the backend only checks access and hands out
+# short-lived URLs, and file bytes go directly between the client and MinIO
+STORAGE_OFFLOAD = os.getenv("STORAGE_OFFLOAD", "false").lower() == "true"
+PRESIGNED_URL_EXPIRY = int(os.getenv("PRESIGNED_URL_EXPIRY", "300"))
+# A cached URL is handed out again only while it has at least this much life left
+PRESIGNED_URL_MIN_REMAINING = int(os.getenv("PRESIGNED_URL_MIN_REMAINING", "60"))
+PRESIGNED_URL_CACHE_SIZE = int(os.getenv("PRESIGNED_URL_CACHE_SIZE", "10000"))
+
+
+# LRU cache of presigned URLs, reused within their expiry window.
+# Signing is done by a storage backend bound to the public endpoint with a fixed
+# region, so no request to MinIO is needed to sign.
+class PresignedURLCache:
+    def __init__(
+        self,
+        backend,
+        expiry=PRESIGNED_URL_EXPIRY,
+        min_remaining=PRESIGNED_URL_MIN_REMAINING,
+        maxsize=PRESIGNED_URL_CACHE_SIZE,
+    ):
+        self.backend = backend
+        self.expiry = expiry
+        self.min_remaining = min(min_remaining, expiry // 2)
+        self.maxsize = maxsize
+        self._urls = OrderedDict()  # (method, bucket, object) -> (url, expires_at)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # Presigned GET URL for downloading an object
+    def get_url(self, bucket_name: str, object_name: str):
+        return self._url("GET", bucket_name, object_name)
+
+    # Presigned PUT URL for uploading an object
+    def put_url(self, bucket_name: str, object_name: str):
+        return self._url("PUT", bucket_name, object_name)
+
+    # Forget the URLs of an object (after it was replaced or deleted)
+    def invalidate(self, bucket_name: str, object_name: str):
+        with self._lock:
+            for key in [k for k in self._urls if k[1:] == (bucket_name, object_name)]:
+                del self._urls[key]
+
+    # Counters for monitoring the cache
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._urls)}
+
+    def _url(self, method, bucket_name, object_name):
+        key = (method, bucket_name, object_name)
+        now = time.time()
+        with self._lock:
+            entry = self._urls.get(key)
+            if entry is not None and entry[1] - now >= self.min_remaining:
+                self._urls.move_to_end(key)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        url = self.backend.presigned_url(
+            method, bucket_name, object_name, expires=timedelta(seconds=self.expiry)
+        )
+        entry = (url, now + self.expiry)
+
+        with self._lock:
+            self._urls[key] = entry
+            self._urls.move_to_end(key)
+            while len(self._urls) > self.maxsize:
+                self._urls.popitem(last=False)
+        return entry
+
+
+# Function to build the API response for a presigned URL
+def presigned_url_response(entry):
+    url, expires_at = entry
+    return {
+        "url": url,
+        "expires_at": datetime.fromtimestamp(expires_at, tz=timezone.utc),
+    }
+
+
+# Process-wide presigned URL cache
+presigned_urls = PresignedURLCache(presign_backend)
@@ -0,0 +1,112 @@
+import logging
+import os
+import threading
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+
+# Development mode: count the SQL statements of every request
+QUERY_COUNTER = os.getenv("QUERY_COUNTER", "false").lower() == "true"
+# Raise QueryBudgetExceeded instead of logging a warning (used by tests)
+QUERY_BUDGET_STRICT = os.getenv("QUERY_BUDGET_STRICT", "false").lower() == "true"
+
+# Maximum number of SQL statements per request, by (method, route path).
+# Authentication does not touch the database, so these are the route's own queries.
+QUERY_BUDGETS = {
+    # User routes
+    ("GET", "/user/me"): 1,
+    ("PATCH", "/user/{user_id}/update"): 2,
+    ("GET", "/users"): 1,
+    ("POST", "/user/create"): 2,
+    ("PATCH", "/user/{user_id}/deactivate"): 2,
+    # Asset routes
+    ("GET", "/assets/me"): 1,
+    ("GET", "/assets/me/dashboard"): 4,
+    ("POST", "/assets/{asset_id}/offer"): 2,
+    ("GET", "/assets/{asset_id}"): 1,
+    ("PATCH", "/assets/{asset_id}"): 1,
+    ("GET", "/marketplace"): 1,
+    # NDA routes
+    ("POST", "/assets/{asset_id}/nda/request"): 8,
+    ("POST", "/assets/{asset_id}/nda/upload"): 5,
+    ("POST", "/assets/{asset_id}/nda/upload-url"): 1,
+    ("POST", "/assets/{asset_id}/nda/upload/complete"): 5,
+    ("POST", "/assets/{asset_id}/nda/confirm"): 3,
+    ("POST", "/nda/bulk"): 2,
+    ("GET", "/nda/inbox"): 1,
+    ("GET", "/assets/{asset_id}/nda/view"): 1,
+}
+
+
+# Raised in strict mode when a request runs more statements than its budget
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+# Statements run by the current request (shared with the threadpool and the
+# asyncpg greenlets through the context)
+_request_queries = ContextVar("request_queries", default=None)
+
+
+# Counts SQL statements per request and keeps per-endpoint totals
+class QueryCounter:
+    def __init__(self, budgets=QUERY_BUDGETS, strict=QUERY_BUDGET_STRICT):
+        self.budgets = budgets
+        self.strict = strict
+        self._endpoints = {}  # (method, path) -> [requests, queries, max, over budget]
+        self._lock = threading.Lock()
+
+    # Count the statements of an engine (sync engine, or async_engine.sync_engine)
+    def instrument(self, engine):
+        event.listen(engine, "before_cursor_execute", self._on_execute)
+
+    # Start counting for the current request; returns the (mutable) counter
+    def start(self):
+        queries = [0]
+        _request_queries.set(queries)
+        return queries
+
+    # Record a finished request, and enforce its budget
+    def record(self, method, path, count):
+        budget = self.budgets.get((method, path))
+        over = budget is not None and count > budget
+        with self._lock:
+            entry = self._endpoints.setdefault((method, path), [0, 0, 0, 0])
+            entry[0] += 1
+            entry[1] += count
+            entry[2] = max(entry[2], count)
+            entry[3] += over
+
+        if over:
+            message = f"{method} {path} ran {count} queries (budget {budget})"
+            if self.strict:
+                raise QueryBudgetExceeded(message)
+            logger.warning(message)
+
+    # Per-endpoint counters for monitoring
+    def stats(self):
+        with self._lock:
+            return {
+                f"{method} {path}": {
+                    "requests": requests,
+                    "queries_avg": queries / requests,
+                    "queries_max": max_queries,
+                    "budget": self.budgets.get((method, path)),
+                    "over_budget": over,
+                }
+                for (method, path), (requests, queries, max_queries, over) in sorted(
+                    self._endpoints.items()
+                )
+            }
+
+    @staticmethod
+    def _on_execute(conn, cursor, statement, parameters, context, executemany):
+        queries = _request_queries.get()
+        if queries is not None:
+            queries[0] += 1
+
+
+# Process-wide query counter
+query_counter = QueryCounter()
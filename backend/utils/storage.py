@@ -0,0 +1,521 @@
+import asyncio
+import mimetypes
+import os
+import time
+from datetime import datetime, timezone
+from itertools import islice
+from pathlib import Path
+from typing import NamedTuple, Optional
+
+import certifi
+import urllib3
+from settings import (
+    MINIO_ACCESS_KEY,
+    MINIO_ENDPOINT,
+    MINIO_PUBLIC_ENDPOINT,
+    MINIO_PUBLIC_SECURE,
+    MINIO_REGION,
+    MINIO_SECRET_KEY,
+)
+from starlette.concurrency import run_in_threadpool
+from utils.uploads import UPLOAD_PART_SIZE
+
+from minio import Minio
+from minio.error import S3Error, ServerError
+
+# Object store configuration
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "minio")  # "minio" or "filesystem"
+STORAGE_ROOT = os.getenv("STORAGE_ROOT", "/data/storage")  # filesystem backend only
+MINIO_SECURE = os.getenv("MINIO_SECURE", "false").lower() == "true"
+# Connections kept open to MinIO (should cover STORAGE_MAX_CONCURRENCY)
+STORAGE_POOL_SIZE = int(os.getenv("STORAGE_POOL_SIZE", "32"))
+STORAGE_CONNECT_TIMEOUT = float(os.getenv("STORAGE_CONNECT_TIMEOUT", "5"))
+STORAGE_READ_TIMEOUT = float(os.getenv("STORAGE_READ_TIMEOUT", "60"))
+# Storage calls in flight at once; further calls wait instead of piling up threads
+STORAGE_MAX_CONCURRENCY = int(os.getenv("STORAGE_MAX_CONCURRENCY", "32"))
+STORAGE_RETRIES = int(os.getenv("STORAGE_RETRIES", "3"))
+STORAGE_RETRY_BASE_DELAY = float(os.getenv("STORAGE_RETRY_BASE_DELAY", "0.1"))
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# Raised by every backend when a bucket or object does not exist
+class ObjectNotFound(Exception):
+    pass
+
+
+# A listed or stat'ed object (or folder, for delimited listings)
+class ObjectInfo(NamedTuple):
+    name: str
+    is_dir: bool = False
+    size: Optional[int] = None
+    etag: Optional[str] = None
+    last_modified: Optional[datetime] = None
+    content_type: Optional[str] = None
+
+
+# An opened object; stream() yields its bytes, close() releases the connection
+class StoredObject:
+    def __init__(self, chunks, close):
+        self._chunks = chunks
+        self._close = close
+
+    def stream(self, chunk_size):
+        return self._chunks(chunk_size)
+
+    def close(self):
+        if self._close is not None:
+            self._close()
+            self._close = None
+
+
+# Interface of the object store backends. Methods are blocking; ObjectStore runs
+# them in the threadpool.
+class StorageBackend:
+    def bucket_exists(self, bucket_name):
+        raise NotImplementedError
+
+    def make_bucket(self, bucket_name):
+        raise NotImplementedError
+
+    # Store data (a file-like object) as an object; length=-1 for unknown lengths
+    def put_object(
+        self, bucket_name, object_name, data, length, part_size, content_type
+    ):
+        raise NotImplementedError
+
+    def stat_object(self, bucket_name, object_name):
+        raise NotImplementedError
+
+    # Open an object, or the byte range [offset, offset + length) of it
+    def open_object(self, bucket_name, object_name, offset=0, length=None):
+        raise NotImplementedError
+
+    # Iterate the objects below prefix in name order, after start_after.
+    # recursive=False lists a single level ("/" delimiter) with folders as entries.
+    def list_objects(self, bucket_name, prefix, recursive, start_after=None):
+        raise NotImplementedError
+
+    def presigned_url(self, method, bucket_name, object_name, expires):
+        raise NotImplementedError
+
+    # Whether an error is worth retrying (timeouts, throttling, 5xx)
+    def is_transient(self, error):
+        return False
+
+
+# MinIO / S3 backend with a tuned urllib3 connection pool.
+# Transport retries are disabled: ObjectStore retries (and counts) them itself.
+class MinioBackend(StorageBackend):
+    NOT_FOUND_CODES = ("NoSuchKey", "NoSuchBucket", "NoSuchObject")
+    TRANSIENT_CODES = (
+        "SlowDown",
+        "InternalError",
+        "ServiceUnavailable",
+        "RequestTimeout",
+    )
+
+    def __init__(
+        self,
+        endpoint=MINIO_ENDPOINT,
+        secure=MINIO_SECURE,
+        region=MINIO_REGION,
+        pool_size=STORAGE_POOL_SIZE,
+    ):
+        http_client = urllib3.PoolManager(
+            maxsize=pool_size,
+            block=True,  # Wait for a free connection rather than opening extra ones
+            timeout=urllib3.Timeout(
+                connect=STORAGE_CONNECT_TIMEOUT, read=STORAGE_READ_TIMEOUT
+            ),
+            retries=False,
+            cert_reqs="CERT_REQUIRED",
+            ca_certs=certifi.where(),
+        )
+        self.client = Minio(
+            endpoint,
+            access_key=MINIO_ACCESS_KEY,
+            secret_key=MINIO_SECRET_KEY,
+            secure=secure,
+            region=region,
+            http_client=http_client,
+        )
+
+    def bucket_exists(self, bucket_name):
+        return self.client.bucket_exists(bucket_name)
+
+    def make_bucket(self, bucket_name):
+        self.client.make_bucket(bucket_name)
+
+    def put_object(
+        self, bucket_name, object_name, data, length, part_size, content_type
+    ):
+        self.client.put_object(
+            bucket_name,
+            object_name,
+            data,
+            length=length,
+            part_size=part_size,
+            content_type=content_type,
+        )
+
+    def stat_object(self, bucket_name, object_name):
+        try:
+            stat = self.client.stat_object(bucket_name, object_name)
+        except S3Error as e:
+            raise self._translate(e)
+        return ObjectInfo(
+            name=stat.object_name,
+            size=stat.size,
+            etag=stat.etag,
+            last_modified=stat.last_modified,
+            content_type=stat.content_type,
+        )
+
+    def open_object(self, bucket_name, object_name, offset=0, length=None):
+        try:
+            response = self.client.get_object(
+                bucket_name, object_name, offset=offset, length=length or 0
+            )
+        except S3Error as e:
+            raise self._translate(e)
+
+        def close():
+            response.close()
+            response.release_conn()
+
+        return StoredObject(response.stream, close)
+
+    def list_objects(self, bucket_name, prefix, recursive, start_after=None):
+        objects = self.client.list_objects(
+            bucket_name,
+            prefix=prefix or None,
+            recursive=recursive,
+            start_after=start_after,
+            include_user_meta=True,  # MinIO extension: returns the content type
+        )
+        try:
+            for obj in objects:
+                metadata = obj.metadata or {}
+                yield ObjectInfo(
+                    name=obj.object_name,
+                    is_dir=obj.is_dir,
+                    size=obj.size,
+                    etag=obj.etag,
+                    last_modified=obj.last_modified,
+                    content_type=next(
+                        (v for k, v in metadata.items() if k.lower() == "content-type"),
+                        None,
+                    ),
+                )
+        except S3Error as e:
+            raise self._translate(e)
+
+    def presigned_url(self, method, bucket_name, object_name, expires):
+        return self.client.get_presigned_url(
+            method, bucket_name, object_name, expires=expires
+        )
+
+    def is_transient(self, error):
+        if isinstance(error, (urllib3.exceptions.HTTPError, ServerError)):
+            return True
+        return isinstance(error, S3Error) and error.code in self.TRANSIENT_CODES
+
+    # Map "no such bucket/object" errors to ObjectNotFound
+    def _translate(self, error):
+        if error.code in self.NOT_FOUND_CODES:
+            return ObjectNotFound(f"{error.bucket_name}/{error.object_name}")
+        return error
+
+
+# Local filesystem backend (development and tests): buckets are directories
+# below root and objects are files.
+class FilesystemBackend(StorageBackend):
+    def __init__(self, root=STORAGE_ROOT):
+        self.root = Path(root).resolve()
+
+    def bucket_exists(self, bucket_name):
+        return self._bucket(bucket_name).is_dir()
+
+    def make_bucket(self, bucket_name):
+        self._bucket(bucket_name).mkdir(parents=True, exist_ok=True)
+
+    def put_object(
+        self, bucket_name, object_name, data, length, part_size, content_type
+    ):
+        path = self._object(bucket_name, object_name)
+        if not path.parent.is_dir() and not self.bucket_exists(bucket_name):
+            raise ObjectNotFound(bucket_name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Write to a temporary file so readers never see a partial object
+        partial = path.with_name(path.name + ".partial")
+        remaining = length if length >= 0 else None
+        try:
+            with open(partial, "wb") as f:
+                while remaining is None or remaining > 0:
+                    size = part_size if remaining is None else min(part_size, remaining)
+                    chunk = data.read(size)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    if remaining is not None:
+                        remaining -= len(chunk)
+            os.replace(partial, path)
+        except BaseException:
+            # Aborted upload (e.g. too large or disconnected): drop the partial file
+            partial.unlink(missing_ok=True)
+            raise
+
+    def stat_object(self, bucket_name, object_name):
+        path = self._object(bucket_name, object_name)
+        if not path.is_file():
+            raise ObjectNotFound(f"{bucket_name}/{object_name}")
+        return self._info(object_name, path)
+
+    def open_object(self, bucket_name, object_name, offset=0, length=None):
+        path = self._object(bucket_name, object_name)
+        if not path.is_file():
+            raise ObjectNotFound(f"{bucket_name}/{object_name}")
+        f = open(path, "rb")
+        f.seek(offset)
+
+        def chunks(chunk_size):
+            remaining = length
+            while remaining is None or remaining > 0:
+                size = chunk_size if remaining is None else min(chunk_size, remaining)
+                chunk = f.read(size)
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+        return StoredObject(chunks, f.close)
+
+    def list_objects(self, bucket_name, prefix, recursive, start_after=None):
+        bucket = self._bucket(bucket_name)
+        if not bucket.is_dir():
+            raise ObjectNotFound(bucket_name)
+
+        names = sorted(
+            path.relative_to(bucket).as_posix()
+            for path in bucket.rglob("*")
+            if path.is_file() and not path.name.endswith(".partial")
+        )
+        folders = set()
+        for name in names:
+            if prefix and not name.startswith(prefix):
+                continue
+            if not recursive:
+                folder, slash, _ = name[len(prefix or "") :].partition("/")
+                if slash:
+                    folder_name = f"{prefix or ''}{folder}/"
+                    if folder_name not in folders and (
+                        start_after is None or folder_name > start_after
+                    ):
+                        folders.add(folder_name)
+                        yield ObjectInfo(name=folder_name, is_dir=True)
+                    continue
+            if start_after is None or name > start_after:
+                yield self._info(name, bucket / name)
+
+    def presigned_url(self, method, bucket_name, object_name, expires):
+        return self._object(bucket_name, object_name).as_uri()
+
+    def _bucket(self, bucket_name):
+        return self._inside(self.root / bucket_name)
+
+    def _object(self, bucket_name, object_name):
+        return self._inside(self._bucket(bucket_name) / object_name)
+
+    # Keep object names like "../x" from escaping the storage root
+    def _inside(self, path):
+        path = path.resolve()
+        if path != self.root and self.root not in path.parents:
+            raise ObjectNotFound(str(path))
+        return path
+
+    @staticmethod
+    def _info(object_name, path):
+        stat = path.stat()
+        return ObjectInfo(
+            name=object_name,
+            size=stat.st_size,
+            etag=f"{stat.st_mtime_ns:x}-{stat.st_size:x}",
+            last_modified=datetime.fromtimestamp(stat.st_mtime, tz=timezone.utc),
+            content_type=mimetypes.guess_type(object_name)[0]
+            or "application/octet-stream",
+        )
+
+
+# Latency histogram of one storage operation
+class LatencyHistogram:
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # Last bucket: slower than every bound
+        self.count = 0
+        self.errors = 0
+        self.retries = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds, error=False):
+        index = next(
+            (i for i, bound in enumerate(self.bounds) if seconds <= bound),
+            len(self.bounds),
+        )
+        self.counts[index] += 1
+        self.count += 1
+        self.errors += error
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self):
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "retries": self.retries,
+            "latency_avg": self.total / self.count if self.count else 0.0,
+            "latency_max": self.max,
+            "histogram": {
+                **{f"le_{bound}": n for bound, n in zip(self.bounds, self.counts)},
+                "le_inf": self.counts[-1],
+            },
+        }
+
+
+# Shared async object store used by every route and job.
+# Blocking backend calls run in the threadpool, at most max_concurrency at a time,
+# transient errors are retried with exponential backoff, and every operation is
+# timed in a latency histogram.
+class ObjectStore:
+    def __init__(
+        self,
+        backend,
+        max_concurrency=STORAGE_MAX_CONCURRENCY,
+        retries=STORAGE_RETRIES,
+        retry_base_delay=STORAGE_RETRY_BASE_DELAY,
+    ):
+        self.backend = backend
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.retry_base_delay = retry_base_delay
+        self._semaphore = None  # Created on first use, inside the event loop
+        self._histograms = {}  # operation -> LatencyHistogram
+
+    async def bucket_exists(self, bucket_name):
+        return await self._call("bucket_exists", bucket_name)
+
+    async def make_bucket(self, bucket_name):
+        await self._call("make_bucket", bucket_name)
+
+    # Not retried: data may be a one-shot stream (e.g. a request body)
+    async def put_object(
+        self,
+        bucket_name,
+        object_name,
+        data,
+        length=-1,
+        part_size=UPLOAD_PART_SIZE,
+        content_type="application/octet-stream",
+    ):
+        await self._call(
+            "put_object",
+            bucket_name,
+            object_name,
+            data,
+            length,
+            part_size,
+            content_type,
+            retry=False,
+        )
+
+    async def stat_object(self, bucket_name, object_name):
+        return await self._call("stat_object", bucket_name, object_name)
+
+    async def open_object(self, bucket_name, object_name, offset=0, length=None):
+        return await self._call(
+            "open_object", bucket_name, object_name, offset=offset, length=length
+        )
+
+    # One page of a listing (see StorageBackend.list_objects)
+    async def list_objects(
+        self, bucket_name, prefix, recursive, start_after=None, limit=1000
+    ):
+        def page():
+            objects = self.backend.list_objects(
+                bucket_name, prefix, recursive, start_after
+            )
+            return list(islice(objects, limit))
+
+        return await self._run("list_objects", page)
+
+    # Whole listing as a blocking iterator, for streaming responses (Starlette
+    # iterates it in the threadpool)
+    def iter_objects(self, bucket_name, prefix, recursive, start_after=None):
+        return self.backend.list_objects(bucket_name, prefix, recursive, start_after)
+
+    def presigned_url(self, method, bucket_name, object_name, expires):
+        return self.backend.presigned_url(method, bucket_name, object_name, expires)
+
+    # Per-operation counters and latency histograms for monitoring
+    def stats(self):
+        return {
+            "backend": type(self.backend).__name__,
+            "max_concurrency": self.max_concurrency,
+            "operations": {
+                operation: histogram.stats()
+                for operation, histogram in self._histograms.items()
+            },
+        }
+
+    async def _call(self, operation, *args, retry=True, **kwargs):
+        function = getattr(self.backend, operation)
+        return await self._run(operation, function, *args, retry=retry, **kwargs)
+
+    async def _run(self, operation, function, *args, retry=True, **kwargs):
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        histogram = self._histograms.setdefault(operation, LatencyHistogram())
+
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                start = time.monotonic()
+                try:
+                    result = await run_in_threadpool(function, *args, **kwargs)
+                except ObjectNotFound:
+                    histogram.observe(time.monotonic() - start)
+                    raise
+                except Exception as e:
+                    histogram.observe(time.monotonic() - start, error=True)
+                    if not (
+                        retry
+                        and attempt < self.retries
+                        and self.backend.is_transient(e)
+                    ):
+                        raise
+                else:
+                    histogram.observe(time.monotonic() - start)
+                    return result
+
+            # Back off outside the semaphore so other calls can proceed
+            attempt += 1
+            histogram.retries += 1
+            await asyncio.sleep(self.retry_base_delay * 2 ** (attempt - 1))
+
+
+# Function to create the configured storage backend
+def create_backend(endpoint=MINIO_ENDPOINT, secure=MINIO_SECURE):
+    if STORAGE_BACKEND == "filesystem":
+        return FilesystemBackend()
+    return MinioBackend(endpoint=endpoint, secure=secure)
+
+
+# Process-wide object store
+object_store = ObjectStore(create_backend())
+
+# Backend used only for signing URLs that browsers will call (public endpoint)
+presign_backend = create_backend(MINIO_PUBLIC_ENDPOINT, MINIO_PUBLIC_SECURE)
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+# Verified-token cache configuration
+TOKEN_CACHE_ENABLED = os.getenv("TOKEN_CACHE_ENABLED", "true").lower() == "true"
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_MAX_TTL = float(os.getenv("TOKEN_CACHE_MAX_TTL", "300"))
+
+
+# Bounded LRU cache of already verified tokens.
+# Entries are keyed by a SHA-256 hash of the token (the raw token is never stored)
+# and hold the decoded payload until the token's own "exp" claim.
+class TokenCache:
+    def __init__(
+        self,
+        maxsize=TOKEN_CACHE_SIZE,
+        max_ttl=TOKEN_CACHE_MAX_TTL,
+        enabled=TOKEN_CACHE_ENABLED,
+    ):
+        self.maxsize = maxsize
+        self.max_ttl = max_ttl  # Upper bound for tokens without an "exp" claim
+        self.enabled = enabled
+        self._entries = OrderedDict()  # token hash -> (expires_at, payload)
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    # Return the cached payload for a token, or None if absent or expired
+    def get(self, token):
+        if not self.enabled:
+            return None
+        key = self._hash(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, payload = entry
+            if time.time() >= expires_at:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return payload
+
+    # Store the payload of a freshly verified token
+    def put(self, token, payload):
+        if not self.enabled:
+            return
+        now = time.time()
+        expires_at = now + self.max_ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, exp)
+        if expires_at <= now:
+            return
+
+        key = self._hash(token)
+        with self._lock:
+            self._entries[key] = (expires_at, payload)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    # Counters for monitoring the cache
+    def stats(self):
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._entries),
+                "maxsize": self.maxsize,
+            }
+
+    # Drop all cached tokens and reset the counters
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    @staticmethod
+    def _hash(token):
+        return hashlib.sha256(token.encode()).hexdigest()
@@ -0,0 +1,61 @@
+import asyncio
+import hashlib
+import os
+
+# Upload limits and multipart configuration
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", str(100 * 1024 * 1024)))
+UPLOAD_PART_SIZE = int(os.getenv("UPLOAD_PART_SIZE", str(10 * 1024 * 1024)))
+
+
+# Raised when a streamed upload grows beyond its size limit
+class UploadTooLarge(Exception):
+    pass
+
+
+# File-like reader over an async byte stream (e.g. Request.stream()).
+# The object store client reads from it in a worker thread while the chunks are
+# pulled on the event loop, so the body is never spooled to disk. The content is
+# hashed (SHA-256) and measured as it passes through.
+class StreamingUploadReader:
+    def __init__(self, chunks, loop, max_size=MAX_UPLOAD_SIZE):
+        self._chunks = chunks
+        self._loop = loop
+        self.max_size = max_size
+        self.size = 0
+        self._sha256 = hashlib.sha256()
+        self._buffer = bytearray()
+        self._finished = False
+
+    @property
+    def sha256(self):
+        return self._sha256.hexdigest()
+
+    def read(self, size=-1):
+        while not self._finished and (size < 0 or len(self._buffer) < size):
+            chunk = self._next_chunk()
+            if chunk is None:
+                self._finished = True
+                break
+            self.size += len(chunk)
+            if self.size > self.max_size:
+                raise UploadTooLarge(f"Upload exceeds {self.max_size} bytes")
+            self._sha256.update(chunk)
+            self._buffer += chunk
+
+        if size < 0 or size >= len(self._buffer):
+            data = bytes(self._buffer)
+            self._buffer.clear()
+        else:
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+        return data
+
+    def _next_chunk(self):
+        async def next_chunk():
+            try:
+                return await self._chunks.__anext__()
+            except StopAsyncIteration:
+                return None
+
+        # Called from a worker thread: let the event loop receive the next chunk
+        return asyncio.run_coroutine_threadsafe(next_chunk(), self._loop).result()
@@ -0,0 +1,108 @@
+import os
+import time
+from contextlib import contextmanager
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+import streamlit as st
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+
+# Load environment variables from the .env file
+load_dotenv()
+
+# Backend API configuration
+API_URL = os.getenv("API_URL", "http://localhost:8000")
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "10"))
+API_POOL_SIZE = int(os.getenv("API_POOL_SIZE", "10"))
+# Seconds a GET response is reused across reruns (per user)
+API_CACHE_TTL = int(os.getenv("API_CACHE_TTL", "30"))
+# Show render time and backend request counts in the sidebar
+API_DEBUG_STATS = os.getenv("API_DEBUG_STATS", "false").lower() == "true"
+
+
+# Shared HTTP session (one per server process), so connections to the backend and
+# Auth0 are kept alive across reruns and users.
+# Its cookie jar would be shared by all users too, so it accepts no cookies.
+@st.cache_resource
+def get_http_session():
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = HTTPAdapter(pool_connections=API_POOL_SIZE, pool_maxsize=API_POOL_SIZE)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+# Function to send a request through the shared session.
+# url may be a backend path ("/assets/me") or an absolute URL.
+def api_request(method, url, access_token=None, **kwargs):
+    if not url.startswith(("http://", "https://")):
+        url = f"{API_URL}{url}"
+    headers = kwargs.pop("headers", {})
+    if access_token:
+        headers["Authorization"] = f"Bearer {access_token}"
+
+    start = time.perf_counter()
+    try:
+        return get_http_session().request(
+            method, url, headers=headers, timeout=API_TIMEOUT, **kwargs
+        )
+    finally:
+        stats = st.session_state.setdefault("api_stats", {"requests": 0})
+        stats["requests"] += 1
+        stats["request_time"] = stats.get("request_time", 0.0) + (
+            time.perf_counter() - start
+        )
+
+
+# Cached GET of a backend path. Keyed by the access token (so per user) and the
+# session's cache generation, which invalidate_api_cache bumps.
+@st.cache_data(ttl=API_CACHE_TTL, show_spinner=False)
+def _cached_get(path, access_token, generation):
+    response = api_request("GET", path, access_token)
+    if response.status_code != 200:
+        return response.status_code, None
+    return response.status_code, response.json()
+
+
+# Function to GET a backend path with short-lived caching.
+# Returns the decoded JSON, or None if the request failed.
+def api_get_json(path, access_token):
+    generation = st.session_state.get("api_cache_generation", 0)
+    status_code, data = _cached_get(path, access_token, generation)
+    if status_code != 200:
+        # Do not keep serving a failure for the whole TTL (other paths stay cached)
+        _cached_get.clear(path, access_token, generation)
+    return data
+
+
+# Function to drop this user's cached responses (call after a mutation)
+def invalidate_api_cache():
+    st.session_state["api_cache_generation"] = (
+        st.session_state.get("api_cache_generation", 0) + 1
+    )
+
+
+# Context manager measuring one page render: its duration and the backend
+# requests it made. Shown in the sidebar when API_DEBUG_STATS is enabled.
+@contextmanager
+def measure_render(page_name):
+    stats = st.session_state.setdefault("api_stats", {"requests": 0})
+    requests_before = stats["requests"]
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        render = {
+            "page": page_name,
+            "render_time": time.perf_counter() - start,
+            "backend_requests": stats["requests"] - requests_before,
+        }
+        st.session_state["last_render"] = render
+        if API_DEBUG_STATS:
+            st.sidebar.caption(
+                f"{page_name}: {render['render_time'] * 1000:.0f} ms, "
+                f"{render['backend_requests']} backend requests "
+                f"({stats['requests']} this session)"
+            )
@@ -1,7 +1,12 @@
+import base64
+import hashlib
+import json
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 
-import requests
 import streamlit as st
+from api import API_DEBUG_STATS, API_TIMEOUT, api_request, get_http_session
 from dotenv import load_dotenv
 
 # Load environment variables from the .env file
@@ -13,12 +18,17 @@ AUTH0_CLIENT_ID = os.getenv("AUTH0_CLIENT_ID")
 AUTH0_CLIENT_SECRET = os.getenv("AUTH0_CLIENT_SECRET")
 AUTH0_CALLBACK_URL = os.getenv("AUTH0_CALLBACK_URL")
 AUTH0_AUDIENCE = os.getenv("AUTH0_AUDIENCE")
+# Profile endpoint (can point to a local stub identity provider)
+AUTH0_USERINFO_URL = os.getenv(
+    "AUTH0_USERINFO_URL", f"https://{AUTH0_DOMAIN}/userinfo"
+)
+# Lifetime of a cached profile when the access token's expiry is unknown
+USER_INFO_TTL = int(os.getenv("USER_INFO_TTL", "300"))
 
 
 # Function to initiate the login process via Auth0 using Resource Owner Password Grant
 def login(email, password):
     token_url = f"https://{AUTH0_DOMAIN}/oauth/token"
-    headers = {"Content-Type": "application/json"}
     payload = {
         "grant_type": "password",
         "username": email,
@@ -27,7 +37,7 @@ def login(email, password):
         "client_id": AUTH0_CLIENT_ID,
         "client_secret": AUTH0_CLIENT_SECRET,
     }
-    response = requests.post(token_url, headers=headers, json=payload)
+    response = api_request("POST", token_url, json=payload)
     if response.status_code == 200:
         return response.json()  # Return the token data
     else:
@@ -40,16 +50,102 @@ def logout():
     if "access_token" in st.session_state:
         del st.session_state["access_token"]
         del st.session_state["username"]
+        st.session_state.pop("user_info", None)
+        st.session_state.pop("user_info_pending", None)
     st.success("You have been logged out.")
     st.experimental_rerun()
 
 
-# Function to get the user info from Auth0 using the access token
+# Function to read the claims of a JWT without verifying it (only used for
+# cache expiry and display; the backend verifies every token it receives)
+def unverified_claims(token):
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return json.loads(base64.urlsafe_b64decode(payload))
+    except (IndexError, ValueError):
+        return {}  # Opaque token
+
+
+# Function to compute when a cached profile for an access token expires
+def token_expiry(access_token):
+    exp = unverified_claims(access_token).get("exp")
+    return exp if exp else time.time() + USER_INFO_TTL
+
+
+# Threads that fetch profiles in the background after a login
+@st.cache_resource
+def get_user_info_executor():
+    return ThreadPoolExecutor(max_workers=4, thread_name_prefix="userinfo")
+
+
+# Function to call the userinfo endpoint (runs in a background thread, so it
+# must not touch st.session_state)
+def fetch_user_info(http_session, access_token):
+    response = http_session.get(
+        AUTH0_USERINFO_URL,
+        headers={"Authorization": f"Bearer {access_token}"},
+        timeout=API_TIMEOUT,
+    )
+    return response.json() if response.status_code == 200 else None
+
+
+# Function to cache the profile of an access token in the session
+def store_user_info(access_token, profile):
+    st.session_state["user_info"] = {
+        "token": hashlib.sha256(access_token.encode()).hexdigest(),
+        "expires_at": token_expiry(access_token),
+        "profile": profile,
+    }
+
+
+# Function to start resolving the profile of a new access token in the background.
+# With an ID token (scope "openid") the profile is taken from its claims instead
+# and no request is made.
+def prefetch_user_info(access_token, id_token=None):
+    claims = unverified_claims(id_token) if id_token else {}
+    if claims:
+        store_user_info(access_token, claims)
+        return
+
+    st.session_state["userinfo_calls"] = st.session_state.get("userinfo_calls", 0) + 1
+    st.session_state["user_info_pending"] = (
+        hashlib.sha256(access_token.encode()).hexdigest(),
+        get_user_info_executor().submit(
+            fetch_user_info, get_http_session(), access_token
+        ),
+    )
+
+
+# Function to get the user info from Auth0 using the access token.
+# The profile is fetched once per access token and kept in the session until the
+# token expires; a fetch started at login is picked up instead of a new request.
 def get_user_info(access_token):
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(f"https://{AUTH0_DOMAIN}/userinfo", headers=headers)
-    if response.status_code == 200:
-        return response.json()
+    token_hash = hashlib.sha256(access_token.encode()).hexdigest()
+    cached = st.session_state.get("user_info")
+    if (
+        cached
+        and cached["token"] == token_hash
+        and cached["expires_at"] > time.time()
+    ):
+        return cached["profile"]
+
+    pending = st.session_state.pop("user_info_pending", None)
+    if pending is not None and pending[0] == token_hash:
+        try:
+            profile = pending[1].result(timeout=API_TIMEOUT)
+        except Exception as _:
+            profile = None
+    else:
+        st.session_state["userinfo_calls"] = (
+            st.session_state.get("userinfo_calls", 0) + 1
+        )
+        response = api_request("GET", AUTH0_USERINFO_URL, access_token)
+        profile = response.json() if response.status_code == 200 else None
+
+    if profile is not None:
+        store_user_info(access_token, profile)
+        return profile
     else:
         st.error("Failed to fetch user information.")
         return None
@@ -58,6 +154,10 @@ def get_user_info(access_token):
 # Function to display the current login status and options to log out
 def display_logout():
     st.sidebar.markdown(f"### Logged in as: {st.session_state.get('username', 'User')}")
+    if API_DEBUG_STATS:
+        st.sidebar.caption(
+            f"userinfo requests this session: {st.session_state.get('userinfo_calls', 0)}"
+        )
     if st.sidebar.button("Logout"):
         logout()
 
@@ -71,6 +171,8 @@ def display_login_form():
         token_data = login(email, password)
         if token_data:
             st.session_state["access_token"] = token_data["access_token"]
+            # Resolve the profile while the rest of the page renders
+            prefetch_user_info(token_data["access_token"], token_data.get("id_token"))
             st.session_state["username"] = (
                 email  # You can change this to the user's actual name from token_data
             )
@@ -1,4 +1,5 @@
 import streamlit as st
+from api import measure_render
 from auth import display_login_form, display_logout, get_user_info
 
 # Set page configuration
@@ -75,4 +76,5 @@ def main_page():
 
 # Check if the script is being run as the main entry point
 if __name__ == "__main__":
-    main_page()
+    with measure_render("home"):
+        main_page()
@@ -1,16 +1,15 @@
-import requests
 import streamlit as st
+from api import api_get_json, api_request, invalidate_api_cache, measure_render
 from auth import display_login_form
 
-API_URL = "http://localhost:8000"  # Define the API URL as a fallback
 
-
-# Function to get user assets from the backend
+# Function to get user assets from the backend (cached for a few seconds)
+# The dashboard endpoint returns each asset with its NDA, bid and data room
+# summaries, so the page needs no further requests per asset
 def get_user_assets(access_token):
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(f"{API_URL}/assets/me", headers=headers)
-    if response.status_code == 200:
-        return response.json()
+    data = api_get_json("/assets/me/dashboard", access_token)
+    if data is not None:
+        return data["assets"]
     else:
         st.error("Failed to fetch assets.")
         return []
@@ -18,36 +17,21 @@ def get_user_assets(access_token):
 
 # Function to offer an asset for sale
 def offer_asset_for_sale(asset_id, access_token, sale_info):
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-    response = requests.post(
-        f"{API_URL}/assets/{asset_id}/offer", headers=headers, json=sale_info
+    response = api_request(
+        "POST", f"/assets/{asset_id}/offer", access_token, json=sale_info
     )
-    return response.status_code == 200
-
-
-# Function to get asset details
-def get_asset_details(asset_id, access_token):
-    headers = {"Authorization": f"Bearer {access_token}"}
-    response = requests.get(f"{API_URL}/assets/{asset_id}", headers=headers)
     if response.status_code == 200:
-        return response.json()
-    else:
-        st.error("Failed to fetch asset details.")
-        return None
+        invalidate_api_cache()  # The asset list and details have changed
+    return response.status_code == 200
 
 
 # Function to update asset information
 def update_asset(asset_id, access_token, updated_data):
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-    response = requests.patch(
-        f"{API_URL}/assets/{asset_id}", headers=headers, json=updated_data
+    response = api_request(
+        "PATCH", f"/assets/{asset_id}", access_token, json=updated_data
     )
+    if response.status_code == 200:
+        invalidate_api_cache()  # The asset list and details have changed
     return response.status_code == 200
 
 
@@ -95,36 +79,33 @@ def assets_management_page():
                         else:
                             st.error("Failed to offer asset for sale.")
 
-                # Button to view asset details
+                # Button to view asset details (already part of the dashboard)
                 if st.button("View Asset Details", key=f"view_{asset['id']}"):
-                    asset_details = get_asset_details(asset["id"], access_token)
-                    if asset_details:
-                        st.write("Asset Details:")
-                        st.write(asset_details)
-
-                        # Option to edit asset information for seller
-                        if user == "Testseller" and st.button("Edit Asset"):
-                            updated_name = st.text_input(
-                                "New Asset Name", value=asset_details["name"]
-                            )
-                            updated_description = st.text_area(
-                                "New Description", value=asset_details["description"]
-                            )
-                            updated_data = {
-                                "name": updated_name,
-                                "description": updated_description,
-                            }
-                            if st.button("Update Asset"):
-                                if update_asset(
-                                    asset["id"], access_token, updated_data
-                                ):
-                                    st.success("Asset updated successfully!")
-                                else:
-                                    st.error("Failed to update asset.")
+                    st.write("Asset Details:")
+                    st.write(asset)
+
+                    # Option to edit asset information for seller
+                    if user == "Testseller" and st.button("Edit Asset"):
+                        updated_name = st.text_input(
+                            "New Asset Name", value=asset["name"]
+                        )
+                        updated_description = st.text_area(
+                            "New Description", value=asset["description"]
+                        )
+                        updated_data = {
+                            "name": updated_name,
+                            "description": updated_description,
+                        }
+                        if st.button("Update Asset"):
+                            if update_asset(asset["id"], access_token, updated_data):
+                                st.success("Asset updated successfully!")
+                            else:
+                                st.error("Failed to update asset.")
     else:
         st.write("No assets found.")
 
 
 # Check if the script is being run as the main entry point
 if __name__ == "__main__":
-    assets_management_page()
+    with measure_render("assets"):
+        assets_management_page()
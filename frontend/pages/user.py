@@ -1,19 +1,15 @@
-import requests
 import streamlit as st
+from api import api_request, invalidate_api_cache, measure_render
 from auth import display_login_form, get_user_info  # Import login and logout functions
 
-API_URL = "http://localhost:8000"  # Define the API URL as a fallback
-
 
 # Function to update user information
 def update_user_info(user_id, access_token, update_data):
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-    response = requests.patch(
-        f"{API_URL}/user/{user_id}/update", headers=headers, json=update_data
+    response = api_request(
+        "PATCH", f"/user/{user_id}/update", access_token, json=update_data
     )
+    if response.status_code == 200:
+        invalidate_api_cache()  # Cached user data is stale now
     return response.status_code == 200
 
 
@@ -73,7 +69,8 @@ def user_management_page():
 # Check query parameters
 query_params = st.query_params  # Updated line
 if query_params.get("page") == ["user"]:
-    user_management_page()
+    with measure_render("user"):
+        user_management_page()
 else:
     st.error("You don't have access to this page.")
     display_login_form()
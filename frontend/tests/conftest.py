@@ -0,0 +1,103 @@
+import base64
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+
+# Stand-in for the Auth0 userinfo endpoint, recording the tokens it was called with
+class UserInfoStub(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), UserInfoHandler)
+        self.tokens = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}/userinfo"
+
+
+class UserInfoHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        self.server.tokens.append(token)
+        if token.startswith("invalid"):
+            self.send_response(401)
+            self.end_headers()
+            return
+        body = json.dumps({"sub": f"auth0|{token[-8:]}", "name": "Test User"})
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def userinfo(monkeypatch):
+    import auth
+
+    server = UserInfoStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(auth, "AUTH0_USERINFO_URL", server.url)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# Stand-in for the backend API, recording the requests it receives.
+# Paths starting with /fail answer 500; every response tries to set a cookie.
+class BackendStub(ThreadingHTTPServer):
+    def __init__(self):
+        super().__init__(("127.0.0.1", 0), BackendHandler)
+        self.requests = []
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_port}"
+
+    def paths(self):
+        return [path for path, _ in self.requests]
+
+
+class BackendHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get("Cookie")))
+        status = 500 if self.path.startswith("/fail") else 200
+        body = json.dumps({"path": self.path})
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Set-Cookie", f"session={len(self.server.requests)}; Path=/")
+        self.end_headers()
+        self.wfile.write(body.encode())
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    import api
+    import streamlit as st
+
+    server = BackendStub()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setattr(api, "API_URL", server.url)
+    st.cache_data.clear()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+# Function to build an unsigned JWT (the frontend never verifies tokens)
+def make_jwt(expires_in=3600, **claims):
+    def encode(value):
+        return base64.urlsafe_b64encode(json.dumps(value).encode()).rstrip(b"=")
+
+    claims.setdefault("exp", int(time.time()) + expires_in)
+    return b".".join([encode({"alg": "none"}), encode(claims), b"signature"]).decode()
@@ -0,0 +1,77 @@
+from streamlit.testing.v1 import AppTest
+
+
+# Page that GETs the paths listed in the session state on every rerun
+def fetch_page():
+    import streamlit as st
+    from api import api_get_json, invalidate_api_cache
+
+    if st.session_state.pop("invalidate", False):
+        invalidate_api_cache()
+    st.session_state["responses"] = {
+        path: api_get_json(path, st.session_state["access_token"])
+        for path in st.session_state["paths"]
+    }
+
+
+def run_page(app, reruns=1):
+    for _ in range(reruns):
+        app.run()
+        assert not app.exception
+    return app.session_state["responses"]
+
+
+def user_app(access_token, *paths):
+    app = AppTest.from_function(fetch_page)
+    app.session_state["access_token"] = access_token
+    app.session_state["paths"] = list(paths)
+    return app
+
+
+def test_responses_are_reused_across_reruns(backend):
+    app = user_app("token-a", "/assets/me/dashboard")
+
+    responses = run_page(app, reruns=3)
+
+    assert responses == {"/assets/me/dashboard": {"path": "/assets/me/dashboard"}}
+    assert backend.paths() == ["/assets/me/dashboard"]
+
+
+def test_invalidation_fetches_again(backend):
+    app = user_app("token-a", "/assets/me/dashboard")
+    run_page(app)
+
+    app.session_state["invalidate"] = True
+    run_page(app)
+
+    assert backend.paths() == ["/assets/me/dashboard"] * 2
+
+
+def test_responses_are_cached_per_user(backend):
+    run_page(user_app("token-a", "/users/me"))
+    run_page(user_app("token-b", "/users/me"))
+
+    assert backend.paths() == ["/users/me"] * 2
+
+
+def test_failures_are_dropped_without_the_other_responses(backend):
+    app = user_app("token-a", "/assets/me/dashboard", "/failing")
+
+    responses = run_page(app, reruns=3)
+
+    assert responses == {
+        "/assets/me/dashboard": {"path": "/assets/me/dashboard"},
+        "/failing": None,
+    }
+    assert backend.paths() == ["/assets/me/dashboard"] + ["/failing"] * 3
+
+
+def test_cookies_are_not_shared_between_users(backend):
+    from api import get_http_session
+
+    run_page(user_app("token-a", "/users/me"))
+    run_page(user_app("token-b", "/users/me"))
+
+    # The backend set a cookie for the first user; the second must not send it
+    assert [cookie for _, cookie in backend.requests] == [None, None]
+    assert len(get_http_session().cookies) == 0
@@ -0,0 +1,85 @@
+from conftest import make_jwt
+from streamlit.testing.v1 import AppTest
+
+
+# Page that resolves the profile of the session's access token on every rerun
+def profile_page():
+    import streamlit as st
+    from auth import get_user_info, prefetch_user_info
+
+    login = st.session_state.pop("login", None)
+    if login:
+        st.session_state["access_token"] = login["access_token"]
+        prefetch_user_info(login["access_token"], login.get("id_token"))
+    st.session_state["profile"] = get_user_info(st.session_state["access_token"])
+
+
+def run_page(app, reruns=3, **login):
+    if login:
+        app.session_state["login"] = login
+    for _ in range(reruns):
+        app.run()
+        assert not app.exception
+    return app.session_state["profile"]
+
+
+def test_profile_is_fetched_once_per_access_token(userinfo):
+    app = AppTest.from_function(profile_page)
+    token = make_jwt(sub="first")
+    app.session_state["access_token"] = token
+
+    profile = run_page(app)
+
+    assert profile["name"] == "Test User"
+    assert userinfo.tokens == [token]
+    assert app.session_state["userinfo_calls"] == 1
+
+    # A new access token gets its own profile
+    other_token = make_jwt(sub="second")
+    app.session_state["access_token"] = other_token
+    run_page(app)
+    assert userinfo.tokens == [token, other_token]
+
+
+def test_login_prefetch_is_reused(userinfo):
+    app = AppTest.from_function(profile_page)
+    token = make_jwt()
+
+    profile = run_page(app, access_token=token)
+
+    assert profile["name"] == "Test User"
+    assert userinfo.tokens == [token]
+    assert app.session_state["userinfo_calls"] == 1
+
+
+def test_id_token_claims_avoid_the_request(userinfo):
+    app = AppTest.from_function(profile_page)
+
+    profile = run_page(
+        app, access_token=make_jwt(), id_token=make_jwt(sub="auth0|1", name="Ada")
+    )
+
+    assert profile["name"] == "Ada"
+    assert userinfo.tokens == []
+
+
+def test_expired_profiles_are_fetched_again(userinfo):
+    app = AppTest.from_function(profile_page)
+    token = make_jwt(expires_in=-1)
+    app.session_state["access_token"] = token
+
+    run_page(app, reruns=2)
+
+    assert userinfo.tokens == [token, token]
+
+
+def test_failed_lookups_are_not_cached(userinfo):
+    app = AppTest.from_function(profile_page)
+    token = "invalid-token"
+    app.session_state["access_token"] = token
+
+    profile = run_page(app, reruns=2)
+
+    assert profile is None
+    assert userinfo.tokens == [token, token]
+    assert app.error[0].value == "Failed to fetch user information."